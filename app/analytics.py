@@ -0,0 +1,228 @@
+"""
+Precomputed application analytics.
+
+Instead of scanning applications, every flush turns the captured changes into
+counter deltas and applies them with INSERT ... ON CONFLICT DO UPDATE in the
+same transaction:
+
+- application_stats (owner_id, dimension, key, count): totals by status, platform and
+  week applied, applications with a response (status other than "Applied") per
+  platform, and a histogram of days from applying to the first response per
+  platform ("response_days:<platform>", capped at RESPONSE_DAYS_CAP). The first
+  response is the application's responded_at, so every counter is a function
+  of the current row: deletes subtract what inserts added and a rebuild from
+  the table gives the same numbers as the incremental path.
+- status_transitions (owner_id, from_status, to_status, count): funnel data.
+
+Counters are kept per user. Reading a user's analytics touches a number of rows
+bounded by their distinct statuses, platforms, weeks and histogram buckets,
+not by the number of applications.
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime
+from sqlalchemy import select, update, insert, delete, func, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from . import events, models
+
+RESPONSE_DAYS_CAP = 90
+NO_RESPONSE_STATUS = "Applied"
+
+
+def _week(values):
+    day = values.get("date_applied") or values.get("created_at")
+    if day is None:
+        return "unknown"
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _status(values):
+    return values.get("status") or NO_RESPONSE_STATUS
+
+
+def _platform(values):
+    return values.get("platform") or "Not specified"
+
+
+def _owner(values):
+    return values.get("owner_id") or 0
+
+
+def _response_days(values):
+    """Days from applying to the first response, or None without a response"""
+    started = values.get("date_applied") or values.get("created_at")
+    responded = values.get("responded_at")
+    if started is None or responded is None:
+        return None
+    if isinstance(started, datetime):
+        started = started.date()
+    return min(max((responded.date() - started).days, 0), RESPONSE_DAYS_CAP)
+
+
+def _stat_keys(values):
+    """The (owner_id, dimension, key) counters one application contributes to"""
+    owner = _owner(values)
+    keys = [("total", "all"), ("status", _status(values)), ("platform", _platform(values)), ("week", _week(values))]
+    if _status(values) != NO_RESPONSE_STATUS:
+        keys.append(("responded", _platform(values)))
+    days = _response_days(values)
+    if days is not None:
+        keys.append((f"response_days:{_platform(values)}", str(days)))
+    return [(owner,) + key for key in keys]
+
+
+def compute_deltas(changes):
+    """Return (stat deltas, transition deltas) for a batch of ApplicationChange"""
+    stats = Counter()
+    transitions = Counter()
+    for change in changes:
+        values = change.values
+        if change.kind == "created":
+            for key in _stat_keys(values):
+                stats[key] += 1
+            transitions[(_owner(values), "", _status(values))] += 1
+        elif change.kind == "deleted":
+            for key in _stat_keys(values):
+                stats[key] -= 1
+        else:
+            old = {**values, **change.old}
+            for key in _stat_keys(old):
+                stats[key] -= 1
+            for key in _stat_keys(values):
+                stats[key] += 1
+            if _status(old) != _status(values):
+                transitions[(_owner(values), _status(old), _status(values))] += 1
+    return stats, transitions
+
+
+def _increment(conn, table, key_columns, deltas):
+    rows = [{**dict(zip(key_columns, key)), "count": delta} for key, delta in deltas.items() if delta]
+    if not rows:
+        return
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialect == "sqlite" else postgresql).insert(table)
+        stmt = stmt.on_conflict_do_update(index_elements=list(key_columns), set_={"count": table.c.count + stmt.excluded["count"]})
+        conn.execute(stmt, rows)
+        return
+    for row in rows:
+        where = [table.c[c] == row[c] for c in key_columns]
+        if conn.execute(update(table).where(*where).values(count=table.c.count + row["count"])).rowcount == 0:
+            conn.execute(insert(table).values(**row))
+
+
+def apply_deltas(conn, stats, transitions):
+    _increment(conn, models.ApplicationStat.__table__, ("owner_id", "dimension", "key"), stats)
+    _increment(conn, models.StatusTransition.__table__, ("owner_id", "from_status", "to_status"), transitions)
+
+
+@events.on_flush
+def _update_aggregates(session, changes):
+    stats, transitions = compute_deltas(changes)
+    apply_deltas(session.connection(), stats, transitions)
+
+
+def drop_unscoped(conn):
+    """Counters from before users existed can't be split by owner; drop them so install() reseeds"""
+    inspector = inspect(conn)
+    for table in (models.ApplicationStat.__table__, models.StatusTransition.__table__):
+        if inspector.has_table(table.name) and "owner_id" not in {c["name"] for c in inspector.get_columns(table.name)}:
+            table.drop(conn)
+            print(f"🛠️ Dropped {table.name} to rebuild it per user")
+
+
+def install(conn):
+    """Seed the counters from existing applications the first time the tables are empty"""
+    A = models.Application.__table__
+    if conn.execute(select(func.count()).select_from(models.ApplicationStat.__table__)).scalar():
+        return
+    stats, transitions = Counter(), Counter()
+    rows = conn.execute(select(A.c.owner_id, A.c.status, A.c.platform, A.c.date_applied, A.c.created_at, A.c.responded_at))
+    for row in rows:
+        values = dict(row._mapping)
+        for key in _stat_keys(values):
+            stats[key] += 1
+        # The path an existing application took is unknown, count it as entering its current status
+        transitions[(_owner(values), "", _status(values))] += 1
+    if stats:
+        apply_deltas(conn, stats, transitions)
+        total = sum(count for (owner, dimension, key), count in stats.items() if dimension == "total")
+        print(f"📊 Seeded analytics from {total} applications")
+
+
+def rebuild_response_days(conn):
+    """
+    Backfill responded_at and recount the response-time histograms from the table.
+
+    Runs once when the column is added: rows that already have a response get
+    the time their current status was set, the closest record left.
+    """
+    A = models.Application.__table__
+    S = models.ApplicationStat.__table__
+    conn.execute(update(A).where(A.c.responded_at.is_(None), A.c.status.is_not(None), A.c.status != NO_RESPONSE_STATUS).values(
+        responded_at=func.coalesce(A.c.status_changed_at, A.c.updated_at, A.c.created_at)
+    ))
+    conn.execute(delete(S).where(S.c.dimension.like("response_days:%")))
+    stats = Counter()
+    for row in conn.execute(select(A.c.owner_id, A.c.platform, A.c.date_applied, A.c.created_at, A.c.responded_at).where(A.c.responded_at.is_not(None))):
+        values = dict(row._mapping)
+        days = _response_days(values)
+        if days is not None:
+            stats[(_owner(values), f"response_days:{_platform(values)}", str(days))] += 1
+    _increment(conn, S, ("owner_id", "dimension", "key"), stats)
+    print(f"📊 Rebuilt response times from {sum(stats.values())} applications")
+
+
+def _median(histogram):
+    total = sum(histogram.values())
+    if not total:
+        return None
+    seen = 0
+    for days in sorted(histogram):
+        seen += histogram[days]
+        if seen * 2 >= total:
+            return days
+
+
+def get_analytics(db, owner_id):
+    S = models.ApplicationStat
+    stats = defaultdict(dict)
+    for dimension, key, count in db.query(S.dimension, S.key, S.count).filter(S.owner_id == owner_id):
+        if count:
+            stats[dimension][key] = count
+
+    total = stats["total"].get("all", 0)
+    by_platform = stats["platform"]
+    responded = stats["responded"]
+
+    histograms = {}
+    overall = Counter()
+    for dimension, buckets in stats.items():
+        if dimension.startswith("response_days:"):
+            histogram = {int(days): count for days, count in buckets.items()}
+            histograms[dimension.split(":", 1)[1]] = histogram
+            overall.update(histogram)
+
+    T = models.StatusTransition
+    transitions = [
+        {"from": from_status or None, "to": to_status, "count": count}
+        for from_status, to_status, count in db.query(T.from_status, T.to_status, T.count).filter(T.owner_id == owner_id)
+        if count
+    ]
+    funnel = Counter()
+    for t in transitions:
+        funnel[t["to"]] += t["count"]
+
+    return {
+        "total": total,
+        "by_status": stats["status"],
+        "by_platform": by_platform,
+        "by_week": dict(sorted(stats["week"].items())),
+        "response_rate": round(sum(responded.values()) / total, 3) if total else None,
+        "response_rate_by_platform": {p: round(responded.get(p, 0) / n, 3) for p, n in by_platform.items()},
+        "median_response_days": _median(overall),
+        "median_response_days_by_platform": {p: _median(h) for p, h in histograms.items()},
+        "transitions": transitions,
+        "funnel": dict(funnel),
+    }
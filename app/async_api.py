@@ -0,0 +1,100 @@
+"""
+Async versions of the application CRUD endpoints, served when DB_ASYNC is on.
+
+They run on the event loop against the async engine instead of occupying a
+threadpool worker per request, and reuse the statement builders in queries.py
+so both variants return identical results.
+"""
+
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import cache, database, deps, models, queries, schemas, search
+
+router = APIRouter()
+CurrentUser = Depends(deps.current_user_id)
+
+
+async def get_async_db():
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+
+@router.post("/applications", response_model=schemas.ApplicationOut)
+async def create_application(application: schemas.ApplicationCreate, user_id: int = CurrentUser, db: AsyncSession = Depends(get_async_db)):
+    db_app = models.Application(**application.dict(), owner_id=user_id)
+    db.add(db_app)
+    await db.commit()
+    await db.refresh(db_app)
+    return db_app
+
+
+@router.get("/applications", response_model=schemas.ApplicationPage)
+async def get_applications(
+    request: Request,
+    limit: int = Query(50, ge=1, le=queries.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    platform: Optional[str] = None,
+    applied_from: Optional[date] = None,
+    applied_to: Optional[date] = None,
+    company_prefix: Optional[str] = None,
+    q: Optional[str] = Query(None, description="Case-insensitive substring of the company or role"),
+    fields: Optional[str] = Query(None, description="Comma separated columns to return, e.g. id,company_name,status"),
+    include_total: bool = False,
+    user_id: int = CurrentUser,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List applications newest first, one keyset page at a time; pass next_cursor back to get the next page"""
+    response_cache = cache.get_cache()
+    key = cache.make_key(
+        "applications", owner=user_id, limit=limit, cursor=cursor, status=status, platform=platform, applied_from=applied_from,
+        applied_to=applied_to, company_prefix=company_prefix, q=q, fields=fields, include_total=include_total,
+    )
+    versioned_key = response_cache.versioned_key(key, cache.list_tags(user_id, status, platform))
+    if response_cache.is_not_modified(request, versioned_key):
+        return Response(status_code=304, headers={"ETag": cache.ResponseCache.etag(versioned_key)})
+
+    body = response_cache.get(versioned_key)
+    if body is None:
+        try:
+            columns = queries.parse_fields(fields)
+            conditions = queries.application_filters(user_id, status, platform, applied_from, applied_to, company_prefix, q)
+            rows = await db.execute(queries.list_applications_stmt(columns, conditions, limit, cursor))
+        except queries.InvalidQuery as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        items, next_cursor = queries.build_page(rows, columns, limit)
+        total = (await db.execute(queries.count_applications_stmt(conditions))).scalar() if include_total else None
+        body = cache.encode({"items": items, "next_cursor": next_cursor, "total": total})
+        response_cache.store(versioned_key, body)
+    return cache.json_response(body, versioned_key)
+
+
+@router.put("/applications/{app_id}", response_model=schemas.ApplicationOut)
+async def update_status(app_id: int, update: schemas.ApplicationUpdate, user_id: int = CurrentUser, db: AsyncSession = Depends(get_async_db)):
+    db_app = await db.get(models.Application, app_id)
+    if not db_app or db_app.owner_id != user_id:
+        raise HTTPException(status_code=404, detail="Application not found")
+    db_app.status = update.status
+    await db.commit()
+    await db.refresh(db_app)
+    return db_app
+
+
+@router.get("/applications/status/{company}", response_model=List[schemas.ApplicationOut])
+async def get_status_by_company(
+    company: str, limit: int = Query(20, ge=1, le=100), user_id: int = CurrentUser, db: AsyncSession = Depends(get_async_db)
+):
+    response_cache = cache.get_cache()
+    key = cache.make_key("search", owner=user_id, company=company.lower(), limit=limit)
+    versioned_key = response_cache.versioned_key(key, [cache.user_tag(user_id)])
+    body = response_cache.get(versioned_key)
+    if body is None:
+        # The search helpers are written against a sync Session; run_sync hands them one on the same connection
+        apps = await db.run_sync(lambda session: search.search_applications(session, user_id, company, limit=limit, fields=queries.DEFAULT_FIELDS))
+        body = cache.encode(apps)
+        response_cache.store(versioned_key, body)
+    return cache.json_response(body)
@@ -0,0 +1,262 @@
+"""
+Bulk import/export of applications as CSV or NDJSON (exports also as one JSON array).
+
+Imports are streamed: the request body is decoded as it arrives and handed to
+a worker thread through a small bounded queue, rows are validated one by one
+and written in chunks with executemany inserts/updates. Rows are upserted by
+(company_name, role, job_link) within the importing user's applications. Exports stream rows with yield_per so the table
+is never materialized in memory.
+"""
+
+import asyncio
+import codecs
+import csv
+import io
+import json
+import queue
+from datetime import datetime
+from pydantic import ValidationError
+from sqlalchemy import select, insert, update, tuple_
+from starlette.concurrency import run_in_threadpool
+from . import analytics, database, events, models, schemas, serialization
+
+COLUMNS = ("company_name", "role", "platform", "date_applied", "status", "job_link")
+# Only new rows get these; an update touches just the columns the input has
+INSERT_DEFAULTS = {"role": "Not specified", "platform": "Not specified", "date_applied": None, "status": "Applied", "job_link": None}
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+FORMATS = {"csv", "ndjson"}
+
+
+def detect_format(requested, content_type):
+    """Pick csv/ndjson from an explicit ?format= or the request Content-Type"""
+    if requested:
+        fmt = requested.lower()
+    elif content_type and "csv" in content_type:
+        fmt = "csv"
+    elif content_type and ("ndjson" in content_type or "jsonl" in content_type or "json" in content_type):
+        fmt = "ndjson"
+    else:
+        fmt = None
+    if fmt not in FORMATS:
+        raise ValueError("Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson")
+    return fmt
+
+
+def _iter_lines(chunks):
+    """Re-split arbitrary text chunks into lines, keeping line endings for the csv module"""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        lines = buffer.split("\n")
+        buffer = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if buffer:
+        yield buffer
+
+
+def _upsert_key(row):
+    return (row["company_name"], row.get("role") or INSERT_DEFAULTS["role"], row.get("job_link") or "")
+
+
+class BulkImporter:
+    def __init__(self, fmt, owner_id, chunk_size=CHUNK_SIZE):
+        self.fmt = fmt
+        self.owner_id = owner_id
+        self.chunk_size = chunk_size
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def _error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def _records(self, chunks):
+        """Yield (line_number, dict) for each input record"""
+        lines = _iter_lines(chunks)
+        if self.fmt == "csv":
+            reader = csv.DictReader(lines)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    self._error(line_number, f"Invalid JSON: {str(e)}")
+                    continue
+                if not isinstance(record, dict):
+                    self._error(line_number, "Expected a JSON object")
+                    continue
+                yield line_number, record
+
+    def _validate(self, record):
+        values = {}
+        for column in COLUMNS:
+            value = record.get(column)
+            if isinstance(value, str):
+                value = value.strip() or None
+            if value is not None:
+                values[column] = value
+        # Spreadsheets often leave role/platform blank: validate with the placeholders but return only the
+        # columns present in the input, so an update never overwrites a real value (inserts get INSERT_DEFAULTS)
+        placeholders = {"role": INSERT_DEFAULTS["role"], "platform": INSERT_DEFAULTS["platform"]}
+        return schemas.ApplicationCreate(**{**placeholders, **values}).dict(include=set(values))
+
+    def run(self, chunks):
+        """Consume text chunks and import them, returning the import report"""
+        db = database.SessionLocal()
+        db.info["source"] = "import"
+        try:
+            batch = []
+            for line_number, record in self._records(chunks):
+                try:
+                    batch.append(self._validate(record))
+                except ValidationError as e:
+                    self._error(line_number, "; ".join(
+                        f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                    ))
+                    continue
+                if len(batch) >= self.chunk_size:
+                    self._write(db, batch)
+                    batch = []
+            if batch:
+                self._write(db, batch)
+        except csv.Error as e:
+            self._error(0, f"Invalid CSV: {str(e)}")
+        finally:
+            db.close()
+        return {"inserted": self.inserted, "updated": self.updated, "failed": self.failed, "errors": self.errors}
+
+    def _write(self, db, rows):
+        inserted, updated = upsert_applications(db, rows, self.owner_id)
+        db.commit()
+        self.inserted += inserted
+        self.updated += updated
+
+
+def upsert_applications(db, rows, owner_id):
+    """
+    Insert or update the user's rows keyed by (company_name, role, job_link) using executemany.
+
+    Returns (inserted, updated). The caller commits.
+    """
+    A = models.Application
+    by_key = {_upsert_key(r): r for r in rows}  # last occurrence in the chunk wins
+
+    existing = {}
+    pairs = list({(k[0], k[1]) for k in by_key})
+    stmt = select(A.id, *[getattr(A, c) for c in events.TRACKED_COLUMNS]).where(
+        A.owner_id == owner_id, tuple_(A.company_name, A.role).in_(pairs)
+    )
+    for row in db.execute(stmt):
+        current = dict(row._mapping)
+        existing[_upsert_key(current)] = current
+
+    now = datetime.utcnow()
+    to_insert = [
+        {**INSERT_DEFAULTS, **r, "owner_id": owner_id, "created_at": now, "updated_at": now, "status_changed_at": now, "responded_at": None}
+        for k, r in by_key.items() if k not in existing
+    ]
+    for values in to_insert:
+        if values["status"] != analytics.NO_RESPONSE_STATUS:
+            values["responded_at"] = now
+    changes = []
+    if to_insert:
+        ids = db.execute(insert(A).returning(A.id, sort_by_parameter_order=True), to_insert).scalars().all()
+        for app_id, values in zip(ids, to_insert):
+            changes.append(events.ApplicationChange("created", app_id, {c: values[c] for c in events.TRACKED_COLUMNS}))
+
+    to_update = []
+    for k, r in by_key.items():
+        current = existing.get(k)
+        if current is None:
+            continue
+        old = {c: current[c] for c in r if current[c] != r[c]}
+        if not old:
+            continue  # identical row, leave updated_at alone
+        values = {**current, **r, "updated_at": now}
+        old["updated_at"] = current["updated_at"]
+        params = {**r, "id": current["id"], "updated_at": now}
+        if "status" in old:
+            params["status_changed_at"] = now
+            if current["responded_at"] is None and r["status"] != analytics.NO_RESPONSE_STATUS:
+                params["responded_at"] = values["responded_at"] = now
+                old["responded_at"] = None
+        to_update.append(params)
+        changes.append(events.ApplicationChange("updated", current["id"], {c: values[c] for c in events.TRACKED_COLUMNS}, old))
+    if to_update:
+        db.execute(update(A), to_update)
+
+    # executemany bypasses the unit of work, report the changes ourselves
+    events.record(db, changes)
+    return len(to_insert), len(to_update)
+
+
+async def import_request(request, fmt, owner_id):
+    """Stream a request body into a BulkImporter running on the threadpool"""
+    importer = BulkImporter(fmt, owner_id)
+    channel = queue.Queue(maxsize=16)
+
+    def chunks():
+        while True:
+            item = channel.get()
+            if item is None:
+                return
+            yield item
+
+    async def put(item):
+        while True:
+            try:
+                channel.put_nowait(item)
+                return
+            except queue.Full:
+                if task.done():
+                    return
+                await asyncio.sleep(0.005)
+
+    task = asyncio.ensure_future(run_in_threadpool(importer.run, chunks()))
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    try:
+        async for data in request.stream():
+            if task.done():
+                break
+            await put(decoder.decode(data))
+        await put(decoder.decode(b"", final=True))
+    finally:
+        await put(None)
+    return await task
+
+
+def export_rows(fmt, conditions=()):
+    """Yield the export in chunks of CHUNK_SIZE rows: text for csv, bytes for ndjson/json"""
+    A = models.Application
+    fields = ("id",) + COLUMNS + ("created_at", "updated_at")
+    db = database.SessionLocal()
+    try:
+        stmt = select(*[getattr(A, f) for f in fields]).where(*conditions).order_by(A.id)
+        result = db.execute(stmt.execution_options(yield_per=CHUNK_SIZE))
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(fields)
+            for partition in result.partitions():
+                writer.writerows(partition)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        elif fmt == "json":
+            yield from serialization.json_array(result.partitions(), fields)
+        else:
+            yield from serialization.ndjson(result.partitions(), fields)
+    finally:
+        db.close()
@@ -0,0 +1,295 @@
+"""
+Read-through cache for application query responses.
+
+Entries are serialized responses (bytes) keyed by the query parameters plus
+the current version of the tags they depend on. Tags are per user: a list
+filtered by status "Offer" depends on "user:<id>:status:Offer", unfiltered
+lists and searches on "user:<id>:applications". Committed changes bump the versions of the tags they touch
+(see events.on_commit), which makes the affected entries unreachable; they then
+age out through the TTL/LRU. The versioned key doubles as an ETag, so a client
+holding a still-current list gets a 304 without touching the database.
+
+CACHE_BACKEND selects "memory" (per process, default), "redis" (shared by the
+API, the bot and the scheduler, needs REDIS_URL) or "none". The memory
+backend never sees writes made by other processes (the polling bot, other
+workers or replicas), so its versions also roll over every CACHE_TTL_SECONDS:
+an entry or ETag outlives such a write by at most the TTL. Use redis when
+that is too long.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from . import events, serialization
+
+
+class MemoryBackend:
+    """LRU with a per-entry TTL, local to this process"""
+
+    def __init__(self, max_entries=1024, ttl=30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._epoch = uuid.uuid4().hex[:8]
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def epoch(self):
+        # Other processes' writes never bump these versions; a new window every ttl seconds
+        # caps how long a cached body or an ETag can stay valid after one
+        window = int(time.time() // self.ttl) if self.ttl > 0 else time.time_ns()
+        return f"{self._epoch}.{window}"
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def versions(self, tags):
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"entries": len(self._entries), "evictions": self.evictions, "expirations": self.expirations}
+
+
+class RedisBackend:
+    """
+    Shared backend on a redis-py compatible client.
+
+    Only get/set(ex=)/mget/incr/setnx are used, so tests can pass a small fake.
+    Redis does expiry and eviction itself.
+    """
+
+    def __init__(self, client, ttl=30.0, prefix="jobtracker:cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        # Versions restart from zero if Redis is flushed; the epoch keeps old ETags from matching again
+        self.client.setnx(prefix + "epoch", uuid.uuid4().hex[:8])
+        epoch = self.client.get(prefix + "epoch")
+        self.epoch = epoch.decode() if isinstance(epoch, bytes) else str(epoch)
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value, ex=max(1, int(self.ttl)))
+
+    def versions(self, tags):
+        values = self.client.mget([self.prefix + "tag:" + tag for tag in tags])
+        return [int(v) if v is not None else 0 for v in values]
+
+    def bump(self, tags):
+        for tag in tags:
+            self.client.incr(self.prefix + "tag:" + tag)
+
+    def clear(self):
+        # Tags are per user; a new epoch orphans every entry at once
+        self.epoch = uuid.uuid4().hex[:8]
+        self.client.set(self.prefix + "epoch", self.epoch)
+
+    def stats(self):
+        return {}
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def _safe(self, fn, *args, default=None):
+        # A broken cache backend must never take the API down, fall through to the database
+        try:
+            return fn(*args)
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Cache backend error: {str(e)}")
+            return default
+
+    def versioned_key(self, key, tags):
+        versions = self._safe(self.backend.versions, list(tags), default=None)
+        if versions is None:
+            return None
+        return f"{key}|{self.backend.epoch}|" + ",".join(f"{t}={v}" for t, v in zip(tags, versions))
+
+    @staticmethod
+    def etag(versioned_key):
+        return 'W/"' + hashlib.sha1(versioned_key.encode()).hexdigest()[:20] + '"'
+
+    def get(self, versioned_key):
+        if versioned_key is None:
+            return None
+        value = self._safe(self.backend.get, versioned_key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def store(self, versioned_key, value):
+        if versioned_key is not None:
+            self._safe(self.backend.set, versioned_key, value)
+
+    def is_not_modified(self, request, versioned_key):
+        """True when the request's If-None-Match still names the current version"""
+        if versioned_key is None:
+            return False
+        if self.etag(versioned_key) in request.headers.get("if-none-match", ""):
+            self.not_modified += 1
+            return True
+        return False
+
+    def get_or_set(self, versioned_key, producer):
+        """Return the cached bytes for versioned_key, calling producer() on a miss"""
+        value = self.get(versioned_key)
+        if value is None:
+            value = producer()
+            self.store(versioned_key, value)
+        return value
+
+    def cached(self, key, tags, producer):
+        return self.get_or_set(self.versioned_key(key, tags), producer)
+
+    def invalidate(self, tags):
+        self.invalidations += 1
+        self._safe(self.backend.bump, list(tags))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            **(self._safe(self.backend.stats, default={}) or {}),
+        }
+
+
+class _NoCache(ResponseCache):
+    def versioned_key(self, key, tags):
+        return None
+
+    def invalidate(self, tags):
+        pass
+
+
+def json_response(body, versioned_key=None, status_code=200):
+    """Serve cached bytes with an ETag; clients must revalidate, which is what makes the 304s work"""
+    from starlette.responses import Response  # only the API builds responses; the bot uses the cache too
+    headers = {"Cache-Control": "no-cache"}
+    if versioned_key is not None:
+        headers["ETag"] = ResponseCache.etag(versioned_key)
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+def encode(payload):
+    return serialization.dumps(payload)
+
+
+def make_key(namespace, **params):
+    """Stable cache key from query parameters"""
+    return namespace + ":" + json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+
+
+def user_tag(owner_id, tag="applications"):
+    """Scope a tag to one user so their writes leave other users' entries alone"""
+    return f"user:{owner_id}:{tag}"
+
+
+def list_tags(owner_id, status=None, platform=None):
+    """Tag a list query by its most selective filter; every row it can contain bumps that tag"""
+    if status:
+        return [user_tag(owner_id, f"status:{status}")]
+    if platform:
+        return [user_tag(owner_id, f"platform:{platform}")]
+    return [user_tag(owner_id)]
+
+
+def _build_cache():
+    kind = os.getenv("CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+    if kind == "none":
+        return _NoCache(MemoryBackend(max_entries=0))
+    if kind == "redis":
+        try:
+            import redis
+        except ImportError:
+            print("⚠️ CACHE_BACKEND=redis but the redis package is not installed, using the in-process cache")
+        else:
+            client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+            return ResponseCache(RedisBackend(client, ttl=ttl))
+    return ResponseCache(MemoryBackend(int(os.getenv("CACHE_MAX_ENTRIES", "1024")), ttl))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _build_cache()
+    return _cache
+
+
+def configure(backend):
+    """Swap the backend, e.g. for a fake Redis client in tests"""
+    global _cache
+    _cache = ResponseCache(backend)
+    return _cache
+
+
+@events.on_commit
+def _invalidate(changes):
+    tags = set()
+    for change in changes:
+        owners = {change.values.get("owner_id"), change.old.get("owner_id", change.values.get("owner_id"))}
+        for owner in owners:
+            tags.add(user_tag(owner))
+            for column in ("status", "platform"):
+                tags.add(user_tag(owner, f"{column}:{change.values.get(column)}"))
+                if column in change.old:
+                    tags.add(user_tag(owner, f"{column}:{change.old[column]}"))
+    get_cache().invalidate(sorted(tags))
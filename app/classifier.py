@@ -0,0 +1,185 @@
+"""
+Email status classifier.
+
+All status phrases are compiled into one trie-shaped regular expression, so a
+message is scanned once regardless of how many phrases there are. When several
+statuses match, the one earliest in STATUS_PRIORITY wins (a rejection beats an
+"application viewed" notice in the same thread).
+
+Rules can be replaced with a JSON file pointed to by STATUS_RULES_FILE:
+
+    {
+      "priority": ["Rejected", "Offer", "Interview Scheduled", "In Review"],
+      "default": {"Rejected": ["rejected", "not moving forward"], ...},
+      "platforms": {"linkedin": {"In Review": ["viewed your application"]}, ...}
+    }
+
+Platform phrase sets only apply to mail sent from that platform's domain.
+The classifier's `version` is a hash of its rules; processed emails record it
+so a sync after a rules change re-classifies mail it has seen before.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+STATUS_PRIORITY = ("Rejected", "Offer", "Interview Scheduled", "In Review")
+
+DEFAULT_RULES = {
+    "default": {
+        "Rejected": [
+            "rejected", "declined", "not selected", "not been selected", "regret to inform",
+            "not moving forward", "not be moving forward", "decided to move forward with other candidates",
+        ],
+        "Offer": ["offer", "offer letter", "offered", "hired", "you're hired", "welcome aboard"],
+        "Interview Scheduled": [
+            "interview", "interviews", "interview scheduled", "interview invitation", "invitation to interview",
+        ],
+        "In Review": ["shortlisted", "viewed", "under review", "in review", "being reviewed"],
+    },
+    "platforms": {
+        "linkedin": {
+            "In Review": ["your application was viewed", "viewed your application"],
+            "Rejected": ["your application was not selected", "we will not be moving forward"],
+        },
+        "naukri": {
+            "In Review": ["recruiter viewed your profile", "your profile has been shortlisted"],
+            "Interview Scheduled": ["interview call", "walk-in interview"],
+        },
+        "internshala": {
+            "In Review": ["application is under review", "you have been shortlisted"],
+            "Rejected": ["application has been rejected", "not shortlisted"],
+            "Offer": ["you have been hired", "you've been hired"],
+        },
+        "indeed": {
+            "In Review": ["application status update", "employer viewed your application"],
+            "Rejected": ["decided not to move forward", "position has been filled"],
+        },
+    },
+}
+
+PLATFORM_DOMAINS = {
+    "linkedin": ("linkedin.com",),
+    "naukri": ("naukri.com",),
+    "internshala": ("internshala.com",),
+    "indeed": ("indeed.com",),
+}
+
+_SENDER_DOMAIN = re.compile(r"@([\w.-]+)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(phrase):
+    return _WHITESPACE.sub(" ", phrase.strip().lower())
+
+
+def _trie_pattern(phrases):
+    """Build a regex from a set of phrases that shares common prefixes, e.g. interview(?:s|\\s+scheduled)?"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def pattern(node):
+        branches = [(r"\s+" if ch == " " else re.escape(ch)) + pattern(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+
+    return pattern(trie)
+
+
+class StatusClassifier:
+    """Single-pass phrase matcher mapping email text to an application status"""
+
+    def __init__(self, rules=None, priority=None):
+        rules = rules or DEFAULT_RULES
+        self.priority = tuple(priority or rules.get("priority") or STATUS_PRIORITY)
+        self.rank = {status: i for i, status in enumerate(self.priority)}
+        self.version = hashlib.sha1(
+            json.dumps([rules.get("default"), rules.get("platforms"), self.priority], sort_keys=True).encode()
+        ).hexdigest()[:12]
+
+        default = self._phrase_map(rules.get("default", {}))
+        self._matchers = {None: self._compile(default)}
+        for platform, platform_rules in rules.get("platforms", {}).items():
+            # Platform-specific phrases win over a generic phrase with the same text
+            self._matchers[platform.lower()] = self._compile({**default, **self._phrase_map(platform_rules)})
+
+    def _phrase_map(self, status_phrases):
+        phrases = {}
+        for status, items in status_phrases.items():
+            if status not in self.rank:
+                raise ValueError(f"Status '{status}' is missing from the priority list")
+            for phrase in items:
+                phrases[_normalize(phrase)] = status
+        return phrases
+
+    @staticmethod
+    def _compile(phrases):
+        regex = re.compile(r"(?<!\w)(?:" + _trie_pattern(phrases) + r")(?!\w)", re.IGNORECASE) if phrases else None
+        return regex, phrases
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def better(self, current, candidate):
+        """Return whichever of two statuses (either may be None) has the higher priority"""
+        if candidate is None:
+            return current
+        if current is None or self.rank[candidate] < self.rank[current]:
+            return candidate
+        return current
+
+    def is_final(self, status):
+        """True when no other status could override this one"""
+        return status is not None and self.rank[status] == 0
+
+    def classify(self, *texts, platform=None):
+        """Return the highest-priority status mentioned in texts, or None"""
+        regex, phrases = self._matchers.get(platform, self._matchers[None])
+        if regex is None:
+            return None
+
+        best = None
+        for match in regex.finditer("\n".join(t for t in texts if t)):
+            best = self.better(best, phrases[_normalize(match.group())])
+            if self.is_final(best):
+                break
+        return best
+
+
+def detect_platform(sender):
+    """Map a From header to a platform key in PLATFORM_DOMAINS, or None"""
+    match = _SENDER_DOMAIN.search(sender or "")
+    if not match:
+        return None
+    domain = match.group(1).lower()
+    for platform, domains in PLATFORM_DOMAINS.items():
+        if any(domain == d or domain.endswith("." + d) for d in domains):
+            return platform
+    return None
+
+
+_classifier = None
+_lock = threading.Lock()
+
+
+def get_classifier():
+    """Return the shared classifier, loading STATUS_RULES_FILE on first use"""
+    global _classifier
+    if _classifier is None:
+        with _lock:
+            if _classifier is None:
+                path = os.getenv("STATUS_RULES_FILE")
+                _classifier = StatusClassifier.from_file(path) if path else StatusClassifier()
+    return _classifier
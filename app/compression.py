@@ -0,0 +1,126 @@
+"""
+Response compression (brotli or gzip) as ASGI middleware.
+
+Picks brotli when the client accepts it and the brotli package is installed,
+gzip otherwise. Bodies under COMPRESSION_MIN_SIZE bytes go out as they are.
+Streamed responses (exports) are compressed chunk by chunk and flushed after
+every chunk, so clients start receiving rows before the export finishes.
+Server-sent events and already encoded or binary bodies are left alone.
+
+COMPRESSION_ENABLED=false turns it off; GZIP_LEVEL and BROTLI_QUALITY trade CPU for size.
+"""
+
+import os
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+
+ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+SKIPPED_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/zip", "application/gzip")
+
+_brotli = None
+
+
+def _load_brotli():
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+        except ImportError:
+            brotli = False
+        _brotli = brotli
+    return _brotli
+
+
+def _accepted(accept_encoding):
+    """Encodings the client accepts (q=0 excluded)"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    return accepted
+
+
+class _Gzip:
+    name = "gzip"
+
+    def __init__(self, level):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data, last):
+        return self._z.compress(data) + self._z.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class _Brotli:
+    name = "br"
+
+    def __init__(self, brotli, quality):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data, last):
+        return self._c.process(data) + (self._c.finish() if last else self._c.flush())
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size=None, gzip_level=None, brotli_quality=None):
+        self.app = app
+        self.minimum_size = minimum_size if minimum_size is not None else int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+        self.gzip_level = gzip_level if gzip_level is not None else int(os.getenv("GZIP_LEVEL", "6"))
+        self.brotli_quality = brotli_quality if brotli_quality is not None else int(os.getenv("BROTLI_QUALITY", "4"))
+
+    def _compressor(self, scope):
+        accepted = _accepted(Headers(scope=scope).get("accept-encoding", ""))
+        brotli = _load_brotli() if "br" in accepted else None
+        if brotli:
+            return _Brotli(brotli, self.brotli_quality)
+        if "gzip" in accepted:
+            return _Gzip(self.gzip_level)
+        return None
+
+    async def __call__(self, scope, receive, send):
+        compressor = self._compressor(scope) if scope["type"] == "http" else None
+        if compressor is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message  # held back until the first body chunk says how big the response is
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                content_type = headers.get("content-type", "")
+                skip = (
+                    "content-encoding" in headers
+                    or content_type.startswith(SKIPPED_TYPES)
+                    or (not more and len(body) < self.minimum_size)
+                )
+                if skip:
+                    compressor = None
+                else:
+                    headers["Content-Encoding"] = compressor.name
+                    headers.add_vary_header("Accept-Encoding")
+                    del headers["content-length"]
+                    body = compressor.compress(body, last=not more)
+                    if not more:
+                        headers["Content-Length"] = str(len(body))
+                await send(start)
+                start = None
+                await send({"type": "http.response.body", "body": body, "more_body": more})
+                return
+
+            if compressor is not None:
+                body = compressor.compress(body, last=not more)
+            await send({"type": "http.response.body", "body": body, "more_body": more})
+
+        await self.app(scope, receive, send_compressed)
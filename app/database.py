@@ -1,11 +1,12 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-
 import os
-from sqlalchemy import create_engine
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from . import metrics
 
+load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./applications.db")
 
@@ -13,10 +14,133 @@ connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite")
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./applications.db"
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+# Serve the CRUD endpoints from the async engine (needs asyncpg or aiosqlite)
+ASYNC_DB = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# How long a SQLite writer waits for the lock before raising "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def _is_memory_sqlite(url):
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url):
+    """Pool settings shared by the sync and async engines"""
+    options = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    }
+    # In-memory SQLite uses a single shared connection, there is no pool to size
+    if not _is_memory_sqlite(url):
+        options["pool_size"] = int(os.getenv("DB_POOL_SIZE", "10"))
+        options["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+        options["pool_timeout"] = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    return options
+
+
+def _configure_sqlite(engine):
+    """WAL lets readers (dashboard, bot) run alongside the sync writer; busy_timeout makes writers queue"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not _is_memory_sqlite(str(engine.url)):
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+
+engine = create_engine(DATABASE_URL, connect_args=connect_args, **engine_options(DATABASE_URL))
+_configure_sqlite(engine)
+metrics.instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+# ------------------- ASYNC ENGINE ------------------- #
+ASYNC_DRIVERS = {"sqlite": ("aiosqlite", "aiosqlite"), "postgresql": ("asyncpg", "asyncpg")}
+
+_async_engine = None
+_async_sessionmaker = None
+
+
+def async_database_url(url):
+    """Swap the sync driver in DATABASE_URL for its async counterpart"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for {backend} databases")
+    module, driver = ASYNC_DRIVERS[backend]
+    try:
+        __import__(module)
+    except ImportError:
+        raise RuntimeError(f"DB_ASYNC is enabled but {module} is not installed (pip install {module})")
+    return url.set(drivername=f"{backend}+{driver}")
+
+
+def get_async_engine():
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        url = async_database_url(DATABASE_URL)
+        _async_engine = create_async_engine(url, **engine_options(DATABASE_URL))
+        _configure_sqlite(_async_engine.sync_engine)
+        metrics.instrument_engine(_async_engine.sync_engine)
+        _async_sessionmaker = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+def AsyncSessionLocal():
+    get_async_engine()
+    return _async_sessionmaker()
+
+
+def init_db():
+    """
+    Create missing tables, then bring older databases up to date: add nullable
+    columns introduced since the table was created and any missing indexes.
+    """
+    from . import models, search, analytics, history, tenants  # models registers the tables on Base.metadata
+
+    with engine.begin() as conn:
+        analytics.drop_unscoped(conn)
+    Base.metadata.create_all(bind=engine)
+    inspector = inspect(engine)
+    added = set()
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                    print(f"🛠️ Added column {table.name}.{column.name}")
+                    added.add((table.name, column.name))
+            # Reflection can't see expression indexes, let the database skip existing ones
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+        # Pagination orders by updated_at, rows from before the column existed need a value
+        conn.execute(text(
+            "UPDATE applications SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL"
+        ))
+
+        tenants.install(conn)
+        search.install(conn)
+        analytics.install(conn)
+        if ("applications", "responded_at") in added:
+            analytics.rebuild_response_days(conn)
 
 
+if __name__ == "__main__":
+    # Release/migration step: python -m app.database (pair with DB_MIGRATE_ON_STARTUP=false).
+    # Go through app.database, the module models registers its tables with, not this __main__ copy
+    from app import database
+    database.init_db()
+    print("✅ Database schema is up to date")
@@ -0,0 +1,66 @@
+"""
+FastAPI dependencies that resolve who a request acts for.
+
+Kept apart from app.tenants so the bot and the sync jobs, which share the
+user lookups, don't import the web framework.
+
+Operational endpoints (/metrics, /cache/stats, /debug/profile) are not per
+user; operator_access() guards them with METRICS_TOKEN, never a user's token.
+"""
+
+import os
+import secrets
+from typing import Optional
+from fastapi import HTTPException, Request
+from . import tenants
+
+
+def _request_token(request):
+    auth = request.headers.get("Authorization", "")
+    if auth.lower().startswith("bearer "):
+        return auth[7:].strip()
+    return request.headers.get("X-API-Token")
+
+
+def current_user_id(request: Request):
+    """FastAPI dependency: the id of the user making the request"""
+    token = _request_token(request)
+    if token:
+        user_id = tenants.user_for_token(token)
+        if user_id is None:
+            raise HTTPException(status_code=401, detail="Invalid API token")
+        return user_id
+    if os.getenv("REQUIRE_API_TOKEN", "false").lower() in ("1", "true", "yes"):
+        raise HTTPException(status_code=401, detail="API token required", headers={"WWW-Authenticate": "Bearer"})
+    return tenants.default_user_id()
+
+
+def stream_user(request: Request, token: Optional[str] = None):
+    """EventSource can't send headers, so the dashboard passes its API token as ?token="""
+    if token:
+        user_id = tenants.user_for_token(token)
+        if user_id is None:
+            raise HTTPException(status_code=401, detail="Invalid API token")
+        return user_id
+    return current_user_id(request)
+
+
+def operator_access(always=False):
+    """
+    FastAPI dependency for operational endpoints; user API tokens never count.
+
+    With METRICS_TOKEN set, exactly that bearer token is accepted. Without it
+    the endpoint stays open while REQUIRE_API_TOKEN is off (one user, like every
+    other endpoint) and is refused otherwise. always=True endpoints (ones that
+    can change how the process runs) are refused whenever METRICS_TOKEN is unset.
+    """
+    def check(request: Request):
+        expected = os.getenv("METRICS_TOKEN")
+        if expected:
+            token = _request_token(request)
+            if not token or not secrets.compare_digest(token, expected):
+                raise HTTPException(status_code=401, detail="Operator token required", headers={"WWW-Authenticate": "Bearer"})
+            return
+        if always or os.getenv("REQUIRE_API_TOKEN", "false").lower() in ("1", "true", "yes"):
+            raise HTTPException(status_code=403, detail="Set METRICS_TOKEN to use this endpoint")
+    return check
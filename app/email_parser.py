@@ -1,49 +1,111 @@
 import base64
-import re
-from bs4 import BeautifulSoup
+import hashlib
+import time
+from datetime import datetime
+from . import metrics
+from .classifier import get_classifier, detect_platform
+from .html_text import iter_html_text, CHUNK_SIZE
 
+PREVIEW_CHARS = 500
+# Characters carried over between text fragments so phrases split across them still match
+PHRASE_OVERLAP = 64
 
 
-STATUS_KEYWORDS = {
-    "rejected": "Rejected",
-    "declined": "Rejected",
-    "shortlisted": "In Review",
-    "viewed": "In Review",
-    "interview": "Interview Scheduled",
-    "hired": "Offer",
-    "offer": "Offer"
-}
+def _decode(data):
+    return base64.urlsafe_b64decode(data).decode('utf-8', errors='replace')
+
+
+def _text_parts(payload):
+    """
+    Walk a Gmail payload and return the (mime_type, data) leaves to read.
+
+    multipart/alternative keeps a single rendition, preferring text/plain since it
+    needs no HTML parsing; other multiparts (mixed, related, ...) contribute every
+    text leaf. Attachments and non-text parts are skipped.
+    """
+    mime_type = payload.get('mimeType', '')
+    parts = payload.get('parts')
+    if parts:
+        if mime_type == 'multipart/alternative':
+            ordered = sorted(parts, key=lambda p: p.get('mimeType') != 'text/plain')
+            for part in ordered:
+                leaves = _text_parts(part)
+                if leaves:
+                    return leaves
+            return []
+        return [leaf for part in parts for leaf in _text_parts(part)]
+
+    data = payload.get('body', {}).get('data')
+    if not data or payload.get('filename'):
+        return []
+    if mime_type and not mime_type.startswith('text/'):
+        return []
+    return [(mime_type, data)]
+
+
+def _iter_body_text(payload):
+    """Yield body text fragments, lazily decoding and parsing one part at a time"""
+    for i, (mime_type, data) in enumerate(_text_parts(payload)):
+        if i:
+            yield "\n"
+        body = _decode(data)
+        if mime_type == 'text/plain':
+            for offset in range(0, len(body), CHUNK_SIZE):
+                yield body[offset:offset + CHUNK_SIZE]
+        else:
+            # text/html, or a bare body without a declared type
+            yield from iter_html_text(body)
+
+
+def _internal_date(msg):
+    """Gmail's internalDate (ms since the epoch, as a string) as naive UTC, or None"""
+    try:
+        return datetime.utcfromtimestamp(int(msg["internalDate"]) / 1000)
+    except (KeyError, TypeError, ValueError):
+        return None
+
 
 def parse_email(msg):
+    start = time.perf_counter()
     payload = msg['payload']
     headers = payload['headers']
 
     subject = ""
+    sender = ""
     for h in headers:
         if h['name'] == 'Subject':
             subject = h['value']
+        elif h['name'] == 'From':
+            sender = h['value']
+
+    classifier = get_classifier()
+    platform = detect_platform(sender)
+    status = classifier.classify(subject, platform=platform)
 
-    body = ""
-    if 'data' in payload['body']:
-        body = base64.urlsafe_b64decode(payload['body']['data']).decode('utf-8')
-    else:
-        parts = payload.get('parts', [])
-        if parts:
-            data = parts[0]['body'].get('data')
-            if data:
-                body = base64.urlsafe_b64decode(data).decode('utf-8')
-
-    soup = BeautifulSoup(body, "html.parser")
-    text_body = soup.get_text()
-
-    status = "Applied"
-    for k, v in STATUS_KEYWORDS.items():
-        if re.search(k, subject.lower()) or re.search(k, text_body.lower()):
-            status = v
+    # Stop reading the body once the preview is filled and no later phrase could change the status
+    preview = []
+    preview_len = 0
+    carry = ""
+    for fragment in _iter_body_text(payload):
+        if preview_len < PREVIEW_CHARS:
+            preview.append(fragment[:PREVIEW_CHARS - preview_len])
+            preview_len += len(preview[-1])
+        if not classifier.is_final(status):
+            status = classifier.better(status, classifier.classify(carry + fragment, platform=platform))
+            carry = fragment[-PHRASE_OVERLAP:]
+        if preview_len >= PREVIEW_CHARS and classifier.is_final(status):
             break
 
+    body = "".join(preview).strip()
+    metrics.email_parse_latency.observe(time.perf_counter() - start)
     return {
         "subject": subject,
-        "body": text_body[:500],  # preview
-        "status": status
+        "sender": sender,
+        "platform": platform,
+        "body": body,  # preview
+        "status": status or "Applied",
+        "internal_date": _internal_date(msg),
+        # Same notification delivered twice (resent, duplicated by filters) hashes the same
+        "content_hash": hashlib.sha1("\x1f".join((sender, subject, body)).encode()).hexdigest(),
+        "rules_version": classifier.version,
     }
@@ -1,22 +1,236 @@
-import yagmail
+"""
+Daily digest of application changes.
+
+Every user with an email address gets the applications changed since their
+last digest (users.digest_watermark), streamed with yield_per from the
+(owner_id, status, updated_at) index and grouped by status. Each status keeps
+only its DIGEST_ROWS_PER_STATUS most recent rows plus a count of the rest, so
+memory stays flat however many rows changed. All digests of a run go out over
+one logged-in SMTP connection.
+
+Point SMTP_HOST/SMTP_PORT at a local sink to try it without sending mail:
+
+    python -m aiosmtpd -n -l localhost:1025
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_SSL=false EMAIL_PASS= python -m app.email_summary
+    python -m app.email_summary --print          # render the digests, send nothing
+"""
+
+import html
 import os
-from . import database, models
+import smtplib
+import threading
+from collections import Counter
+from email.message import EmailMessage
+from sqlalchemy import select, update
+from . import analytics, database, models, tenants
 
 EMAIL_USER = os.getenv("EMAIL_USER", "your_email@gmail.com")
 EMAIL_PASS = os.getenv("EMAIL_PASS", "your_app_password")
 TO_EMAIL = os.getenv("TO_EMAIL", "your_email@gmail.com")
 
-def send_daily_summary():
+SUBJECT = "📊 Daily Job Application Summary"
+STREAM_CHUNK_SIZE = 1000
+
+
+class SMTPConnection:
+    """A logged-in SMTP session reused across messages; reconnects if the server drops it"""
+
+    def __init__(self, host=None, port=None, user=None, password=None, use_ssl=None, max_messages=None, timeout=30):
+        self.host = host or os.getenv("SMTP_HOST", "smtp.gmail.com")
+        self.port = int(port or os.getenv("SMTP_PORT", "465"))
+        self.user = EMAIL_USER if user is None else user
+        self.password = EMAIL_PASS if password is None else password
+        self.use_ssl = use_ssl if use_ssl is not None else os.getenv("SMTP_SSL", "true").lower() in ("1", "true", "yes")
+        # Providers cap messages per session; start a fresh one after this many
+        self.max_messages = max_messages or int(os.getenv("SMTP_MESSAGES_PER_CONNECTION", "100"))
+        self.timeout = timeout
+        self._smtp = None
+        self._sent = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            smtp.ehlo()
+            if smtp.has_extn("starttls"):
+                smtp.starttls()
+                smtp.ehlo()
+        if self.password:
+            smtp.login(self.user, self.password)
+        self._smtp = smtp
+        self._sent = 0
+
+    def send(self, message, recipients):
+        with self._lock:
+            for attempt in range(2):
+                if self._smtp is None or self._sent >= self.max_messages:
+                    self._close()
+                    self._connect()
+                try:
+                    self._smtp.send_message(message, from_addr=self.user or None, to_addrs=recipients)
+                    self._sent += 1
+                    return
+                except smtplib.SMTPServerDisconnected:
+                    # Idle connections get dropped between runs; retry once on a fresh one
+                    self._smtp = None
+                    if attempt:
+                        raise
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except smtplib.SMTPException:
+                pass
+            self._smtp = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+_connection = None
+
+
+def get_connection():
+    global _connection
+    if _connection is None:
+        _connection = SMTPConnection()
+    return _connection
+
+
+# ------------------- DIGEST ------------------- #
+class Digest:
+    """Changed applications grouped by status, keeping at most rows_per_status rows of each"""
+
+    def __init__(self, rows_per_status=None):
+        self.rows_per_status = rows_per_status or int(os.getenv("DIGEST_ROWS_PER_STATUS", "50"))
+        self.groups = {}
+        self.counts = Counter()
+        self.watermark = None
+        self.totals = {}
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def add(self, status, company_name, role, platform, updated_at):
+        status = status or analytics.NO_RESPONSE_STATUS
+        self.counts[status] += 1
+        rows = self.groups.setdefault(status, [])
+        if len(rows) < self.rows_per_status:
+            rows.append((company_name, role, platform, updated_at))
+        if updated_at and (self.watermark is None or updated_at > self.watermark):
+            self.watermark = updated_at
+
+    def _statuses(self):
+        return sorted(self.groups, key=lambda s: (-self.counts[s], s))
+
+    def render_text(self):
+        lines = [f"{len(self)} applications changed since your last summary.", ""]
+        for status in self._statuses():
+            lines.append(f"{status} ({self.counts[status]})")
+            for company_name, role, platform, updated_at in self.groups[status]:
+                lines.append(f"  • {company_name} - {role} ({platform})")
+            hidden = self.counts[status] - len(self.groups[status])
+            if hidden:
+                lines.append(f"  … and {hidden} more")
+            lines.append("")
+        if self.totals:
+            lines.append("All applications: " + ", ".join(f"{s} {n}" for s, n in sorted(self.totals.items())))
+        return "\n".join(lines)
+
+    def render_html(self):
+        e = html.escape
+        parts = [f"<p>{len(self)} applications changed since your last summary.</p>"]
+        for status in self._statuses():
+            parts.append(f"<h3>{e(status)} ({self.counts[status]})</h3><ul>")
+            for company_name, role, platform, updated_at in self.groups[status]:
+                parts.append(f"<li><b>{e(company_name or '')}</b> - {e(role or '')} ({e(platform or '')})</li>")
+            hidden = self.counts[status] - len(self.groups[status])
+            if hidden:
+                parts.append(f"<li>… and {hidden} more</li>")
+            parts.append("</ul>")
+        if self.totals:
+            parts.append("<p>All applications: " + ", ".join(f"{e(s)} {n}" for s, n in sorted(self.totals.items())) + "</p>")
+        return "".join(parts)
+
+    def message(self, sender, recipients):
+        msg = EmailMessage()
+        msg["Subject"] = SUBJECT
+        msg["From"] = sender
+        msg["To"] = ", ".join(recipients)
+        msg.set_content(self.render_text())
+        msg.add_alternative(self.render_html(), subtype="html")
+        return msg
+
+
+def build_digest(db, owner_id, since=None, rows_per_status=None):
+    """Stream the user's applications updated after since into a Digest"""
+    A = models.Application
+    stmt = select(A.status, A.company_name, A.role, A.platform, A.updated_at).where(A.owner_id == owner_id)
+    if since is not None:
+        stmt = stmt.where(A.updated_at > since)
+    # Newest first within each status, walking ix_applications_owner_status backwards
+    stmt = stmt.order_by(A.status.desc(), A.updated_at.desc(), A.id.desc())
+    digest = Digest(rows_per_status)
+    result = db.execute(stmt.execution_options(yield_per=STREAM_CHUNK_SIZE))
+    for partition in result.partitions():
+        for row in partition:
+            digest.add(*row)
+    if len(digest):
+        digest.totals = analytics.get_analytics(db, owner_id)["by_status"]
+    return digest
+
+
+def _recipients(user_id, email, default_user_id):
+    address = email or (TO_EMAIL if user_id == default_user_id else None)
+    return [a.strip() for a in (address or "").split(",") if a.strip()]
+
+
+def send_daily_summary(connection=None, dry_run=False):
+    """Send each user the applications changed since their last digest; returns the number of emails sent"""
+    connection = connection or get_connection()
     db = database.SessionLocal()
-    apps = db.query(models.Application).all()
-    
-    db.close()
-
-    if not apps:
-        body = "No applications tracked yet."
-    else:
-        body = "\n".join([f"{a.company_name} - {a.role} ({a.platform}) → {a.status}" for a in apps])
-
-    yag = yagmail.SMTP(EMAIL_USER, EMAIL_PASS)
-    yag.send(TO_EMAIL, "📊 Daily Job Application Summary", body)
-    print("✅ Daily summary email sent!")
+    sent = 0
+    try:
+        default_user_id = tenants.default_user_id(db)
+        U = models.User
+        users = db.execute(select(U.id, U.email, U.digest_watermark).order_by(U.id)).all()
+        for user_id, email, watermark in users:
+            recipients = _recipients(user_id, email, default_user_id)
+            if not recipients:
+                continue
+            try:
+                digest = build_digest(db, user_id, watermark)
+                db.rollback()  # end the read transaction before the slow SMTP round trip
+                if not len(digest):
+                    continue
+                if dry_run:
+                    print(f"--- {', '.join(recipients)} ---\n{digest.render_text()}")
+                    continue
+                connection.send(digest.message(EMAIL_USER, recipients), recipients)
+                # Only advance to the newest row actually included, so later edits land in the next digest
+                db.execute(update(models.User).where(U.id == user_id).values(digest_watermark=digest.watermark))
+                db.commit()
+                sent += 1
+            except Exception as e:
+                db.rollback()
+                print(f"❌ Daily summary for user {user_id} failed: {str(e)}")
+    finally:
+        db.close()
+    print(f"✅ Daily summary emails sent: {sent}")
+    return sent
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Send (or print) the daily application digests")
+    parser.add_argument("--print", dest="dry_run", action="store_true", help="render the digests instead of sending")
+    args = parser.parse_args()
+    database.init_db()
+    try:
+        send_daily_summary(dry_run=args.dry_run)
+    finally:
+        get_connection().close()
@@ -0,0 +1,107 @@
+"""
+Change capture for Application rows.
+
+Every session flush is inspected for created, updated and deleted applications.
+Two kinds of hooks can subscribe:
+
+- on_flush(fn): fn(session, changes) runs inside the flushing transaction, for
+  derived data that must commit or roll back together with the change.
+- on_commit(fn): fn(changes) runs after the transaction commits, for in-process
+  state such as indexes, caches and live updates.
+
+Bulk writes that bypass the unit of work (executemany inserts/updates) report
+their changes with record().
+"""
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from . import models
+
+TRACKED_COLUMNS = (
+    "owner_id", "company_name", "role", "platform", "date_applied", "status", "job_link", "created_at", "updated_at", "responded_at",
+)
+
+_flush_hooks = []
+_commit_hooks = []
+
+
+class ApplicationChange:
+    """A created/updated/deleted application; `old` holds previous values of changed columns"""
+
+    __slots__ = ("kind", "id", "values", "old")
+
+    def __init__(self, kind, id, values, old=None):
+        self.kind = kind
+        self.id = id
+        self.values = values
+        self.old = old or {}
+
+    def __repr__(self):
+        return f"ApplicationChange({self.kind!r}, {self.id!r}, old={self.old!r})"
+
+
+def on_flush(fn):
+    _flush_hooks.append(fn)
+    return fn
+
+
+def on_commit(fn):
+    _commit_hooks.append(fn)
+    return fn
+
+
+def snapshot(obj):
+    return {column: getattr(obj, column) for column in TRACKED_COLUMNS}
+
+
+def _previous_values(obj):
+    old = {}
+    state = inspect(obj)
+    for column in TRACKED_COLUMNS:
+        history = state.attrs[column].history
+        if history.has_changes() and history.deleted:
+            old[column] = history.deleted[0]
+    return old
+
+
+def record(session, changes):
+    """Report changes made outside the ORM unit of work (bulk statements)"""
+    if not changes:
+        return
+    for hook in _flush_hooks:
+        hook(session, changes)
+    session.info.setdefault("application_changes", []).extend(changes)
+
+
+@event.listens_for(Session, "after_flush")
+def _capture(session, flush_context):
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, models.Application):
+            changes.append(ApplicationChange("created", obj.id, snapshot(obj)))
+    for obj in session.dirty:
+        if isinstance(obj, models.Application) and session.is_modified(obj):
+            old = _previous_values(obj)
+            if old:
+                changes.append(ApplicationChange("updated", obj.id, snapshot(obj), old))
+    for obj in session.deleted:
+        if isinstance(obj, models.Application):
+            changes.append(ApplicationChange("deleted", obj.id, snapshot(obj)))
+    record(session, changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch(session):
+    changes = session.info.pop("application_changes", None)
+    if not changes:
+        return
+    for hook in _commit_hooks:
+        try:
+            hook(changes)
+        except Exception as e:
+            print(f"⚠️ Application change hook {getattr(hook, '__name__', hook)} failed: {str(e)}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop("application_changes", None)
@@ -0,0 +1,184 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from . import metrics
+
+# Gmail accepts at most 100 calls per batch but recommends staying at or below 50
+MAX_BATCH_SIZE = 100
+# Quota units charged per users.messages.get call
+MESSAGE_GET_UNITS = 5
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+
+def _is_retryable(error):
+    """True for errors worth retrying: 429/5xx and Gmail's 403 rate limit responses"""
+    from googleapiclient.errors import HttpError
+    if not isinstance(error, HttpError):
+        return False
+    status = error.resp.status
+    if status in RETRYABLE_STATUSES:
+        return True
+    if status != 403:
+        return False
+    try:
+        details = json.loads(error.content)["error"].get("errors", [])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return False
+    return any(d.get("reason") in RATE_LIMIT_REASONS for d in details)
+
+
+class QuotaThrottle:
+    """
+    Token bucket sized in Gmail quota units.
+
+    Backs off to half the rate when Gmail answers with rate limit errors and
+    creeps back up towards the configured rate as batches succeed.
+    """
+
+    def __init__(self, units_per_sec):
+        self.max_rate = float(units_per_sec)
+        self.rate = self.max_rate
+        self.tokens = self.max_rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, units):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                # A request larger than the bucket waits for a full bucket and goes through
+                if self.tokens >= min(units, self.rate):
+                    self.tokens -= units
+                    return
+                wait = (min(units, self.rate) - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def slow_down(self):
+        with self.lock:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+
+    def recover(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate * 1.1)
+
+
+class MessageFetcher:
+    """
+    Fetch full Gmail messages with batched HTTP requests.
+
+    Ids are grouped into batches of GMAIL_FETCH_BATCH_SIZE, up to
+    GMAIL_FETCH_CONCURRENCY batches are in flight at once, and calls failing
+    with 429/5xx are retried individually with exponential backoff. Ids that
+    still fail after GMAIL_FETCH_MAX_RETRIES attempts end up in `failed` so the
+    caller can hold its checkpoint and try them again on the next run.
+    """
+
+    def __init__(self, service, batch_size=None, concurrency=None, max_retries=None, units_per_sec=None):
+        self.service = service
+        self.batch_size = min(MAX_BATCH_SIZE, batch_size or int(os.getenv("GMAIL_FETCH_BATCH_SIZE", "50")))
+        self.concurrency = concurrency or int(os.getenv("GMAIL_FETCH_CONCURRENCY", "2"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("GMAIL_FETCH_MAX_RETRIES", "5"))
+        self.backoff_base = float(os.getenv("GMAIL_FETCH_BACKOFF", "1.0"))
+        # Gmail's default per-user limit is 250 quota units per second
+        self.throttle = QuotaThrottle(units_per_sec or float(os.getenv("GMAIL_QUOTA_UNITS_PER_SEC", "250")))
+        self.failed = []
+        self._local = threading.local()
+
+    def _http(self):
+        """Per-thread authorized http; httplib2 connections must not be shared between threads"""
+        if self.concurrency == 1:
+            return None
+        if not hasattr(self._local, "http"):
+            self._local.http = None
+            credentials = getattr(getattr(self.service, "_http", None), "credentials", None)
+            if credentials is not None:
+                import google_auth_httplib2
+                import httplib2
+                self._local.http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+        return self._local.http
+
+    def _execute_batch(self, message_ids):
+        """Run one batch round, returning ({id: message}, {id: error})"""
+        results, errors = {}, {}
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                errors[request_id] = exception
+            else:
+                results[request_id] = response
+
+        batch = self.service.new_batch_http_request(callback=callback)
+        for message_id in message_ids:
+            batch.add(self.service.users().messages().get(userId='me', id=message_id), request_id=message_id)
+
+        self.throttle.acquire(len(message_ids) * MESSAGE_GET_UNITS)
+        start = time.perf_counter()
+        batch_error = None
+        try:
+            with metrics.span("gmail.batch", size=len(message_ids)):
+                batch.execute(http=self._http())
+        except Exception as e:
+            # The whole batch request failed (network, 5xx on the batch endpoint)
+            batch_error = e
+            for message_id in message_ids:
+                if message_id not in results:
+                    errors[message_id] = e
+        metrics.observe_gmail_call("batch", time.perf_counter() - start, batch_error)
+        # Calls inside a batch share its round trip; count their outcomes without a latency of their own
+        metrics.gmail_calls.inc(len(results), method="gmail.users.messages.get", outcome="ok")
+        for error in errors.values():
+            metrics.gmail_calls.inc(method="gmail.users.messages.get", outcome=metrics.gmail_outcome(error))
+        return results, errors
+
+    def _fetch_batch(self, message_ids):
+        """Fetch one batch, retrying failed calls; returns messages in input order"""
+        from googleapiclient.errors import HttpError
+        results = {}
+        pending = list(message_ids)
+        for attempt in range(self.max_retries + 1):
+            fetched, errors = self._execute_batch(pending)
+            results.update(fetched)
+            retry = [m for m, e in errors.items() if _is_retryable(e) or not isinstance(e, HttpError)]
+            permanent = [m for m in errors if m not in retry]
+            # Permanent errors (e.g. 404 for mail deleted since listing) are skipped for good
+            for message_id in permanent:
+                print(f"⚠️ Gmail fetch failed for {message_id}: {errors[message_id]}")
+
+            if not retry:
+                self.throttle.recover()
+                break
+            if any(isinstance(errors[m], HttpError) and errors[m].resp.status in (403, 429) for m in retry):
+                self.throttle.slow_down()
+            if attempt == self.max_retries:
+                print(f"⚠️ Gmail fetch gave up on {len(retry)} messages after {attempt + 1} attempts")
+                self.failed.extend(retry)
+                break
+            time.sleep(self.backoff_base * (2 ** attempt) + random.uniform(0, self.backoff_base))
+            pending = retry
+
+        return [results[m] for m in message_ids if m in results]
+
+    def fetch(self, message_ids):
+        """Yield full messages in the order of message_ids, keeping a bounded number of batches in flight"""
+        batches = (message_ids[i:i + self.batch_size] for i in range(0, len(message_ids), self.batch_size))
+        if self.concurrency == 1:
+            for batch in batches:
+                yield from self._fetch_batch(batch)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="gmail-fetch") as pool:
+            in_flight = deque()
+            for batch in batches:
+                in_flight.append(pool.submit(self._fetch_batch, batch))
+                if len(in_flight) >= self.concurrency:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+
@@ -1,26 +1,202 @@
+"""
+Gmail API clients, built once per account and reused across syncs.
 
-import os.path
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+The client is built from the discovery document bundled with
+google-api-python-client (static_discovery, no network round trip) and cached
+with its credentials. Access tokens are refreshed under a per-account lock
+shortly before they expire (GMAIL_TOKEN_REFRESH_MARGIN seconds), and refreshed
+credentials are written back atomically: to token files (token.json for the
+original "me" mailbox, GMAIL_TOKEN_DIR/<account>.json for other accounts) or,
+with GMAIL_TOKEN_STORE=db, to the gmail_credentials table so every API
+process and replica shares them.
+
+A cached client is only used by one sync at a time: syncs of the same account
+never overlap (see jobs.py and gmail_sync.claim_run).
+
+The Google client libraries take a noticeable part of a second to import, so
+they are loaded on first use instead of with the API.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from . import metrics
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 
-def get_gmail_service():
-    
-    creds = None
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
+# OAuth tokens of additional Gmail accounts, one <account>.json per user
+GMAIL_TOKEN_DIR = os.getenv("GMAIL_TOKEN_DIR", "tokens")
+
+_services = {}  # account -> (service, credentials)
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def token_path(account="me"):
+    """token.json is the original single-user mailbox ("me"); other accounts live in GMAIL_TOKEN_DIR"""
+    if account == "me":
+        return "token.json"
+    return os.path.join(GMAIL_TOKEN_DIR, f"{account}.json")
+
+
+def _use_db():
+    return os.getenv("GMAIL_TOKEN_STORE", "file").lower() == "db"
+
+
+# ------------------- CREDENTIAL STORE ------------------- #
+def _read_file(account):
+    path = token_path(account)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read()
+
+
+def _write_file(account, data):
+    """Write to a temp file and rename it over the old one, so a crash never leaves half a token"""
+    path = token_path(account)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".token-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_credentials(account="me"):
+    data = None
+    if _use_db():
+        from . import database, models
+        db = database.SessionLocal()
+        try:
+            row = db.get(models.GmailCredential, account)
+            data = row.token_json if row else None
+        finally:
+            db.close()
+        if data is None:
+            # First run with the DB store: pick up an existing token file
+            data = _read_file(account)
+    else:
+        data = _read_file(account)
+    if not data:
+        return None
+    from google.oauth2.credentials import Credentials
+    return Credentials.from_authorized_user_info(json.loads(data), SCOPES)
+
+
+def save_credentials(account, creds):
+    data = creds.to_json()
+    if _use_db():
+        from . import database, models
+        db = database.SessionLocal()
+        try:
+            row = db.get(models.GmailCredential, account)
+            if row is None:
+                db.add(models.GmailCredential(account=account, token_json=data))
+            else:
+                row.token_json = data
+            db.commit()
+        finally:
+            db.close()
+    else:
+        _write_file(account, data)
 
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open("token.json", "w") as token:
-            token.write(creds.to_json())
 
-    return build("gmail", "v1", credentials=creds)
+# ------------------- SERVICE CACHE ------------------- #
+_request_class = None
 
+
+def _timed_request_class():
+    """HttpRequest subclass recording latency and outcome of every Gmail API call made through the client"""
+    global _request_class
+    if _request_class is None:
+        from googleapiclient.http import HttpRequest
+
+        class TimedHttpRequest(HttpRequest):
+            def execute(self, http=None, num_retries=0):
+                start = time.perf_counter()
+                error = None
+                try:
+                    with metrics.span(f"gmail.{self.methodId}"):
+                        return super().execute(http=http, num_retries=num_retries)
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    metrics.observe_gmail_call(self.methodId, time.perf_counter() - start, error)
+
+        _request_class = TimedHttpRequest
+    return _request_class
+
+
+
+def _lock_for(account):
+    with _locks_guard:
+        return _locks.setdefault(account, threading.Lock())
+
+
+def _needs_refresh(creds):
+    if not creds.valid:
+        return True
+    if creds.expiry is None:
+        return False
+    margin = timedelta(seconds=int(os.getenv("GMAIL_TOKEN_REFRESH_MARGIN", "300")))
+    # google-auth keeps expiry as naive UTC
+    return creds.expiry - datetime.utcnow() < margin
+
+
+def _authorize(account, creds):
+    """Return usable credentials for account, refreshing or running the consent flow as needed"""
+    from google.auth.transport.requests import Request
+    if creds and creds.refresh_token and _needs_refresh(creds):
+        creds.refresh(Request())
+        save_credentials(account, creds)
+    elif not creds or not creds.valid:
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
+        creds = flow.run_local_server(port=0)
+        save_credentials(account, creds)
+    return creds
+
+
+def get_gmail_service(account="me"):
+    cached = _services.get(account)
+    if cached is not None and not _needs_refresh(cached[1]):
+        return cached[0]
+
+    with _lock_for(account):
+        cached = _services.get(account)
+        if cached is not None:
+            service, creds = cached
+            if not _needs_refresh(creds):
+                return service
+            if creds.refresh_token:
+                from google.auth.transport.requests import Request
+                # The client holds this credentials object, refreshing it in place updates the client too
+                creds.refresh(Request())
+                save_credentials(account, creds)
+                return service
+
+        from googleapiclient.discovery import build
+        creds = _authorize(account, load_credentials(account))
+        service = build(
+            "gmail", "v1", credentials=creds, static_discovery=True, cache_discovery=False, requestBuilder=_timed_request_class()
+        )
+        _services[account] = (service, creds)
+        return service
+
+
+def forget(account=None):
+    """Drop cached clients, e.g. after a user re-authorizes or is removed"""
+    with _locks_guard:
+        if account is None:
+            _services.clear()
+        else:
+            _services.pop(account, None)
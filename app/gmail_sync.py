@@ -0,0 +1,239 @@
+"""
+Incremental Gmail sync bookkeeping: history cursors, run claims and the
+processed_messages ledger.
+
+Every processed email is recorded with its internalDate, a hash of its
+content, the status it was classified as and the classifier rules version
+(classifier.version). Later syncs skip recorded ids, and the writer skips an
+email whose content was already applied under another id (resent or duplicated
+notifications). When the rules change, the next sync of each account runs a full
+resync and re-classifies recorded emails; statuses only ever move forward in
+email time, so replaying old mail can't undo newer updates.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, insert, or_
+from sqlalchemy.dialects import sqlite, postgresql
+from . import models
+from .classifier import get_classifier
+
+DEFAULT_GMAIL_QUERY = "from:(linkedin.com OR naukri.com OR internshala.com OR indeed.com)"
+
+# Gmail caps messages.list pages at 500 ids
+LIST_PAGE_SIZE = 500
+# Chunk size for "already processed?" lookups, keeps the IN (...) list bounded
+LOOKUP_CHUNK = 500
+# How far before the last checkpoint the GMAIL_QUERY lookup of a delta run reaches back: mail that
+# arrived during that run, or was delivered late, can have an internalDate before the checkpoint
+DELTA_QUERY_SLACK = timedelta(days=1)
+
+
+def get_sync_state(db, account="me"):
+    """Return the sync cursor row for an account, creating it if needed"""
+    state = db.get(models.SyncState, account)
+    if state is None:
+        state = models.SyncState(account=account)
+        db.add(state)
+        db.flush()
+    return state
+
+
+def claim_run(db, account="me", stale_after=None):
+    """
+    Mark the account as being synced; False if another run (in any process) holds it.
+
+    A claim older than SYNC_RUN_TIMEOUT seconds is treated as abandoned by a crashed run.
+    """
+    stale_after = stale_after or int(os.getenv("SYNC_RUN_TIMEOUT", "3600"))
+    get_sync_state(db, account)
+    db.commit()
+    now = datetime.utcnow()
+    S = models.SyncState
+    claimed = db.execute(
+        update(S)
+        .where(S.account == account)
+        .where(or_(S.running_since.is_(None), S.running_since < now - timedelta(seconds=stale_after)))
+        .values(running_since=now)
+    ).rowcount == 1
+    db.commit()
+    return claimed
+
+
+def release_run(db, account="me"):
+    S = models.SyncState
+    db.execute(update(S).where(S.account == account).values(running_since=None))
+    db.commit()
+
+
+def _history_delta(service, start_history_id):
+    """Page through users.history.list and collect ids of added/relabelled messages"""
+    label = os.getenv("GMAIL_HISTORY_LABEL", "INBOX")
+    message_ids = []
+    seen = set()
+    page_token = None
+    while True:
+        results = service.users().history().list(
+            userId='me',
+            startHistoryId=start_history_id,
+            historyTypes=["messageAdded", "labelAdded"],
+            labelId=label,
+            pageToken=page_token
+        ).execute()
+
+        for record in results.get('history', []):
+            for added in record.get('messagesAdded', []) + record.get('labelsAdded', []):
+                message_id = added['message']['id']
+                if message_id not in seen:
+                    seen.add(message_id)
+                    message_ids.append(message_id)
+
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            return message_ids
+
+
+def _matching(service, message_ids, query, since):
+    """
+    Keep the message ids that also match the Gmail query.
+
+    history.list can't search, so the ids are intersected with messages.list for the
+    query restricted to mail after `since`; the delta then only contains mail the
+    query would have picked up in a full resync (portal senders by default).
+    """
+    wanted = set(message_ids)
+    found = set()
+    page_token = None
+    q = f"({query}) after:{int((since - DELTA_QUERY_SLACK).replace(tzinfo=timezone.utc).timestamp())}"
+    while found != wanted:
+        results = service.users().messages().list(
+            userId='me',
+            q=q,
+            maxResults=LIST_PAGE_SIZE,
+            pageToken=page_token
+        ).execute()
+
+        found.update(m['id'] for m in results.get('messages', []) if m['id'] in wanted)
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
+    return [m for m in message_ids if m in found]
+
+
+def _full_resync(service, query, limit):
+    """List up to `limit` messages matching the query, oldest first"""
+    message_ids = []
+    page_token = None
+    while len(message_ids) < limit:
+        results = service.users().messages().list(
+            userId='me',
+            q=query,
+            maxResults=min(LIST_PAGE_SIZE, limit - len(message_ids)),
+            pageToken=page_token
+        ).execute()
+
+        message_ids.extend(m['id'] for m in results.get('messages', []))
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
+
+    # messages.list returns newest first; apply older mail first so newer statuses win
+    message_ids.reverse()
+    return message_ids
+
+
+def _drop_processed(db, account, message_ids, rules_version=None):
+    """Filter out message ids already recorded in processed_messages (under rules_version, if given)"""
+    P = models.ProcessedMessage
+    processed = set()
+    for i in range(0, len(message_ids), LOOKUP_CHUNK):
+        chunk = message_ids[i:i + LOOKUP_CHUNK]
+        rows = db.execute(select(P.message_id, P.rules_version).where(P.account == account, P.message_id.in_(chunk)))
+        # Rows recorded before versions were tracked count as processed
+        processed.update(m for m, version in rows if rules_version is None or version in (None, rules_version))
+    return [m for m in message_ids if m not in processed]
+
+
+def list_new_message_ids(service, db, account="me"):
+    """
+    Return (message_ids, history_id) for mail that arrived since the last checkpoint.
+
+    Uses users.history.list from the stored historyId, keeping only messages that
+    match GMAIL_QUERY; when there is no cursor yet or Gmail reports it expired
+    (404), falls back to a full resync bounded by GMAIL_RESYNC_LIMIT. The
+    returned history_id should be saved with save_checkpoint() once the messages
+    have been processed.
+    """
+    from googleapiclient.errors import HttpError
+
+    query = os.getenv("GMAIL_QUERY", DEFAULT_GMAIL_QUERY)
+
+    # Read the mailbox position first so nothing arriving mid-sync is skipped next run
+    history_id = service.users().getProfile(userId='me').execute()['historyId']
+    state = get_sync_state(db, account)
+    rules_version = get_classifier().version
+
+    message_ids = None
+    if state.rules_version and state.rules_version != rules_version:
+        # Rules changed: walk the mailbox again so recorded emails are re-classified
+        print(f"🔁 Classifier rules changed for {account}, re-processing recent emails")
+    elif state.history_id and state.checkpoint_at:
+        try:
+            message_ids = _history_delta(service, state.history_id)
+            if message_ids:
+                message_ids = _matching(service, message_ids, query, state.checkpoint_at)
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+            print(f"⚠️ Gmail history cursor {state.history_id} expired, running full resync")
+
+    if message_ids is None:
+        limit = int(os.getenv("GMAIL_RESYNC_LIMIT", "500"))
+        message_ids = _full_resync(service, query, limit)
+        state.last_full_sync_at = datetime.utcnow()
+
+    return _drop_processed(db, account, message_ids, rules_version), history_id
+
+
+def is_duplicate(db, account, message_id, content_hash, rules_version):
+    """True if the same content was already applied from another message under these rules"""
+    P = models.ProcessedMessage
+    return db.execute(
+        select(P.message_id).where(
+            P.account == account, P.content_hash == content_hash,
+            P.rules_version == rules_version, P.message_id != message_id,
+        ).limit(1)
+    ).first() is not None
+
+
+def mark_processed(db, rows):
+    """
+    Record processed messages (dicts of ProcessedMessage columns) so later syncs skip them.
+
+    Re-processed messages overwrite their earlier record.
+    """
+    if not rows:
+        return
+    table = models.ProcessedMessage.__table__
+    conn = db.connection()
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialect == "sqlite" else postgresql).insert(table)
+        columns = [c for c in rows[0] if c not in ("account", "message_id")]
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["account", "message_id"], set_={c: stmt.excluded[c] for c in columns}
+        )
+        conn.execute(stmt, rows)
+        return
+    for row in rows:
+        where = [table.c.account == row["account"], table.c.message_id == row["message_id"]]
+        if conn.execute(update(table).where(*where).values(**row)).rowcount == 0:
+            conn.execute(insert(table).values(**row))
+
+
+def save_checkpoint(db, history_id, account="me"):
+    """Advance the account's sync cursor and note the rules its mail was processed with"""
+    state = get_sync_state(db, account)
+    state.history_id = str(history_id)
+    state.checkpoint_at = datetime.utcnow()
+    state.rules_version = get_classifier().version
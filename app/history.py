@@ -0,0 +1,149 @@
+"""
+Status change history.
+
+Every flush that creates an application or changes its status appends rows to
+status_events with one executemany insert, in the same transaction as the
+change. Writers describe themselves through Session.info:
+
+    db.info["source"] = "gmail"                           # default "api"
+    db.info.setdefault("status_message_ids", {})[app_id] = message_id
+
+Applications also remember when their current status was set
+(status_changed_at): writers that know better (Gmail sync uses the email's
+date) set it themselves, otherwise it is stamped with the flush time. The
+first status other than "Applied" also copies it into responded_at.
+
+Old events are compacted by age (STATUS_EVENT_RETENTION_DAYS), always keeping
+the newest event of each application so its current status stays explained.
+"""
+
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, delete, exists, event, inspect
+from sqlalchemy.orm import Session, aliased
+from . import analytics, database, events, models
+
+COMPACTION_CHUNK_SIZE = 5000
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_status_change(session, flush_context, instances):
+    now = datetime.utcnow()
+    for obj in session.new:
+        if isinstance(obj, models.Application):
+            if obj.status_changed_at is None:
+                obj.status_changed_at = now
+            _stamp_response(obj)
+    for obj in session.dirty:
+        if isinstance(obj, models.Application):
+            state = inspect(obj)
+            if state.attrs.status.history.has_changes():
+                if not state.attrs.status_changed_at.history.has_changes():
+                    obj.status_changed_at = now
+                _stamp_response(obj)
+
+
+def _stamp_response(obj):
+    if obj.responded_at is None and (obj.status or analytics.NO_RESPONSE_STATUS) != analytics.NO_RESPONSE_STATUS:
+        obj.responded_at = obj.status_changed_at
+
+
+@events.on_flush
+def _append_events(session, changes):
+    source = session.info.get("source", "api")
+    message_ids = session.info.get("status_message_ids", {})
+    now = datetime.utcnow()
+    rows = []
+    for change in changes:
+        if change.kind == "created":
+            old_status = None
+        elif change.kind == "updated" and "status" in change.old:
+            old_status = change.old["status"]
+        else:
+            continue
+        rows.append({
+            "owner_id": change.values.get("owner_id"),
+            "application_id": change.id,
+            "old_status": old_status,
+            "new_status": change.values["status"],
+            "source": source,
+            "message_id": message_ids.get(change.id),
+            "created_at": now,
+        })
+    if rows:
+        session.connection().execute(insert(models.StatusEvent.__table__), rows)
+
+
+def _page(db, stmt, limit):
+    E = models.StatusEvent
+    A = models.Application
+    rows = db.execute(
+        stmt.add_columns(A.company_name).outerjoin(A, A.id == E.application_id).limit(limit + 1)
+    ).all()
+    items = []
+    for event, company_name in rows[:limit]:
+        item = {c.name: getattr(event, c.name) for c in E.__table__.columns}
+        item["company_name"] = company_name
+        items.append(item)
+    next_cursor = items[-1]["id"] if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def timeline(db, owner_id, application_id, limit=50, cursor=None):
+    """Status events of one of the user's applications, oldest first; cursor is the last id seen"""
+    E = models.StatusEvent
+    stmt = select(E).where(E.owner_id == owner_id, E.application_id == application_id)
+    if cursor is not None:
+        stmt = stmt.where(E.id > cursor)
+    return _page(db, stmt.order_by(E.id), limit)
+
+
+def activity(db, owner_id, limit=50, cursor=None, source=None):
+    """Recent status events across the user's applications, newest first"""
+    E = models.StatusEvent
+    stmt = select(E).where(E.owner_id == owner_id)
+    if cursor is not None:
+        stmt = stmt.where(E.id < cursor)
+    if source:
+        stmt = stmt.where(E.source == source)
+    return _page(db, stmt.order_by(E.id.desc()), limit)
+
+
+def compact(db, retention_days):
+    """Delete events older than retention_days that have a newer event for the same application"""
+    E = models.StatusEvent
+    newer = aliased(E)
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    expired = (
+        select(E.id)
+        .where(E.created_at < cutoff)
+        .where(exists().where(newer.application_id == E.application_id, newer.id > E.id))
+        .limit(COMPACTION_CHUNK_SIZE)
+    )
+    deleted = 0
+    while True:
+        ids = db.execute(expired).scalars().all()
+        if not ids:
+            return deleted
+        db.execute(delete(E).where(E.id.in_(ids)))
+        db.commit()
+        deleted += len(ids)
+
+
+def compact_job():
+    """Scheduled retention run; STATUS_EVENT_RETENTION_DAYS=0 keeps everything"""
+    retention_days = int(os.getenv("STATUS_EVENT_RETENTION_DAYS", "365"))
+    if retention_days <= 0:
+        return 0
+    db = database.SessionLocal()
+    try:
+        deleted = compact(db, retention_days)
+        if deleted:
+            print(f"🧹 Compacted {deleted} status events older than {retention_days} days")
+        return deleted
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Status event compaction failed: {str(e)}")
+        return 0
+    finally:
+        db.close()
@@ -0,0 +1,57 @@
+from html.parser import HTMLParser
+
+# Elements whose content never shows up as readable text
+SKIP_TAGS = {"script", "style", "head", "noscript", "template"}
+# Elements that start a new line when rendered, so words from adjacent cells don't run together
+BLOCK_TAGS = {"br", "p", "div", "tr", "li", "table", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+CHUNK_SIZE = 4096
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS and not self.skip_depth:
+            self.parts.append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS and not self.skip_depth:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+def iter_html_text(html, chunk_size=CHUNK_SIZE):
+    """
+    Yield the visible text of an HTML document fragment by fragment.
+
+    The document is fed to the parser in chunks and text is yielded as soon as
+    it is available, so a caller that has seen enough can stop iterating and
+    the rest of the markup is never parsed.
+    """
+    parser = _TextExtractor()
+    for i in range(0, len(html), chunk_size):
+        parser.feed(html[i:i + chunk_size])
+        if parser.parts:
+            yield "".join(parser.parts)
+            parser.parts.clear()
+    parser.close()
+    if parser.parts:
+        yield "".join(parser.parts)
+
+
+def html_to_text(html):
+    """Return the visible text of an HTML document"""
+    return "".join(iter_html_text(html))
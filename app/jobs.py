@@ -0,0 +1,114 @@
+"""
+Background job registry for long-running work such as Gmail syncs.
+
+Jobs run on a small thread pool so API workers and the bot's event loop return
+immediately. Submitting a job while another job of the same name is queued or
+running returns the existing job instead of starting a second run; callers
+poll GET /sync-jobs/{id} or await job.future. Per-account syncs use one name
+per account, so different users' syncs run side by side on the pool
+(SYNC_WORKERS threads).
+"""
+
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class Job:
+    def __init__(self, name, trigger, owner_id=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.owner_id = owner_id
+        self.state = "queued"
+        self.triggers = [trigger]
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.future = None
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "state": self.state,
+            "triggers": list(self.triggers),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobRegistry:
+    def __init__(self, max_workers=2, keep=50):
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._active = {}  # name -> job currently queued or running
+        self._lock = threading.Lock()
+
+    def submit(self, name, fn, trigger="api", owner_id=None):
+        """
+        Run fn(job) in the background, or join the active job of the same name.
+
+        fn may update job.progress while running; its return value becomes job.result.
+        """
+        with self._lock:
+            active = self._active.get(name)
+            if active is not None and active.state in ACTIVE_STATES:
+                active.triggers.append(trigger)
+                return active
+
+            job = Job(name, trigger, owner_id)
+            self._active[name] = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.keep:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.state in ACTIVE_STATES:
+                    break
+                self._jobs.popitem(last=False)
+            job.future = self._executor.submit(self._run, job, fn)
+            return job
+
+    def _run(self, job, fn):
+        job.state = "running"
+        job.started_at = datetime.utcnow()
+        try:
+            job.result = fn(job)
+            job.state = "succeeded"
+        except Exception as e:
+            job.error = str(e)
+            job.state = "failed"
+            print(f"❌ Job {job.name} ({job.id}) failed: {str(e)}")
+        finally:
+            job.finished_at = datetime.utcnow()
+            with self._lock:
+                if self._active.get(job.name) is job:
+                    del self._active[job.name]
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def recent(self, name=None, limit=20, owner_id=None):
+        jobs = [
+            j for j in reversed(self._jobs.values())
+            if (name is None or j.name == name) and (owner_id is None or j.owner_id == owner_id)
+        ]
+        return jobs[:limit]
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait)
+
+
+registry = JobRegistry(max_workers=int(os.getenv("SYNC_WORKERS", "4")), keep=int(os.getenv("JOB_HISTORY_SIZE", "200")))
@@ -0,0 +1,244 @@
+"""
+Live updates: committed application changes pushed to the dashboard over
+Server-Sent Events (GET /events in app.main serves stream()).
+
+Every commit that touches applications (API, bot commands, Gmail sync, bulk
+import) reaches the broker through events.on_commit as one compact diff per row:
+
+    {"op": "created", "id": 7, "item": {"id": 7, "company_name": ..., "status": ...}}
+    {"op": "updated", "id": 7, "changes": {"status": "Offer"}}
+    {"op": "deleted", "id": 7}
+
+The broker fans them out to the owner's open streams and keeps the last
+LIVE_BUFFER_SIZE events in a ring buffer. Event ids are "<epoch>-<n>", so an
+EventSource that reconnects with Last-Event-ID gets what it missed replayed.
+When that is impossible (the id is from before a restart or already left the
+buffer, or the client fell too far behind) the stream sends a "reset" event
+and the client reloads the list instead.
+
+The broker is per process. With LIVE_BACKEND=redis changes go through a Redis
+channel (REDIS_URL) and every API process relays them to its own streams, so
+changes made by the polling bot or another replica reach every dashboard.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import uuid
+from collections import deque
+from . import events, metrics, queries, serialization
+
+BUFFER_SIZE = int(os.getenv("LIVE_BUFFER_SIZE", "1000"))
+QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "500"))
+HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+# Streams end after this long and the browser reconnects with Last-Event-ID, losing nothing; this keeps
+# connections spread over replicas and lets a shutting down server drain them
+STREAM_SECONDS = float(os.getenv("LIVE_STREAM_SECONDS", "300"))
+RETRY_MS = 2000
+CHANNEL = "jobtracker:live"
+
+
+class Subscription:
+    """One open stream: a bounded queue fed from whichever thread committed the change"""
+
+    def __init__(self, broker, owner_id, loop):
+        self.broker = broker
+        self.owner_id = owner_id
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:  # the stream's event loop is gone
+            self.close()
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client this far behind reloads the list rather than replaying every change
+            self.overflowed = True
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """In-process fan-out with a ring buffer of recent events for Last-Event-ID replay"""
+
+    def __init__(self, capacity=BUFFER_SIZE):
+        # Sequence numbers restart with the process; the epoch tells ids from an earlier run apart
+        self.epoch = uuid.uuid4().hex[:8]
+        self._events = deque(maxlen=capacity)  # (seq, owner id, data)
+        self._seq = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def event_id(self, seq):
+        return f"{self.epoch}-{seq}"
+
+    def publish(self, owner_id, data):
+        """Append an event and hand it to the owner's streams; safe to call from any thread"""
+        with self._lock:
+            self._seq += 1
+            event = (self._seq, owner_id, data)
+            self._events.append(event)
+            subscribers = [s for s in self._subscribers if s.owner_id == owner_id]
+        for subscription in subscribers:
+            subscription.offer(event)
+
+    def _missed(self, owner_id, last_event_id):
+        """Events after last_event_id for the owner, or None if they can't all be replayed"""
+        epoch, _, seq = (last_event_id or "").partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        oldest = self._events[0][0] if self._events else self._seq + 1
+        if seq > self._seq or seq < oldest - 1:
+            return None
+        return [e for e in self._events if e[0] > seq and e[1] == owner_id]
+
+    def subscribe(self, owner_id, last_event_id=None):
+        """Open a subscription; returns it with the events to replay first (None: client must reload)"""
+        subscription = Subscription(self, owner_id, asyncio.get_running_loop())
+        with self._lock:
+            backlog = self._missed(owner_id, last_event_id) if last_event_id else []
+            self._subscribers.add(subscription)
+        return subscription, backlog
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def latest_id(self):
+        with self._lock:
+            return self.event_id(self._seq)
+
+
+class RedisRelay:
+    """Publishes changes to a Redis channel and feeds the ones received into the local broker"""
+
+    def __init__(self, client, channel=CHANNEL):
+        self.client = client
+        self.channel = channel
+        self._listener = None
+
+    def publish(self, owner_id, data):
+        self.client.publish(self.channel, json.dumps([owner_id, data]))
+
+    def listen(self, broker):
+        """Start relaying in a daemon thread (only processes that serve streams need this)"""
+        if self._listener is not None:
+            return
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+
+        def relay():
+            for message in pubsub.listen():
+                try:
+                    owner_id, data = json.loads(message["data"])
+                    broker.publish(owner_id, data)
+                except (ValueError, TypeError, KeyError) as e:
+                    print(f"⚠️ Ignoring malformed live update: {str(e)}")
+
+        self._listener = threading.Thread(target=relay, name="live-relay", daemon=True)
+        self._listener.start()
+
+
+_broker = Broker()
+_relay = None
+_relay_lock = threading.Lock()
+
+
+def get_relay():
+    global _relay
+    if _relay is None and os.getenv("LIVE_BACKEND", "memory").lower() == "redis":
+        with _relay_lock:
+            if _relay is None:
+                try:
+                    import redis
+                except ImportError:
+                    print("⚠️ LIVE_BACKEND=redis but the redis package is not installed, live updates stay in this process")
+                    _relay = False
+                else:
+                    _relay = RedisRelay(redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0")))
+    return _relay or None
+
+
+def get_broker():
+    relay = get_relay()
+    if relay:
+        relay.listen(_broker)
+    return _broker
+
+
+# ------------------- CHANGE FEED ------------------- #
+def diffs(change):
+    """(owner id, diff) pairs for one events.ApplicationChange"""
+    owner_id = change.values.get("owner_id")
+    if change.kind == "deleted":
+        return [(owner_id, {"op": "deleted", "id": change.id})]
+    item = {"id": change.id, **{f: change.values.get(f) for f in queries.DEFAULT_FIELDS if f != "id"}}
+    if change.kind == "created":
+        return [(owner_id, {"op": "created", "id": change.id, "item": item})]
+    if "owner_id" in change.old:
+        # Moved to another user: gone from one dashboard, new on the other
+        return [(change.old["owner_id"], {"op": "deleted", "id": change.id}), (owner_id, {"op": "created", "id": change.id, "item": item})]
+    changes = {f: change.values.get(f) for f in change.old if f in queries.SELECTABLE_FIELDS}
+    return [(owner_id, {"op": "updated", "id": change.id, "changes": changes})] if changes else []
+
+
+@events.on_commit
+def _publish(changes):
+    relay = get_relay()
+    for change in changes:
+        for owner_id, diff in diffs(change):
+            data = serialization.dumps(diff).decode()
+            metrics.live_events.inc(op=diff["op"])
+            if relay:
+                try:
+                    relay.publish(owner_id, data)
+                    continue
+                except Exception as e:
+                    print(f"⚠️ Live update relay failed, delivering locally: {str(e)}")
+            _broker.publish(owner_id, data)
+
+
+# ------------------- STREAM ------------------- #
+def _message(event_id, data, event=None):
+    return (f"id: {event_id}\n" + (f"event: {event}\n" if event else "") + f"data: {data}\n\n").encode()
+
+
+async def stream(owner_id, last_event_id=None, heartbeat=HEARTBEAT_SECONDS, lifetime=STREAM_SECONDS):
+    """Server-sent events for one user until the client disconnects or lifetime runs out"""
+    broker = get_broker()
+    subscription, backlog = broker.subscribe(owner_id, last_event_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + lifetime
+    try:
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        if backlog is None:
+            metrics.live_resets.inc(reason="resume")
+            yield _message(broker.latest_id(), "{}", "reset")
+        for seq, _, data in backlog or ():
+            yield _message(broker.event_id(seq), data)
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"  # keeps proxies from closing an idle stream
+                continue
+            if subscription.overflowed:
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.overflowed = False
+                metrics.live_resets.inc(reason="overflow")
+                yield _message(broker.latest_id(), "{}", "reset")
+                continue
+            seq, _, data = event
+            yield _message(broker.event_id(seq), data)
+    finally:
+        subscription.close()
@@ -1,20 +1,25 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from apscheduler.schedulers.background import BackgroundScheduler
-from . import models, schemas, database
-from . import gmail_service, email_parser, email_summary
+from typing import List, Optional
+from datetime import date
+from . import models, schemas, database, queries, search, bulk, cache, analytics, history, tenants, metrics, deps
+from . import compression, email_summary, jobs, live, scheduling, telegram_webhook
+# Sync entry points stay importable from here: stored scheduler jobs reference them as app.main:<name>
+from .sync import run_sync, sync_emails_job, start_sync, sync_all_accounts
 from .database import Base
 from dotenv import load_dotenv
+import anyio
 import os
+import time
 load_dotenv()
 
-models.Base.metadata.create_all(bind=database.engine)
-
 app = FastAPI(title="Job Application Tracker")
 
+if compression.ENABLED:
+    app.add_middleware(compression.CompressionMiddleware)
+
 # Serve static files
 app.mount("/static", StaticFiles(directory="."), name="static")
 
@@ -22,6 +27,49 @@ app.mount("/static", StaticFiles(directory="."), name="static")
 async def read_index():
     return FileResponse('index.html')
 
+# ------------------- METRICS ------------------- #
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        with metrics.span("http.request", method=request.method, path=request.url.path):
+            response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route templates ("/applications/{app_id}") keep the label set small
+        route = metrics.route_template(request)
+        metrics.http_latency.observe(time.perf_counter() - start, method=request.method, route=route)
+        metrics.http_requests.inc(method=request.method, route=route, status=status)
+
+def profile_endpoints():
+    if not metrics.PROFILE_ENDPOINTS:
+        raise HTTPException(status_code=404, detail="Profiling endpoints are disabled")
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(deps.operator_access())])
+def get_metrics():
+    """Prometheus scrape endpoint (this process only)"""
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Profiling output shows file paths and can slow the process down: opt-in, and never without a token
+ProfileAccess = [Depends(profile_endpoints), Depends(deps.operator_access(always=True))]
+
+@app.get("/debug/profile", include_in_schema=False, dependencies=ProfileAccess)
+def get_profile(name: Optional[str] = None, limit: int = Query(30, ge=1, le=500), sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls)$")):
+    """Aggregated cProfile stats of sampled sync stages and bot handlers"""
+    return PlainTextResponse(f"sample rate: {metrics.profiler.rate}\n" + metrics.profiler.report(name, limit, sort))
+
+@app.post("/debug/profile", include_in_schema=False, dependencies=ProfileAccess)
+def set_profile(rate: float = Query(..., ge=0, le=1), reset: bool = False):
+    """Change the profiling sample rate at runtime (0 turns it off)"""
+    metrics.profiler.set_rate(rate)
+    if reset:
+        metrics.profiler.reset()
+    return {"rate": metrics.profiler.rate, "samples": metrics.profiler.samples}
+
 # ------------------- DB Dependency ------------------- #
 def get_db():
     db = database.SessionLocal()
@@ -30,22 +78,95 @@ def get_db():
     finally:
         db.close()
 
+# Every data endpoint acts on behalf of one user (API token, or the default user)
+CurrentUser = Depends(deps.current_user_id)
+
 # ------------------- CORE ENDPOINTS ------------------- #
-@app.post("/applications", response_model=schemas.ApplicationOut)
-def create_application(application: schemas.ApplicationCreate, db: Session = Depends(get_db)):
-    db_app = models.Application(**application.dict())
+# Sync CRUD runs on the threadpool; with DB_ASYNC the async_api router serves the same routes instead
+crud_router = APIRouter()
+
+@crud_router.post("/applications", response_model=schemas.ApplicationOut)
+def create_application(application: schemas.ApplicationCreate, user_id: int = CurrentUser, db: Session = Depends(get_db)):
+    db_app = models.Application(**application.dict(), owner_id=user_id)
     db.add(db_app)
     db.commit()
     db.refresh(db_app)
     return db_app
 
-@app.get("/applications", response_model=List[schemas.ApplicationOut])
-def get_applications(db: Session = Depends(get_db)):
-    return db.query(models.Application).all()
+@crud_router.get("/applications", response_model=schemas.ApplicationPage)
+def get_applications(
+    request: Request,
+    limit: int = Query(50, ge=1, le=queries.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    platform: Optional[str] = None,
+    applied_from: Optional[date] = None,
+    applied_to: Optional[date] = None,
+    company_prefix: Optional[str] = None,
+    q: Optional[str] = Query(None, description="Case-insensitive substring of the company or role"),
+    fields: Optional[str] = Query(None, description="Comma separated columns to return, e.g. id,company_name,status"),
+    include_total: bool = False,
+    user_id: int = CurrentUser,
+    db: Session = Depends(get_db)
+):
+    """List applications newest first, one keyset page at a time; pass next_cursor back to get the next page"""
+    response_cache = cache.get_cache()
+    key = cache.make_key(
+        "applications", owner=user_id, limit=limit, cursor=cursor, status=status, platform=platform, applied_from=applied_from,
+        applied_to=applied_to, company_prefix=company_prefix, q=q, fields=fields, include_total=include_total,
+    )
+    versioned_key = response_cache.versioned_key(key, cache.list_tags(user_id, status, platform))
+    if response_cache.is_not_modified(request, versioned_key):
+        return Response(status_code=304, headers={"ETag": cache.ResponseCache.etag(versioned_key)})
+
+    def load_page():
+        try:
+            columns = queries.parse_fields(fields)
+            conditions = queries.application_filters(user_id, status, platform, applied_from, applied_to, company_prefix, q)
+            rows = db.execute(queries.list_applications_stmt(columns, conditions, limit, cursor))
+        except queries.InvalidQuery as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        items, next_cursor = queries.build_page(rows, columns, limit)
+        total = db.execute(queries.count_applications_stmt(conditions)).scalar() if include_total else None
+        return cache.encode({"items": items, "next_cursor": next_cursor, "total": total})
 
-@app.put("/applications/{app_id}", response_model=schemas.ApplicationOut)
-def update_status(app_id: int, update: schemas.ApplicationUpdate, db: Session = Depends(get_db)):
-    db_app = db.query(models.Application).filter(models.Application.id == app_id).first()
+    return cache.json_response(response_cache.get_or_set(versioned_key, load_page), versioned_key)
+
+@app.post("/applications/bulk", response_model=schemas.BulkImportResult)
+async def bulk_import(request: Request, format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"), user_id: int = CurrentUser):
+    """Upsert applications from a streamed CSV or NDJSON body, keyed by company, role and job link"""
+    try:
+        fmt = bulk.detect_format(format, request.headers.get("content-type"))
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    result = await bulk.import_request(request, fmt, user_id)
+    print(f"📥 Bulk import: {result['inserted']} inserted, {result['updated']} updated, {result['failed']} failed")
+    return result
+
+@app.get("/applications/export")
+def export_applications(
+    format: str = Query("csv", pattern="^(csv|ndjson|json)$"),
+    status: Optional[str] = None,
+    platform: Optional[str] = None,
+    applied_from: Optional[date] = None,
+    applied_to: Optional[date] = None,
+    company_prefix: Optional[str] = None,
+    q: Optional[str] = None,
+    user_id: int = CurrentUser,
+):
+    """Stream every matching application as CSV, NDJSON or one JSON array"""
+    conditions = queries.application_filters(user_id, status, platform, applied_from, applied_to, company_prefix, q)
+    media_type = {"csv": "text/csv", "ndjson": "application/x-ndjson", "json": "application/json"}[format]
+    return StreamingResponse(
+        bulk.export_rows(format, conditions),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="applications.{format}"'},
+    )
+
+@crud_router.put("/applications/{app_id}", response_model=schemas.ApplicationOut)
+def update_status(app_id: int, update: schemas.ApplicationUpdate, user_id: int = CurrentUser, db: Session = Depends(get_db)):
+    db_app = db.query(models.Application).filter(models.Application.id == app_id, models.Application.owner_id == user_id).first()
     if not db_app:
         raise HTTPException(status_code=404, detail="Application not found")
     db_app.status = update.status
@@ -53,71 +174,122 @@ def update_status(app_id: int, update: schemas.ApplicationUpdate, db: Session =
     db.refresh(db_app)
     return db_app
 
-@app.get("/applications/status/{company}", response_model=List[schemas.ApplicationOut])
-def get_status_by_company(company: str, db: Session = Depends(get_db)):
-    return db.query(models.Application).filter(models.Application.company_name.ilike(f"%{company}%")).all()
+@crud_router.get("/applications/status/{company}", response_model=List[schemas.ApplicationOut])
+def get_status_by_company(company: str, limit: int = Query(20, ge=1, le=100), user_id: int = CurrentUser, db: Session = Depends(get_db)):
+    key = cache.make_key("search", owner=user_id, company=company.lower(), limit=limit)
+    # ApplicationOut's columns selected as tuples and encoded as they are, no model per row
+    body = cache.get_cache().cached(key, [cache.user_tag(user_id)], lambda: cache.encode(
+        search.search_applications(db, user_id, company, limit=limit, fields=queries.DEFAULT_FIELDS)
+    ))
+    return cache.json_response(body)
+
+if database.ASYNC_DB:
+    from . import async_api
+    app.include_router(async_api.router)
+    print("⚡ Serving application endpoints from the async database engine")
+else:
+    app.include_router(crud_router)
+
+app.include_router(telegram_webhook.router)
+
+# ------------------- LIVE UPDATES ------------------- #
+@app.get("/events")
+async def application_events(request: Request, user_id: int = Depends(deps.stream_user)):
+    """Stream the user's application changes as server-sent events (resumable with Last-Event-ID)"""
+    return StreamingResponse(
+        live.stream(user_id, request.headers.get("Last-Event-ID")),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx would otherwise hold events back until its buffer fills
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-# ------------------- EMAIL SYNC LOGIC ------------------- #
+# ------------------- USERS ------------------- #
+@app.get("/me", response_model=schemas.UserOut)
+def get_me(user_id: int = CurrentUser, db: Session = Depends(get_db)):
+    """The user the request acts as"""
+    user = tenants.get_user(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
-def sync_emails_job():
-    """Sync emails from Gmail and update application statuses"""
+# ------------------- HISTORY & ANALYTICS ------------------- #
+@app.get("/applications/{app_id}/timeline", response_model=schemas.StatusEventPage)
+def get_timeline(
+    app_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = None,
+    user_id: int = CurrentUser,
+    db: Session = Depends(get_db)
+):
+    """Status changes of one application, oldest first; pass next_cursor back for more"""
+    return history.timeline(db, user_id, app_id, limit=limit, cursor=cursor)
+
+@app.get("/activity", response_model=schemas.StatusEventPage)
+def get_activity(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = None,
+    source: Optional[str] = Query(None, pattern="^(api|bot|gmail|import)$"),
+    user_id: int = CurrentUser,
+    db: Session = Depends(get_db)
+):
+    """Recent status changes across all applications, newest first"""
+    return history.activity(db, user_id, limit=limit, cursor=cursor, source=source)
+
+@app.get("/analytics")
+def get_analytics(user_id: int = CurrentUser, db: Session = Depends(get_db)):
+    """Counts by status/platform/week, response rates, median days to first response and status transitions"""
+    key = cache.make_key("analytics", owner=user_id)
+    body = cache.get_cache().cached(key, [cache.user_tag(user_id)], lambda: cache.encode(analytics.get_analytics(db, user_id)))
+    return cache.json_response(body)
+
+@app.get("/cache/stats", dependencies=[Depends(deps.operator_access())])
+def cache_stats():
+    """Hit/miss/eviction counters of the application response cache"""
+    return cache.get_cache().stats()
+
+# ------------------- EMAIL SYNC ------------------- #
+@app.post("/sync-emails", status_code=202)
+def manual_sync(user_id: int = CurrentUser):
+    """Start a Gmail sync in the background; poll /sync-jobs/{id} for progress and the result"""
     try:
-    db = database.SessionLocal()
-    service = gmail_service.get_gmail_service()
-        
-        gmail_query = os.getenv("GMAIL_QUERY", "from:(linkedin.com OR naukri.com OR internshala.com OR indeed.com)")
-        results = service.users().messages().list(
-            userId='me',
-            q=gmail_query
-        ).execute()
-
-        messages = results.get('messages', [])
-        updated_apps = []
-
-        for m in messages[:10]:  # Process last 10 emails
-            msg = service.users().messages().get(userId='me', id=m['id']).execute()
-            parsed = email_parser.parse_email(msg)
-
-            # Try to match email with existing applications
-            db_app = db.query(models.Application).filter(
-                models.Application.company_name.ilike(f"%{parsed['subject']}%")
-            ).first()
-
-            if db_app and db_app.status != parsed["status"]:
-                old_status = db_app.status
-                db_app.status = parsed["status"]
-                db.commit()
-                db.refresh(db_app)
-                updated_apps.append({
-                    "company": db_app.company_name,
-                    "old_status": old_status,
-                    "new_status": db_app.status,
-                    "email_subject": parsed["subject"]
-                })
+        return start_sync("api", user_id).as_dict()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        db.close()
-        print("✅ Gmail Sync Completed:", updated_apps)
-        return updated_apps
-    except Exception as e:
-        print(f"❌ Gmail Sync Error: {str(e)}")
-        return []
+@app.get("/sync-jobs")
+def list_sync_jobs(limit: int = Query(20, ge=1, le=50), user_id: int = CurrentUser):
+    return [job.as_dict() for job in jobs.registry.recent(limit=limit, owner_id=user_id)]
 
-@app.post("/sync-emails")
-def manual_sync():
-    """Run Gmail sync manually via API"""
-    return {"updated": sync_emails_job()}
+@app.get("/sync-jobs/{job_id}")
+def get_sync_job(job_id: str, user_id: int = CurrentUser):
+    job = jobs.registry.get(job_id)
+    if not job or job.owner_id != user_id:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return job.as_dict()
 
 # ------------------- SCHEDULER ------------------- #
-scheduler = BackgroundScheduler()
-scheduler.add_job(sync_emails_job, "interval", hours=12, id="email_sync")  # run every 12 hours
-scheduler.add_job(email_summary.send_daily_summary, "cron", hour=9, id="daily_summary")
+# Only one process (the lease holder) runs these, however many workers/replicas serve the API
+scheduler = scheduling.get_scheduler()
+scheduler.add_job(sync_all_accounts, "interval", hours=12, id="email_sync", jitter=300)  # run every 12 hours
+scheduler.add_job(email_summary.send_daily_summary, "cron", hour=9, id="daily_summary", misfire_grace_time=3 * 3600)
+scheduler.add_job(history.compact_job, "cron", hour=3, id="status_event_compaction")
 
 @app.on_event("startup")
 async def startup_event():
+    # Schema migration runs here rather than at import; set DB_MIGRATE_ON_STARTUP=false and run
+    # `python -m app.database` from a release step to keep it off the serving path entirely
+    if os.getenv("DB_MIGRATE_ON_STARTUP", "true").lower() in ("1", "true", "yes"):
+        await anyio.to_thread.run_sync(database.init_db)
+    # Sync endpoints, bulk import and streaming exports share AnyIO's worker threads (40 by default)
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = int(os.getenv("API_THREADPOOL_SIZE", str(limiter.total_tokens)))
     scheduler.start()
-    print("✅ Scheduler started")
+    await telegram_webhook.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await telegram_webhook.stop()
     scheduler.shutdown()
-    print("✅ Scheduler stopped")
+    jobs.registry.shutdown()
+    if database.ASYNC_DB:
+        await database.get_async_engine().dispose()
@@ -0,0 +1,226 @@
+"""
+In-memory company index for matching emails to applications.
+
+Company names are normalized into token tuples (plus aliases without legal
+suffixes and acronyms for long names) and stored in a dict keyed by token
+n-gram. Matching an email tokenizes the subject, sender domain and body
+preview once and probes the index for every n-gram up to the longest company
+name, so the cost depends on the message length, not on the number of
+applications. Each user gets an index of their own applications, so an email is
+only ever matched against the mailbox owner's companies.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import func
+from . import events, models
+from .classifier import detect_platform
+
+# Trailing words that don't identify a company on their own ("Infosys Ltd" -> "infosys")
+LEGAL_SUFFIXES = {
+    "inc", "llc", "llp", "ltd", "limited", "pvt", "private", "corp", "corporation", "co", "company",
+    "technologies", "technology", "tech", "solutions", "services", "labs", "group", "india", "gmbh", "plc",
+}
+# Words too common in job emails and newsletters to stand for a company when left on their own
+GENERIC_WORDS = {
+    "the", "and", "of", "a", "an", "global", "international", "digital", "software", "systems", "consulting",
+    "data", "networks", "ventures", "enterprises", "industries", "partners", "holdings", "world", "first", "new",
+}
+
+# How much an alias hit counts, by alias kind and by where in the email it was found
+ALIAS_WEIGHTS = {"name": 1.0, "short": 0.9, "acronym": 0.7}
+FIELD_WEIGHTS = {"subject": 1.0, "sender": 0.9, "body": 0.6}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_SENDER_DOMAIN = re.compile(r"@([\w.-]+)")
+
+
+def tokenize(text):
+    return _TOKEN.findall((text or "").lower())
+
+
+def company_aliases(company_name):
+    """Return {token_tuple: alias_kind} for a company name"""
+    tokens = tuple(tokenize(company_name))
+    if not tokens:
+        return {}
+    aliases = {tokens: "name"}
+
+    short = list(tokens)
+    while len(short) > 1 and short[-1] in LEGAL_SUFFIXES:
+        short.pop()
+    # "Global Tech Solutions" -> "global" would match any newsletter; keep only short names that identify something
+    generic = all(t in LEGAL_SUFFIXES or t in GENERIC_WORDS for t in short)
+    if tuple(short) != tokens and len("".join(short)) >= 3 and not generic:
+        aliases.setdefault(tuple(short), "short")
+
+    if len(tokens) >= 3:
+        aliases.setdefault(("".join(t[0] for t in tokens),), "acronym")
+    return aliases
+
+
+class _Entry:
+    __slots__ = ("aliases", "role_tokens", "platform", "updated_at")
+
+    def __init__(self, aliases, role_tokens, platform, updated_at):
+        self.aliases = aliases
+        self.role_tokens = role_tokens
+        self.platform = platform
+        self.updated_at = updated_at
+
+
+class CompanyMatcher:
+    def __init__(self, owner_id=None):
+        self.owner_id = owner_id
+        self._entries = {}
+        self._index = defaultdict(dict)  # token tuple -> {app_id: alias kind}
+        self._max_ngram = 1
+        self._lock = threading.RLock()
+        self.loaded_at = None
+        self.signature = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self, db):
+        """Rebuild the index from the owner's application rows"""
+        rows = db.query(
+            models.Application.id,
+            models.Application.company_name,
+            models.Application.role,
+            models.Application.platform,
+            models.Application.updated_at,
+        ).filter(models.Application.owner_id == self.owner_id).yield_per(1000)
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+            self._max_ngram = 1
+            for app_id, company_name, role, platform, updated_at in rows:
+                self.upsert(app_id, company_name, role, platform, updated_at)
+            self.loaded_at = time.monotonic()
+            self.signature = _table_signature(db, self.owner_id)
+
+    def upsert(self, app_id, company_name, role=None, platform=None, updated_at=None):
+        with self._lock:
+            self.remove(app_id)
+            aliases = company_aliases(company_name)
+            role_tokens = frozenset(tokenize(role)) - {"not", "specified"}
+            self._entries[app_id] = _Entry(aliases, role_tokens, (platform or "").lower(), updated_at)
+            for alias, kind in aliases.items():
+                self._index[alias][app_id] = kind
+                self._max_ngram = max(self._max_ngram, len(alias))
+
+    def remove(self, app_id):
+        with self._lock:
+            entry = self._entries.pop(app_id, None)
+            if entry is None:
+                return
+            for alias in entry.aliases:
+                bucket = self._index.get(alias)
+                if bucket is not None:
+                    bucket.pop(app_id, None)
+                    if not bucket:
+                        del self._index[alias]
+
+    def _scan(self, tokens, field, scores):
+        max_n = self._max_ngram
+        index = self._index
+        for i in range(len(tokens)):
+            for n in range(1, min(max_n, len(tokens) - i) + 1):
+                bucket = index.get(tuple(tokens[i:i + n]))
+                if bucket:
+                    for app_id, kind in bucket.items():
+                        score = FIELD_WEIGHTS[field] * ALIAS_WEIGHTS[kind]
+                        hit = scores.setdefault(app_id, {})
+                        hit[field] = max(hit.get(field, 0.0), score)
+
+    def match(self, subject="", sender="", body="", platform=None):
+        """
+        Return (application_id, confidence) for the best candidate, or None.
+
+        Confidence starts from the strongest single hit and gains a little for
+        every extra field the company shows up in, for a matching platform and
+        for role words found in the text; ties go to the most recently updated
+        application.
+        """
+        sender_tokens = []
+        domain = _SENDER_DOMAIN.search(sender or "")
+        # Job portals send on behalf of companies, their domain says nothing about the employer
+        if domain and detect_platform(sender) is None:
+            sender_tokens = tokenize(domain.group(1).replace(".", " "))
+        subject_tokens = tokenize(subject)
+        body_tokens = tokenize(body)
+
+        scores = {}
+        with self._lock:
+            self._scan(subject_tokens, "subject", scores)
+            self._scan(sender_tokens, "sender", scores)
+            self._scan(body_tokens, "body", scores)
+            if not scores:
+                return None
+
+            words = set(subject_tokens) | set(body_tokens)
+            best = None
+            for app_id, hits in scores.items():
+                entry = self._entries[app_id]
+                confidence = max(hits.values()) + 0.05 * (len(hits) - 1)
+                if platform and entry.platform == platform:
+                    confidence += 0.05
+                if entry.role_tokens and entry.role_tokens <= words:
+                    confidence += 0.1
+                key = (min(confidence, 1.0), entry.updated_at or datetime.min)
+                if best is None or key > best[0]:
+                    best = (key, app_id)
+
+        confidence = best[0][0]
+        if confidence < float(os.getenv("MATCH_MIN_CONFIDENCE", "0.5")):
+            return None
+        return best[1], round(confidence, 3)
+
+
+def _table_signature(db, owner_id):
+    A = models.Application
+    return tuple(db.query(func.count(A.id), func.max(A.updated_at)).filter(A.owner_id == owner_id).one())
+
+
+_matchers = {}  # owner id -> CompanyMatcher
+_matchers_lock = threading.Lock()
+
+
+def get_matcher(db, owner_id):
+    """
+    Return the user's matcher, building it on first use.
+
+    Changes made in this process are applied incrementally via events; every
+    MATCHER_REFRESH_SECONDS the row count/last update are compared with the
+    database to pick up writes from other processes (e.g. the bot).
+    """
+    with _matchers_lock:
+        matcher = _matchers.setdefault(owner_id, CompanyMatcher(owner_id))
+    refresh_after = float(os.getenv("MATCHER_REFRESH_SECONDS", "300"))
+    if matcher.loaded_at is None:
+        matcher.load(db)
+    elif time.monotonic() - matcher.loaded_at > refresh_after:
+        if _table_signature(db, owner_id) != matcher.signature:
+            matcher.load(db)
+        else:
+            matcher.loaded_at = time.monotonic()
+    return matcher
+
+
+@events.on_commit
+def _apply_changes(changes):
+    for change in changes:
+        owner_id = change.values.get("owner_id")
+        previous = _matchers.get(change.old.get("owner_id", owner_id))
+        if previous is not None and previous.loaded_at is not None:
+            previous.remove(change.id)
+        matcher = _matchers.get(owner_id)
+        if change.kind == "deleted" or matcher is None or matcher.loaded_at is None:
+            continue
+        v = change.values
+        matcher.upsert(change.id, v["company_name"], v["role"], v["platform"], v["updated_at"])
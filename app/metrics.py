@@ -0,0 +1,306 @@
+"""
+In-process metrics, tracing spans and sampled profiling.
+
+Counters and histograms are kept in memory and served in the Prometheus text
+format at GET /metrics (one set per process; scrape every worker):
+
+- http_request_duration_seconds / http_requests_total per route template
+- db_query_duration_seconds / db_queries_total per statement type (engine events)
+- gmail_api_call_duration_seconds / gmail_api_calls_total per API method and outcome
+- email_parse_duration_seconds per parsed email
+- telegram_handler_duration_seconds / telegram_updates_total per command
+- sync_run_duration_seconds / sync_runs_total per outcome
+
+With TRACING=otel, span() also opens OpenTelemetry spans (needs
+opentelemetry-api plus an SDK/exporter configured by the deployment).
+
+The profiler runs cProfile over a sampled fraction of sync pipeline stages and
+bot handlers; PROFILE_SAMPLE_RATE sets the starting rate and
+POST /debug/profile?rate=0.1 changes it at runtime. GET /debug/profile returns
+the aggregated pstats report.
+"""
+
+import bisect
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# GET/POST /debug/profile; off by default since turning profiling on slows the whole process
+PROFILE_ENDPOINTS = os.getenv("PROFILE_ENDPOINTS_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Seconds; covers sub-millisecond queries up to slow Gmail pages
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in values]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self):
+        with self._lock:
+            values = sorted((k, list(v)) for k, v in self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in values:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', '+Inf')])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {round(series[-2], 6)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+# ------------------- METRICS ------------------- #
+http_requests = Counter("http_requests_total", "HTTP requests", ("method", "route", "status"))
+http_latency = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+db_queries = Counter("db_queries_total", "Database statements executed", ("statement",))
+db_latency = Histogram("db_query_duration_seconds", "Database statement latency", ("statement",))
+gmail_calls = Counter("gmail_api_calls_total", "Gmail API calls", ("method", "outcome"))
+gmail_latency = Histogram("gmail_api_call_duration_seconds", "Gmail API call latency", ("method",))
+email_parse_latency = Histogram("email_parse_duration_seconds", "Time to parse and classify one email")
+telegram_updates = Counter("telegram_updates_total", "Telegram commands handled", ("command", "outcome"))
+telegram_latency = Histogram("telegram_handler_duration_seconds", "Telegram handler latency", ("command",))
+sync_runs = Counter("sync_runs_total", "Gmail sync runs", ("outcome",))
+sync_latency = Histogram("sync_run_duration_seconds", "Gmail sync run duration", buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800))
+live_events = Counter("live_events_total", "Application changes pushed to live streams", ("op",))
+live_resets = Counter("live_resets_total", "Live streams told to reload instead of replaying", ("reason",))
+
+STATEMENT_TYPES = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA", "CREATE", "ALTER", "DROP"}
+
+
+def gmail_outcome(error):
+    """"ok", the HTTP status of an API error, or "error" for anything else"""
+    if error is None:
+        return "ok"
+    resp = getattr(error, "resp", None)
+    return str(getattr(resp, "status", "")) or "error"
+
+
+def observe_gmail_call(method, seconds, error=None):
+    gmail_latency.observe(seconds, method=method)
+    gmail_calls.inc(method=method, outcome=gmail_outcome(error))
+
+
+# ------------------- DATABASE ------------------- #
+def instrument_engine(engine):
+    """Count and time every statement the (sync) engine executes"""
+    if not ENABLED:
+        return
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        _observe_query(conn, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        if context.connection is not None and context.statement is not None:
+            _observe_query(context.connection, context.statement)
+
+
+def _observe_query(conn, statement):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    kind = kind if kind in STATEMENT_TYPES else "OTHER"
+    db_latency.observe(elapsed, statement=kind)
+    db_queries.inc(statement=kind)
+
+
+# ------------------- TRACING ------------------- #
+_tracer = None
+
+
+def _get_tracer():
+    global _tracer
+    if _tracer is None:
+        if os.getenv("TRACING", "").lower() != "otel":
+            _tracer = False
+        else:
+            try:
+                from opentelemetry import trace
+                _tracer = trace.get_tracer("job-tracker")
+            except ImportError:
+                print("⚠️ TRACING=otel but opentelemetry-api is not installed, tracing disabled")
+                _tracer = False
+    return _tracer
+
+
+def span(name, **attributes):
+    """OpenTelemetry span when tracing is on, a no-op context otherwise"""
+    tracer = _get_tracer()
+    if not tracer:
+        return nullcontext()
+    return tracer.start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None})
+
+
+# ------------------- PROFILING ------------------- #
+class SampledProfiler:
+    """Profile a random fraction of calls with cProfile and aggregate the stats per name"""
+
+    def __init__(self, rate=None):
+        self.rate = float(rate if rate is not None else os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        self.samples = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def set_rate(self, rate):
+        self.rate = max(0.0, min(1.0, float(rate)))
+
+    @contextmanager
+    def profile(self, name):
+        # One profiler per thread: concurrent handlers on the event loop share it, so only one samples
+        if not self.rate or getattr(self._local, "active", False) or random.random() >= self.rate:
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Something else (a debugger, another profiler) already profiles this thread
+            yield
+            return
+        self._local.active = True
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._local.active = False
+            with self._lock:
+                if name in self._stats:
+                    self._stats[name].add(profiler)
+                else:
+                    self._stats[name] = pstats.Stats(profiler)
+                self.samples[name] = self.samples.get(name, 0) + 1
+
+    def report(self, name=None, limit=30, sort="cumulative"):
+        with self._lock:
+            names = [name] if name else sorted(self._stats)
+            out = io.StringIO()
+            for n in names:
+                stats = self._stats.get(n)
+                if stats is None:
+                    continue
+                out.write(f"=== {n} ({self.samples[n]} samples) ===\n")
+                stats.stream = out
+                stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue() or "No profiles collected yet (set a sample rate with POST /debug/profile?rate=0.1)\n"
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.samples.clear()
+
+
+profiler = SampledProfiler()
+
+
+# ------------------- HANDLERS ------------------- #
+def timed_handler(command, handler):
+    """Wrap an async Telegram handler with latency/outcome metrics, a span and sampled profiling"""
+
+    @wraps(handler)
+    async def wrapper(update, context):
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            with span(f"telegram.{command}"), profiler.profile(f"telegram.{command}"):
+                return await handler(update, context)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            telegram_latency.observe(time.perf_counter() - start, command=command)
+            telegram_updates.inc(command=command, outcome=outcome)
+
+    return wrapper
+
+
+def route_template(request):
+    """The matched route's path template (bounded label values), or "unmatched" """
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
@@ -1,11 +1,27 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Date, DateTime, ForeignKey, Index, func
 from datetime import datetime
 from app.database import Base  # absolute import
 
+class User(Base):
+    """A tenant: owns applications and is reached through a Telegram chat, a Gmail account and an API token"""
+    __tablename__ = "users"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    telegram_chat_id = Column(BigInteger, unique=True)
+    gmail_account = Column(String, unique=True)
+    email = Column(String)
+    api_token = Column(String, unique=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # updated_at of the newest application included in the last daily digest
+    digest_watermark = Column(DateTime)
+
+
 class Application(Base):
     __tablename__ = "applications"
 
     id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"))
     company_name = Column(String, index=True)
     role = Column(String, default="Not specified")
     platform = Column(String, default="Not specified")
@@ -14,3 +30,117 @@ class Application(Base):
     job_link = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # When the current status was set: the email's date for Gmail updates, the write time otherwise
+    status_changed_at = Column(DateTime)
+    # First time the status left "Applied" (the status_changed_at of that change); feeds the response-time stats
+    responded_at = Column(DateTime)
+
+    # Keyset pagination walks (updated_at, id) newest first, optionally within one status/platform
+    __table_args__ = (
+        Index("ix_applications_updated_id", "updated_at", "id"),
+        Index("ix_applications_status_updated_id", "status", "updated_at", "id"),
+        Index("ix_applications_platform_updated_id", "platform", "updated_at", "id"),
+        Index("ix_applications_date_applied", "date_applied"),
+        Index("ix_applications_company_role", "company_name", "role"),
+        # Tenant-scoped variants: every per-user query starts with owner_id
+        Index("ix_applications_owner_updated_id", "owner_id", "updated_at", "id"),
+        Index("ix_applications_owner_status", "owner_id", "status", "updated_at", "id"),
+        Index("ix_applications_owner_platform", "owner_id", "platform", "updated_at", "id"),
+        Index("ix_applications_owner_company", "owner_id", "company_name", "role"),
+    )
+
+
+# Case-insensitive company prefix filters are range scans on lower(company_name)
+Index("ix_applications_company_lower", func.lower(Application.company_name))
+Index("ix_applications_owner_company_lower", Application.owner_id, func.lower(Application.company_name))
+
+
+class SyncState(Base):
+    __tablename__ = "sync_state"
+
+    account = Column(String, primary_key=True)
+    history_id = Column(String)
+    # When history_id was last saved, bounds the GMAIL_QUERY lookup of the next delta run
+    checkpoint_at = Column(DateTime)
+    last_full_sync_at = Column(DateTime)
+    # Set while a sync run holds the account, so processes never sync it twice at once
+    running_since = Column(DateTime)
+    # Classifier rules the account's mail was last processed with (see classifier.version)
+    rules_version = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class GmailCredential(Base):
+    """OAuth credentials of a Gmail account when GMAIL_TOKEN_STORE=db (authorized-user JSON)"""
+    __tablename__ = "gmail_credentials"
+
+    account = Column(String, primary_key=True)
+    token_json = Column(Text, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SchedulerLease(Base):
+    """Time-limited lock naming the process that runs scheduled jobs"""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+class ProcessedMessage(Base):
+    __tablename__ = "processed_messages"
+
+    account = Column(String, primary_key=True)
+    message_id = Column(String, primary_key=True)
+    processed_at = Column(DateTime, default=datetime.utcnow)
+    internal_date = Column(DateTime)
+    content_hash = Column(String)
+    status = Column(String)
+    application_id = Column(Integer)
+    rules_version = Column(String)
+
+    __table_args__ = (
+        Index("ix_processed_messages_content_hash", "account", "content_hash"),
+    )
+
+
+class ApplicationStat(Base):
+    """Counters behind GET /analytics, kept up to date on every write (see app/analytics.py)"""
+    __tablename__ = "application_stats"
+
+    owner_id = Column(Integer, primary_key=True)
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class StatusTransition(Base):
+    """How often applications moved from one status to another; from_status is "" for new applications"""
+    __tablename__ = "status_transitions"
+
+    owner_id = Column(Integer, primary_key=True)
+    from_status = Column(String, primary_key=True)
+    to_status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class StatusEvent(Base):
+    """Append-only log of status changes; source is api, bot, gmail or import"""
+    __tablename__ = "status_events"
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer)
+    application_id = Column(Integer, nullable=False)
+    old_status = Column(String)
+    new_status = Column(String)
+    source = Column(String)
+    message_id = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Per-application timelines walk (application_id, id); retention deletes by age
+    __table_args__ = (
+        Index("ix_status_events_application_id", "application_id", "id"),
+        Index("ix_status_events_owner_id", "owner_id", "id"),
+        Index("ix_status_events_created_at", "created_at"),
+    )
@@ -0,0 +1,295 @@
+"""
+Streaming email sync pipeline: fetch -> parse -> match -> write.
+
+Each stage runs in its own thread and hands items to the next one through a
+bounded queue, so only a few messages are held in memory at a time and a slow
+stage applies backpressure instead of letting work pile up. The pipeline can be
+fed from Gmail (MessageFetcher.fetch) or from a local dump:
+
+    python -m app.pipeline messages.json --dry-run
+"""
+
+import base64
+import json
+import mailbox
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from . import database, models, email_parser, gmail_sync, matcher, metrics, tenants
+
+_DONE = object()
+
+
+class StageStats:
+    """Throughput counters for one pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 4),
+            "wait_seconds": round(self.wait_seconds, 4),
+            "items_per_sec": round(self.items / self.busy_seconds, 1) if self.busy_seconds else None,
+        }
+
+
+class SyncPipeline:
+    def __init__(self, messages, account="me", owner_id=None, session_factory=None, queue_size=None, write_batch_size=None,
+                 dry_run=False, progress=None):
+        self.messages = messages
+        self.account = account
+        self.owner_id = owner_id  # whose applications the emails are matched against; default user if None
+        self.session_factory = session_factory or database.SessionLocal
+        self.queue_size = queue_size or int(os.getenv("SYNC_QUEUE_SIZE", "100"))
+        self.write_batch_size = write_batch_size or int(os.getenv("SYNC_WRITE_BATCH_SIZE", "200"))
+        self.dry_run = dry_run
+        self.progress = progress  # called with the number of messages written after every batch
+        self.stats = {name: StageStats(name) for name in ("fetch", "parse", "match", "write")}
+        self.updated_apps = []
+        self.error = None
+        self._abort = threading.Event()
+
+    # ---- queue helpers that give up once another stage has failed ---- #
+    def _put(self, q, item, stats):
+        start = time.perf_counter()
+        while not self._abort.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stats.wait_seconds += time.perf_counter() - start
+
+    def _iter(self, q, stats):
+        while not self._abort.is_set():
+            start = time.perf_counter()
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                stats.wait_seconds += time.perf_counter() - start
+                continue
+            stats.wait_seconds += time.perf_counter() - start
+            if item is _DONE:
+                return
+            yield item
+
+    def _run_stage(self, name, target, *args):
+        try:
+            with metrics.span(f"sync.{name}", account=self.account), metrics.profiler.profile(f"sync.{name}"):
+                target(*args)
+        except Exception as e:
+            self.error = e
+            self._abort.set()
+            print(f"❌ Sync pipeline stage '{name}' failed: {str(e)}")
+
+    # ---- stages ---- #
+    def _fetch(self, out):
+        stats = self.stats["fetch"]
+        messages = iter(self.messages)
+        while not self._abort.is_set():
+            start = time.perf_counter()
+            msg = next(messages, _DONE)
+            stats.busy_seconds += time.perf_counter() - start
+            if msg is _DONE:
+                break
+            stats.items += 1
+            self._put(out, msg, stats)
+        self._put(out, _DONE, stats)
+
+    def _parse(self, inbox, out):
+        stats = self.stats["parse"]
+        for msg in self._iter(inbox, stats):
+            start = time.perf_counter()
+            parsed = email_parser.parse_email(msg)
+            stats.busy_seconds += time.perf_counter() - start
+            stats.items += 1
+            self._put(out, (msg["id"], parsed), stats)
+        self._put(out, _DONE, stats)
+
+    def _match(self, inbox, out):
+        stats = self.stats["match"]
+        db = self.session_factory()
+        try:
+            owner_id = self.owner_id if self.owner_id is not None else tenants.default_user_id(db)
+            index = matcher.get_matcher(db, owner_id)
+        finally:
+            db.close()
+
+        for message_id, parsed in self._iter(inbox, stats):
+            start = time.perf_counter()
+            match = index.match(parsed["subject"], parsed.get("sender", ""), parsed["body"], parsed.get("platform"))
+            stats.busy_seconds += time.perf_counter() - start
+            stats.items += 1
+            self._put(out, (message_id, parsed, match[0] if match else None), stats)
+        self._put(out, _DONE, stats)
+
+    def _should_apply(self, db, message_id, parsed, db_app, seen_hashes):
+        """Apply only emails newer than the current status that weren't already applied under another id"""
+        if db_app.status == parsed["status"]:
+            return False
+        received = parsed.get("internal_date")
+        if received and db_app.status_changed_at and received < db_app.status_changed_at:
+            return False  # an older email arriving late must not roll the status back
+        content_hash = parsed.get("content_hash")
+        if content_hash:
+            if content_hash in seen_hashes:
+                return False
+            if gmail_sync.is_duplicate(db, self.account, message_id, content_hash, parsed.get("rules_version")):
+                return False
+        return True
+
+    def _write(self, inbox):
+        stats = self.stats["write"]
+        db = self.session_factory()
+        db.info["source"] = "gmail"
+        message_ids = db.info.setdefault("status_message_ids", {})
+        processed = []
+        seen_hashes = set()
+        try:
+            for message_id, parsed, app_id in self._iter(inbox, stats):
+                start = time.perf_counter()
+                db_app = db.get(models.Application, app_id) if app_id else None
+                if db_app and self._should_apply(db, message_id, parsed, db_app, seen_hashes):
+                    old_status = db_app.status
+                    db_app.status = parsed["status"]
+                    if parsed.get("internal_date"):
+                        db_app.status_changed_at = parsed["internal_date"]
+                    message_ids[app_id] = message_id
+                    self.updated_apps.append({
+                        "company": db_app.company_name,
+                        "old_status": old_status,
+                        "new_status": db_app.status,
+                        "email_subject": parsed["subject"]
+                    })
+                if parsed.get("content_hash"):
+                    seen_hashes.add(parsed["content_hash"])
+                processed.append({
+                    "account": self.account,
+                    "message_id": message_id,
+                    "processed_at": datetime.utcnow(),
+                    "internal_date": parsed.get("internal_date"),
+                    "content_hash": parsed.get("content_hash"),
+                    "status": parsed["status"],
+                    "application_id": app_id,
+                    "rules_version": parsed.get("rules_version"),
+                })
+
+                stats.items += 1
+                if len(processed) >= self.write_batch_size:
+                    self._flush(db, processed)
+                    processed = []
+                stats.busy_seconds += time.perf_counter() - start
+
+            if not self._abort.is_set():
+                start = time.perf_counter()
+                self._flush(db, processed)
+                stats.busy_seconds += time.perf_counter() - start
+        finally:
+            db.rollback()
+            db.close()
+
+    def _flush(self, db, processed):
+        if self.dry_run:
+            db.flush()
+        else:
+            gmail_sync.mark_processed(db, processed)
+            db.commit()
+        if self.progress:
+            self.progress(self.stats["write"].items)
+
+    def run(self):
+        """Run all stages to completion and return the list of status updates applied"""
+        parsed_q = queue.Queue(maxsize=self.queue_size)
+        matched_q = queue.Queue(maxsize=self.queue_size)
+        write_q = queue.Queue(maxsize=self.queue_size)
+        threads = [
+            threading.Thread(target=self._run_stage, args=("fetch", self._fetch, parsed_q), name="sync-fetch"),
+            threading.Thread(target=self._run_stage, args=("parse", self._parse, parsed_q, matched_q), name="sync-parse"),
+            threading.Thread(target=self._run_stage, args=("match", self._match, matched_q, write_q), name="sync-match"),
+            threading.Thread(target=self._run_stage, args=("write", self._write, write_q), name="sync-write"),
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return self.updated_apps
+
+    def stats_dict(self):
+        return {name: s.as_dict() for name, s in self.stats.items()}
+
+
+# ------------------- OFFLINE DUMPS ------------------- #
+
+def _gmail_payload(part):
+    """Convert an email.message.Message into the Gmail API payload shape"""
+    payload = {
+        "mimeType": part.get_content_type(),
+        "headers": [{"name": k, "value": str(v)} for k, v in part.items()],
+        "body": {},
+    }
+    if part.is_multipart():
+        payload["parts"] = [_gmail_payload(p) for p in part.get_payload()]
+    else:
+        data = part.get_payload(decode=True) or b""
+        payload["body"] = {"size": len(data), "data": base64.urlsafe_b64encode(data).decode("ascii")}
+    return payload
+
+
+def load_dump(path):
+    """
+    Yield Gmail API message resources from a local dump.
+
+    Supports a JSON array (.json), one message per line (.jsonl/.ndjson) and
+    mbox files, which are converted to the Gmail payload format on the fly.
+    """
+    if path.endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)
+    else:
+        for i, msg in enumerate(mailbox.mbox(path)):
+            resource = {"id": msg.get("Message-ID") or f"mbox-{i}", "payload": _gmail_payload(msg)}
+            try:
+                resource["internalDate"] = str(int(parsedate_to_datetime(msg["Date"]).timestamp() * 1000))
+            except (TypeError, ValueError):
+                pass
+            yield resource
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the email sync pipeline over a local message dump")
+    parser.add_argument("dump", help="JSON, NDJSON or mbox file of Gmail messages")
+    parser.add_argument("--dry-run", action="store_true", help="roll back instead of writing to the database")
+    parser.add_argument("--account", default="offline")
+    parser.add_argument("--user", type=int, help="id of the user whose applications are updated (default user if omitted)")
+    args = parser.parse_args(argv)
+
+    database.init_db()
+    pipeline = SyncPipeline(load_dump(args.dump), account=args.account, owner_id=args.user, dry_run=args.dry_run)
+    start = time.perf_counter()
+    updated = pipeline.run()
+    print(json.dumps({
+        "seconds": round(time.perf_counter() - start, 4),
+        "updated": len(updated),
+        "error": str(pipeline.error) if pipeline.error else None,
+        "stages": pipeline.stats_dict(),
+    }, indent=2))
+    return 1 if pipeline.error else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
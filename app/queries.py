@@ -0,0 +1,110 @@
+"""
+Statement builders for application list queries.
+
+They return SQLAlchemy select() statements so the same filtering and keyset
+pagination logic can be executed by sync and async sessions alike.
+"""
+
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import select, func, tuple_, or_
+from . import models, serialization
+
+DEFAULT_FIELDS = ("id", "company_name", "role", "platform", "date_applied", "status", "job_link")
+SELECTABLE_FIELDS = DEFAULT_FIELDS + ("created_at", "updated_at")
+MAX_PAGE_SIZE = 500
+
+
+class InvalidQuery(ValueError):
+    pass
+
+
+def encode_cursor(updated_at, app_id):
+    raw = json.dumps([updated_at.isoformat() if updated_at else None, app_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, app_id = json.loads(raw)
+        return datetime.fromisoformat(updated_at), int(app_id)
+    except (ValueError, TypeError):
+        raise InvalidQuery("Invalid cursor")
+
+
+def parse_fields(fields):
+    """Turn a comma separated field list into column names; id is always included"""
+    if not fields:
+        return list(DEFAULT_FIELDS)
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in SELECTABLE_FIELDS]
+    if unknown:
+        raise InvalidQuery(f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [f for f in dict.fromkeys(names) if f != "id"]
+
+
+def application_filters(owner_id, status=None, platform=None, applied_from=None, applied_to=None, company_prefix=None, q=None):
+    """Conditions for one user's applications; owner_id leads every (owner_id, ...) index"""
+    A = models.Application
+    conditions = [A.owner_id == owner_id]
+    if status:
+        conditions.append(A.status == status)
+    if platform:
+        conditions.append(A.platform == platform)
+    if applied_from:
+        conditions.append(A.date_applied >= applied_from)
+    if applied_to:
+        conditions.append(A.date_applied <= applied_to)
+    if company_prefix:
+        # Range on lower(company_name) so ix_applications_owner_company_lower can serve it
+        prefix = company_prefix.lower()
+        conditions.append(func.lower(A.company_name) >= prefix)
+        conditions.append(func.lower(A.company_name) < prefix + "\uffff")
+    if q:
+        # The dashboard's search box: a substring of the company or the role, scanned within the owner's rows
+        term = q.lower()
+        conditions.append(or_(
+            func.lower(A.company_name).contains(term, autoescape=True),
+            func.lower(A.role).contains(term, autoescape=True),
+        ))
+    return conditions
+
+
+def list_applications_stmt(fields, conditions, limit, cursor=None):
+    """
+    Keyset page ordered by (updated_at, id) newest first.
+
+    Fetches limit + 1 rows so the caller can tell whether another page exists.
+    """
+    A = models.Application
+    columns = [getattr(A, f) for f in fields]
+    # The cursor columns are needed even if the caller didn't ask for them
+    for extra in ("updated_at", "id"):
+        if extra not in fields:
+            columns.append(getattr(A, extra))
+
+    stmt = select(*columns).where(*conditions)
+    if cursor:
+        updated_at, app_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(A.updated_at, A.id) < tuple_(updated_at, app_id))
+    return stmt.order_by(A.updated_at.desc(), A.id.desc()).limit(limit + 1)
+
+
+def count_applications_stmt(conditions):
+    return select(func.count(models.Application.id)).where(*conditions)
+
+
+def build_page(rows, fields, limit):
+    """Turn result rows into (items, next_cursor)"""
+    rows = list(rows)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    # Tuples zipped against the requested fields; the trailing cursor columns fall off the end
+    items = serialization.items(rows, fields)
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor(last["updated_at"], last["id"])
+    return items, next_cursor
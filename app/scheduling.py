@@ -0,0 +1,175 @@
+"""
+Background schedule that runs in exactly one process.
+
+Every API worker/replica starts a LeaderScheduler, but only the holder of the
+"scheduler" lease (a row in scheduler_leases, renewed every few seconds) runs
+jobs; the others keep their scheduler paused and take over when the lease
+expires. Jobs live in the database (APScheduler's SQLAlchemyJobStore, table
+apscheduler_jobs), so a new leader continues the schedule where the old one
+stopped: runs missed while nobody held the lease are coalesced into one and
+still run if they are less than misfire_grace_time late.
+
+SCHEDULER_MODE selects "leader" (default), "local" (in-memory schedule per
+process, the old behaviour) or "off" (this process runs no background jobs).
+APScheduler is only imported when the scheduler starts.
+"""
+
+import os
+import socket
+import threading
+import uuid
+import zlib
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from . import database, models
+
+LEASE_NAME = "scheduler"
+
+
+def acquire_lease(db, holder, ttl, name=LEASE_NAME):
+    """Take or renew the lease; True while holder owns it"""
+    L = models.SchedulerLease
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl)
+    renewed = db.execute(
+        update(L)
+        .where(L.name == name)
+        .where((L.holder == holder) | (L.expires_at < now))
+        .values(holder=holder, expires_at=expires_at)
+    ).rowcount == 1
+    if not renewed:
+        try:
+            db.execute(insert(L).values(name=name, holder=holder, expires_at=expires_at))
+        except IntegrityError:
+            db.rollback()
+            return False  # someone else holds an unexpired lease
+    db.commit()
+    return True
+
+
+def release_lease(db, holder, name=LEASE_NAME):
+    L = models.SchedulerLease
+    db.execute(delete(L).where(L.name == name, L.holder == holder))
+    db.commit()
+
+
+def jitter(key, window):
+    """Stable offset in [0, window) seconds, so per-account work is spread out the same way every run"""
+    if window <= 0:
+        return 0
+    return zlib.crc32(str(key).encode()) % int(window)
+
+
+class LeaderScheduler:
+    def __init__(self, mode=None, lease_seconds=None, misfire_grace_time=None):
+        self.mode = (mode or os.getenv("SCHEDULER_MODE", "leader")).lower()
+        self.lease_seconds = lease_seconds or int(os.getenv("SCHEDULER_LEASE_SECONDS", "60"))
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.misfire_grace_time = misfire_grace_time or int(os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", "21600"))
+        self._scheduler = None
+        self._definitions = []
+        self._stop = threading.Event()
+        self._thread = None
+        self.is_leader = False
+
+    def _build(self):
+        from apscheduler.schedulers.background import BackgroundScheduler
+        job_defaults = {"coalesce": True, "max_instances": 1, "misfire_grace_time": self.misfire_grace_time}
+        jobstores = {}
+        if self.mode == "leader":
+            from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+            jobstores["default"] = SQLAlchemyJobStore(engine=database.engine, tablename="apscheduler_jobs")
+        return BackgroundScheduler(jobstores=jobstores, job_defaults=job_defaults, timezone=os.getenv("SCHEDULER_TIMEZONE") or None)
+
+    def add_job(self, func, trigger, id, **kwargs):
+        """Register a recurring job; it is written to the job store once this process leads"""
+        self._definitions.append((func, trigger, id, kwargs))
+
+    def schedule_once(self, func, id, delay=0, **kwargs):
+        """Run func once after delay seconds, replacing a pending run with the same id (after start())"""
+        self._scheduler.add_job(
+            func, "date", id=id, run_date=datetime.now(self._scheduler.timezone) + timedelta(seconds=delay),
+            replace_existing=True, **kwargs
+        )
+
+    def start(self):
+        if self.mode == "off":
+            print("⏸️ Scheduler disabled in this process (SCHEDULER_MODE=off)")
+            return
+        self._scheduler = self._build()
+        if self.mode == "local":
+            self._scheduler.start()
+            self._install_jobs()
+            self.is_leader = True
+            print("✅ Scheduler started (SCHEDULER_MODE=local, this process runs every job)")
+            return
+        self._scheduler.start(paused=True)
+        # First check right away so the log says whether this process leads or waits
+        self._check_lease()
+        if not self.is_leader:
+            print("⏸️ Scheduler on standby, another process holds the lease")
+        self._thread = threading.Thread(target=self._lease_loop, name="scheduler-lease", daemon=True)
+        self._thread.start()
+
+    def _install_jobs(self):
+        for func, trigger, id, kwargs in self._definitions:
+            existing = self._scheduler.get_job(id)
+            if existing is not None and existing.next_run_time is not None:
+                # Keep the stored next run so a restart doesn't skip or postpone it
+                kwargs = {**kwargs, "next_run_time": existing.next_run_time}
+            self._scheduler.add_job(func, trigger, id=id, replace_existing=True, **kwargs)
+
+    def _check_lease(self):
+        db = database.SessionLocal()
+        try:
+            leading = acquire_lease(db, self.holder, self.lease_seconds)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Scheduler lease check failed: {str(e)}")
+            leading = False
+        finally:
+            db.close()
+
+        if leading and not self.is_leader:
+            self._install_jobs()
+            self._scheduler.resume()
+            self.is_leader = True
+            print(f"👑 This process now runs scheduled jobs ({self.holder})")
+        elif not leading and self.is_leader:
+            self._scheduler.pause()
+            self.is_leader = False
+            print("⏸️ Lost the scheduler lease, pausing scheduled jobs")
+
+    def _lease_loop(self):
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            self._check_lease()
+
+    def shutdown(self):
+        if self.mode == "off":
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._scheduler is not None and self._scheduler.running:
+            self._scheduler.shutdown(wait=False)
+        if self.mode == "leader" and self.is_leader:
+            db = database.SessionLocal()
+            try:
+                release_lease(db, self.holder)  # let another process take over right away
+            finally:
+                db.close()
+        self.is_leader = False
+        print("✅ Scheduler stopped")
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    """The process-wide LeaderScheduler; jobs are registered and it is started by the API (app/main.py)"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LeaderScheduler()
+    return _scheduler
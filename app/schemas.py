@@ -1,6 +1,6 @@
 from pydantic import BaseModel
-from datetime import date
-from typing import Optional
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
 
 class ApplicationBase(BaseModel):
     company_name: str
@@ -21,3 +21,43 @@ class ApplicationOut(ApplicationBase):
 
     class Config:
         from_attributes = True
+
+class ApplicationPage(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+class BulkRowError(BaseModel):
+    line: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    updated: int
+    failed: int
+    errors: List[BulkRowError]
+
+class StatusEventOut(BaseModel):
+    id: int
+    application_id: int
+    company_name: Optional[str] = None
+    old_status: Optional[str] = None
+    new_status: Optional[str] = None
+    source: Optional[str] = None
+    message_id: Optional[str] = None
+    created_at: datetime
+
+class StatusEventPage(BaseModel):
+    items: List[StatusEventOut]
+    next_cursor: Optional[int] = None
+
+class UserOut(BaseModel):
+    id: int
+    name: Optional[str] = None
+    telegram_chat_id: Optional[int] = None
+    gmail_account: Optional[str] = None
+    email: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
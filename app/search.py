@@ -0,0 +1,166 @@
+"""
+Ranked company/role/platform search shared by the API and the Telegram bots.
+
+SQLite uses an FTS5 table kept in sync with `applications` by triggers, with
+prefix queries ranked by bm25 and a typo-tolerant retry that swaps unknown
+words for their closest indexed terms. Postgres uses a pg_trgm GIN index over
+the same columns and ranks by word similarity, which handles prefixes and
+typos natively. Other databases fall back to ILIKE. Results are limited to one
+user's applications by joining back to `applications` on owner_id.
+"""
+
+import difflib
+import re
+from sqlalchemy import select, text
+from . import models
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+SQLITE_SETUP = [
+    """CREATE VIRTUAL TABLE applications_fts USING fts5(
+        company_name, role, platform,
+        content='applications', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS applications_fts_vocab USING fts5vocab(applications_fts, 'row')",
+    """CREATE TRIGGER IF NOT EXISTS applications_fts_ai AFTER INSERT ON applications BEGIN
+        INSERT INTO applications_fts(rowid, company_name, role, platform)
+        VALUES (new.id, new.company_name, new.role, new.platform);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS applications_fts_ad AFTER DELETE ON applications BEGIN
+        INSERT INTO applications_fts(applications_fts, rowid, company_name, role, platform)
+        VALUES ('delete', old.id, old.company_name, old.role, old.platform);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS applications_fts_au AFTER UPDATE OF company_name, role, platform ON applications BEGIN
+        INSERT INTO applications_fts(applications_fts, rowid, company_name, role, platform)
+        VALUES ('delete', old.id, old.company_name, old.role, old.platform);
+        INSERT INTO applications_fts(rowid, company_name, role, platform)
+        VALUES (new.id, new.company_name, new.role, new.platform);
+    END""",
+]
+
+POSTGRES_DOCUMENT = "lower(coalesce(company_name, '') || ' ' || coalesce(role, '') || ' ' || coalesce(platform, ''))"
+POSTGRES_SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_applications_search_trgm ON applications USING gin (({POSTGRES_DOCUMENT}) gin_trgm_ops)",
+]
+
+# Upper bound on vocabulary terms compared against a misspelled word
+FUZZY_CANDIDATES = 2000
+
+# bm25 column weights: company name matters most, platform least
+SQLITE_RANK = "bm25(applications_fts, 10.0, 5.0, 1.0)"
+
+
+def install(conn):
+    """Create the search index for the connection's database (idempotent)"""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'applications_fts'")).first()
+        if exists:
+            return
+        try:
+            for statement in SQLITE_SETUP:
+                conn.execute(text(statement))
+        except Exception as e:
+            print(f"⚠️ SQLite FTS5 unavailable, search falls back to LIKE: {str(e)}")
+            return
+        conn.execute(text("INSERT INTO applications_fts(applications_fts) VALUES ('rebuild')"))
+    elif dialect == "postgresql":
+        for statement in POSTGRES_SETUP:
+            conn.execute(text(statement))
+
+
+def _words(query):
+    return [w.lower() for w in _WORD.findall(query or "")]
+
+
+def _fts_expression(words, prefix=True):
+    return " ".join(f'"{w}"*' if prefix else f'"{w}"' for w in words)
+
+
+def _sqlite_ids(db, expression, owner_id, limit):
+    rows = db.execute(text(
+        f"SELECT applications_fts.rowid FROM applications_fts JOIN applications ON applications.id = applications_fts.rowid "
+        f"WHERE applications_fts MATCH :q AND applications.owner_id = :owner ORDER BY {SQLITE_RANK} LIMIT :limit"
+    ), {"q": expression, "owner": owner_id, "limit": limit})
+    return [row[0] for row in rows]
+
+
+def _closest_terms(db, word):
+    """Indexed terms within a small edit distance of word, looked up in the FTS vocabulary"""
+    # Typos rarely hit the first letters; a prefix range and length window keep the candidate set small
+    prefix = word[:2] if len(word) >= 4 else word[:1]
+    candidates = [row[0] for row in db.execute(text(
+        "SELECT term FROM applications_fts_vocab WHERE term >= :lo AND term < :hi "
+        "AND length(term) BETWEEN :min_len AND :max_len LIMIT :cap"
+    ), {"lo": prefix, "hi": prefix + "\uffff", "min_len": len(word) - 2, "max_len": len(word) + 2, "cap": FUZZY_CANDIDATES})]
+    return difflib.get_close_matches(word, candidates, n=3, cutoff=0.75)
+
+
+def _search_sqlite(db, words, owner_id, limit):
+    ids = _sqlite_ids(db, _fts_expression(words), owner_id, limit)
+    if ids:
+        return ids
+
+    # No exact/prefix hit: retry with each word replaced by its closest known terms
+    groups = []
+    for word in words:
+        terms = _closest_terms(db, word) or [word]
+        groups.append("(" + " OR ".join(f'"{t}"' for t in terms) + ")")
+    return _sqlite_ids(db, " AND ".join(groups), owner_id, limit)
+
+
+def _search_postgres(db, words, owner_id, limit):
+    query = " ".join(words)
+    rows = db.execute(text(
+        f"SELECT id FROM applications "
+        f"WHERE owner_id = :owner AND (:q <% {POSTGRES_DOCUMENT} OR {POSTGRES_DOCUMENT} LIKE :prefix) "
+        f"ORDER BY word_similarity(:q, {POSTGRES_DOCUMENT}) DESC, id DESC LIMIT :limit"
+    ), {"q": query, "owner": owner_id, "prefix": query + "%", "limit": limit})
+    return [row[0] for row in rows]
+
+
+_fts_available = None
+
+
+def _has_fts(db):
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'applications_fts'")).first() is not None
+    return _fts_available
+
+
+def _load(db, conditions, fields=None, limit=None):
+    """Applications matching conditions, as ORM objects or, with fields, as dicts of just those columns"""
+    A = models.Application
+    if fields:
+        stmt = select(*[getattr(A, f) for f in fields]).where(*conditions).limit(limit)
+        return [dict(zip(fields, row)) for row in db.execute(stmt)]
+    return db.query(A).filter(*conditions).limit(limit).all()
+
+
+def search_applications(db, owner_id, query, limit=20, fields=None):
+    """
+    Return the user's applications matching query, best match first.
+
+    With fields (which must include id), only those columns are selected and
+    each match is a dict rather than an Application, ready to be encoded.
+    """
+    words = _words(query)
+    if not words:
+        return []
+
+    A = models.Application
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite" and _has_fts(db):
+        ids = _search_sqlite(db, words, owner_id, limit)
+    elif dialect == "postgresql":
+        ids = _search_postgres(db, words, owner_id, limit)
+    else:
+        return _load(db, [A.owner_id == owner_id, A.company_name.ilike(f"%{query}%")], fields, limit)
+
+    if not ids:
+        return []
+    apps = {(a["id"] if fields else a.id): a for a in _load(db, [A.id.in_(ids)], fields)}
+    return [apps[i] for i in ids if i in apps]
@@ -0,0 +1,68 @@
+"""
+JSON encoding for API responses.
+
+Rows are selected as tuples and encoded straight to bytes, without building a
+Pydantic model per row. orjson does the encoding when it is installed (dates,
+datetimes and dicts of plain values are handled in C); otherwise the standard
+library json module is used with a small default hook. JSON_ENCODER=json
+forces the fallback, e.g. to compare the two.
+"""
+
+import json
+import os
+from datetime import date, datetime
+
+ENCODER = os.getenv("JSON_ENCODER", "orjson").lower()
+
+_orjson = None
+
+
+def _load_orjson():
+    global _orjson
+    if _orjson is None:
+        try:
+            import orjson
+        except ImportError:
+            orjson = False
+        _orjson = orjson
+    return _orjson
+
+
+def _default(value):
+    """Types neither encoder knows: Pydantic models, Decimals, sets..."""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    from fastapi.encoders import jsonable_encoder  # rare, and the bot would otherwise load fastapi for it
+    return jsonable_encoder(value)
+
+
+def dumps(payload):
+    """Encode payload as compact JSON bytes"""
+    orjson = _load_orjson() if ENCODER == "orjson" else None
+    if orjson:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode()
+
+
+def items(rows, fields):
+    """Row tuples as dicts of fields; extra trailing columns (e.g. cursor keys) are dropped"""
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def json_array(partitions, fields):
+    """Yield a JSON array of the rows as bytes, one chunk per partition of row tuples"""
+    yield b"["
+    first = True
+    for partition in partitions:
+        chunk = dumps(items(partition, fields))[1:-1]  # the partition's elements without their brackets
+        if not chunk:
+            continue
+        yield chunk if first else b"," + chunk
+        first = False
+    yield b"]"
+
+
+def ndjson(partitions, fields):
+    """Yield the rows as newline delimited JSON, one chunk per partition"""
+    for partition in partitions:
+        yield b"".join(dumps(item) + b"\n" for item in items(partition, fields))
@@ -0,0 +1,112 @@
+"""
+Gmail sync runs: one user's mailbox through the fetch/parse/match/write pipeline.
+
+Shared by the API (POST /sync-emails, the scheduler) and the Telegram bot,
+without pulling in the web app. The Google client libraries are only loaded
+when a sync actually talks to Gmail.
+"""
+
+import os
+import time
+from . import database, models, tenants, jobs, metrics, scheduling
+from . import gmail_service, gmail_sync, gmail_fetch, pipeline
+
+
+def run_sync(job=None, user_id=None):
+    """Sync one user's Gmail messages received since the last checkpoint and update their applications; raises on failure"""
+    progress = job.progress if job is not None else {}
+    db = database.SessionLocal()
+    user_id = user_id or tenants.default_user_id(db)
+    account = tenants.sync_account(db, user_id)
+    claimed = False
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        if not gmail_sync.claim_run(db, account):
+            print("⏭️ Gmail sync already running in another process, skipping")
+            progress["phase"] = "skipped"
+            outcome = "skipped"
+            return []
+        claimed = True
+
+        progress["phase"] = "listing"
+        service = gmail_service.get_gmail_service(account)
+        message_ids, history_id = gmail_sync.list_new_message_ids(service, db, account)
+        # Release the write lock before the pipeline's writer opens its own session
+        db.commit()
+
+        progress.update(phase="processing", total=len(message_ids), processed=0)
+        fetcher = gmail_fetch.MessageFetcher(service)
+        sync = pipeline.SyncPipeline(
+            fetcher.fetch(message_ids), account=account, owner_id=user_id, progress=lambda n: progress.update(processed=n)
+        )
+        updated_apps = sync.run()
+        if sync.error:
+            raise sync.error
+
+        # Processed ids are committed batch by batch; only move the cursor once everything landed.
+        # If some messages could not be fetched keep the old cursor so they are retried next run
+        if fetcher.failed:
+            print(f"⚠️ {len(fetcher.failed)} emails could not be fetched, keeping sync checkpoint")
+        else:
+            gmail_sync.save_checkpoint(db, history_id, account)
+        db.commit()
+        progress.update(phase="done", updated=len(updated_apps), failed=len(fetcher.failed))
+        print(f"✅ Gmail Sync Completed for {account} ({len(message_ids)} new emails):", updated_apps)
+        print("📈 Sync pipeline stats:", sync.stats_dict())
+        outcome = "ok"
+        return updated_apps
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if claimed:
+            gmail_sync.release_run(db, account)
+        db.close()
+        metrics.sync_runs.inc(outcome=outcome)
+        if outcome != "skipped":
+            metrics.sync_latency.observe(time.perf_counter() - start)
+
+
+def sync_emails_job():
+    """Run a sync inline and return the status updates; errors are logged, not raised"""
+    try:
+        return run_sync()
+    except Exception as e:
+        print(f"❌ Gmail Sync Error: {str(e)}")
+        return []
+
+
+def start_sync(trigger="api", user_id=None):
+    """Run a user's sync in the background, or join the one already in flight for their account; ValueError without a Gmail account"""
+    db = database.SessionLocal()
+    try:
+        user_id = user_id or tenants.default_user_id(db)
+        account = tenants.sync_account(db, user_id)
+    finally:
+        db.close()
+    if account is None:
+        raise ValueError("No Gmail account is linked to this user")
+    return jobs.registry.submit(f"gmail_sync:{account}", lambda job: run_sync(job, user_id), trigger=trigger, owner_id=user_id)
+
+
+def sync_all_accounts():
+    """
+    Scheduled fan-out: one sync per user with a Gmail account, each at a stable
+    offset within SYNC_JITTER_SECONDS so accounts don't all hit Gmail at once.
+    The job pool runs SYNC_WORKERS of them at a time.
+    """
+    window = int(os.getenv("SYNC_JITTER_SECONDS", "1800"))
+    db = database.SessionLocal()
+    try:
+        U = models.User
+        # The default user syncs token.json ("me") like the single-user setup did
+        users = db.query(U.id, U.gmail_account).filter((U.gmail_account.isnot(None)) | (U.id == tenants.default_user_id(db))).all()
+    finally:
+        db.close()
+    for user_id, account in users:
+        scheduling.get_scheduler().schedule_once(
+            start_sync, f"gmail_sync:{user_id}", delay=scheduling.jitter(account or user_id, window),
+            kwargs={"trigger": "scheduler", "user_id": user_id},
+        )
+    print(f"🔄 Scheduled Gmail sync for {len(users)} accounts over the next {window}s")
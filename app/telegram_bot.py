@@ -1,41 +1,299 @@
-from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-from sqlalchemy.orm import Session
-from . import database, models
+"""
+Telegram bot handlers, shared by polling (python bot.py) and webhook mode
+(see telegram_webhook.py).
+
+Updates are handled concurrently (BOT_CONCURRENT_UPDATES) but in order within
+each chat, and all database work runs in worker threads so a slow query never
+stalls the event loop. Each chat acts as its own user (see
+tenants.user_for_chat) and only sees that user's applications.
+"""
+
+import asyncio
 import logging
-logging.basicConfig(level=logging.INFO)
+import os
 from dotenv import load_dotenv
+from telegram import Update
+from telegram.ext import Application, BaseUpdateProcessor, CommandHandler, ContextTypes
+from . import cache, database, metrics, models, search, tenants
+from . import live  # its commit hook pushes changes made from the bot to open dashboards
+from .sync import start_sync
+
+logging.basicConfig(level=logging.INFO)
 load_dotenv()
-import os
 
-BOT_TOKEN = os.getenv("BOT_TOKEN")
+BOT_TOKEN = os.getenv("TELEGRAM_TOKEN") or os.getenv("BOT_TOKEN")
+
 
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Run up to max_concurrent_updates handlers at once, one at a time per chat.
+
+    Updates from the same chat wait on that chat's lock, so replies come back in
+    the order the commands were sent while other chats proceed in parallel.
+    """
+
+    def __init__(self, max_concurrent_updates):
+        super().__init__(max_concurrent_updates)
+        self._chat_locks = {}  # chat id -> [lock, number of updates using it]
+
+    async def do_process_update(self, update, coroutine):
+        chat = getattr(update, "effective_chat", None)
+        if chat is None:
+            await coroutine
+            return
+
+        entry = self._chat_locks.setdefault(chat.id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chat_locks[chat.id]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+
+# ------------------- DB Work (runs in worker threads) ------------------- #
+def get_db():
+    db = database.SessionLocal()
+    db.info["source"] = "bot"  # recorded in status_events
+    return db
 
 
+def _user_id(update):
+    chat = update.effective_chat
+    return tenants.user_for_chat(chat.id, chat.full_name or chat.title)
+
+
+def _find_application(db, owner_id, company):
+    A = models.Application
+    return db.query(A).filter(A.owner_id == owner_id, A.company_name.ilike(f"%{company}%")).first()
+
+
+def _status_reply(owner_id, company):
+    def render():
+        db = get_db()
+        try:
+            apps = search.search_applications(db, owner_id, company)
+        finally:
+            db.close()
+        return "\n".join([f"🏢 {a.company_name} → 📌 {a.status}" for a in apps]).encode()
+
+    key = cache.make_key("bot:status", owner=owner_id, company=company.lower())
+    return cache.get_cache().cached(key, [cache.user_tag(owner_id)], render).decode()
+
+
+def _list_reply(owner_id):
+    def render():
+        db = get_db()
+        try:
+            apps = db.query(models.Application).filter(models.Application.owner_id == owner_id).all()
+        finally:
+            db.close()
+        return "\n".join([f"🏢 {a.company_name} → 📌 {a.status}" for a in apps]).encode()
+
+    return cache.get_cache().cached(cache.make_key("bot:list", owner=owner_id), [cache.user_tag(owner_id)], render).decode()
+
+
+def _add_application(owner_id, company, status):
+    db = get_db()
+    try:
+        db.add(models.Application(owner_id=owner_id, company_name=company, status=status))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _update_application(owner_id, company, new_status):
+    """Return (company_name, status) of the updated application, or None"""
+    db = get_db()
+    try:
+        app = _find_application(db, owner_id, company)
+        if not app:
+            return None
+        app.status = new_status
+        db.commit()
+        return app.company_name, app.status
+    finally:
+        db.close()
+
+
+def _delete_application(owner_id, company):
+    db = get_db()
+    try:
+        app = _find_application(db, owner_id, company)
+        if not app:
+            return False
+        db.delete(app)
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+# ------------------- Handlers ------------------- #
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text("👋 Hello! I am your Job Tracker Bot. Ask me about your applications!")
+    await update.message.reply_text(
+        "👋 Hi! I'm your Job Tracker Bot.\n\n"
+        "Commands:\n"
+        "• /status <company> → Check status of a company\n"
+        "• /list → Show all applications\n"
+        "• /sync → Sync latest job updates from Gmail\n"
+        "• /add <company> <status> → Add new application\n"
+        "• /update <company> <status> → Update application status\n"
+        "• /delete <company> → Delete an application\n"
+        "• /token → Your API token for the web dashboard"
+    )
+
 
 async def get_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = " ".join(context.args)
-    if not query:
-        await update.message.reply_text("Please provide a company name, e.g. `/status Microsoft`")
+    if not context.args:
+        await update.message.reply_text("Please provide a company name. Example: /status Google")
         return
 
-    db = database.SessionLocal()
-    apps = db.query(models.Application).filter(models.Application.company_name.ilike(f"%{query}%")).all()
-    db.close()
+    company = " ".join(context.args)
+    user_id = await asyncio.to_thread(_user_id, update)
+    reply = await asyncio.to_thread(_status_reply, user_id, company)
+    if not reply:
+        await update.message.reply_text(f"No applications found for {company}.")
+        return
+
+    await update.message.reply_text(reply)
+
+
+async def list_applications(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = await asyncio.to_thread(_user_id, update)
+    reply = await asyncio.to_thread(_list_reply, user_id)
+    if not reply:
+        await update.message.reply_text("📂 No applications found in the tracker.")
+        return
 
-    if not apps:
-        await update.message.reply_text(f"No applications found for {query}.")
+    await update.message.reply_text("📋 All Applications:\n" + reply)
+
+
+async def sync(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = await asyncio.to_thread(_user_id, update)
+    try:
+        job = await asyncio.to_thread(start_sync, "bot", user_id)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {str(e)}")
+        return
+    if len(job.triggers) > 1:
+        await update.message.reply_text("🔄 A Gmail sync is already running, I'll send the results when it finishes.")
     else:
-        reply = "\n".join([f"{a.company_name} - {a.role} [{a.status}]" for a in apps])
-        await update.message.reply_text(reply)
+        await update.message.reply_text("🔄 Syncing Gmail for updates... I'll message you when it's done.")
+    # The sync runs on a worker thread; wait for it without blocking other commands
+    context.application.create_task(report_sync(update, job))
 
-def run_bot():
-    app = Application.builder().token(BOT_TOKEN).build()
 
-    app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("status", get_status))
+async def report_sync(update: Update, job):
+    await asyncio.wrap_future(job.future)
+    if job.state == "failed":
+        await update.message.reply_text(f"❌ Sync failed: {job.error}")
+    elif job.result:
+        reply = "\n".join([f"🏢 {u['company']} → 📌 {u['new_status']}" for u in job.result])
+        await update.message.reply_text("✅ Sync completed:\n" + reply)
+    else:
+        await update.message.reply_text("⚠️ No new updates found.")
+
+
+async def add_application(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if len(context.args) < 2:
+        await update.message.reply_text("❌ Usage: /add <company_name> <status>\nExample: /add Google Applied")
+        return
+
+    company = context.args[0]
+    status = " ".join(context.args[1:])
+    user_id = await asyncio.to_thread(_user_id, update)
+    await asyncio.to_thread(_add_application, user_id, company, status)
+    await update.message.reply_text(f"✅ Added new application:\n🏢 {company} → 📌 {status}")
+
+
+async def update_application(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if len(context.args) < 2:
+        await update.message.reply_text("❌ Usage: /update <company_name> <new_status>\nExample: /update Google Interview Scheduled")
+        return
+
+    company = context.args[0]
+    new_status = " ".join(context.args[1:])
+    user_id = await asyncio.to_thread(_user_id, update)
+    updated = await asyncio.to_thread(_update_application, user_id, company, new_status)
+    if not updated:
+        await update.message.reply_text(f"❌ No application found for {company}.")
+        return
 
+    await update.message.reply_text(f"✅ Updated:\n🏢 {updated[0]} → 📌 {updated[1]}")
+
+
+async def delete_application(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not context.args:
+        await update.message.reply_text("❌ Usage: /delete <company_name>\nExample: /delete Google")
+        return
+
+    company = " ".join(context.args)
+    user_id = await asyncio.to_thread(_user_id, update)
+    if not await asyncio.to_thread(_delete_application, user_id, company):
+        await update.message.reply_text(f"❌ No application found for {company}.")
+        return
+
+    await update.message.reply_text(f"🗑️ Deleted application for {company}.")
+
+
+async def show_token(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_chat.type != "private":
+        await update.message.reply_text("🔒 Ask me for your token in a private chat.")
+        return
+
+    def load():
+        db = get_db()
+        try:
+            return tenants.get_user(db, _user_id(update)).api_token
+        finally:
+            db.close()
+
+    api_token = await asyncio.to_thread(load)
+    await update.message.reply_text(f"🔑 Your API token (paste it into the dashboard):\n{api_token}")
+
+
+def build_application(token=None, webhook=False, builder=None, concurrency=None):
+    """
+    Configure the bot application with all handlers.
+
+    webhook=True leaves out the polling updater; updates are pushed to
+    application.update_queue instead. A pre-configured builder can be passed to
+    swap the HTTP layer (see benchmarks/bench_bot.py).
+    """
+    builder = builder or Application.builder().token(token or BOT_TOKEN)
+    concurrency = concurrency or int(os.getenv("BOT_CONCURRENT_UPDATES", "32"))
+    if concurrency > 1:
+        builder = builder.concurrent_updates(ChatOrderedUpdateProcessor(concurrency))
+    if webhook:
+        builder = builder.updater(None)
+    app = builder.build()
+
+    commands = {
+        "start": start,
+        "status": get_status,
+        "list": list_applications,
+        "sync": sync,
+        "add": add_application,
+        "update": update_application,
+        "delete": delete_application,
+        "token": show_token,
+    }
+    for command, handler in commands.items():
+        app.add_handler(CommandHandler(command, metrics.timed_handler(command, handler)))
+    return app
+
+
+def run_bot():
+    database.init_db()
+    app = build_application()
     print("🤖 Telegram bot running...")
     app.run_polling()
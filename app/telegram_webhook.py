@@ -0,0 +1,68 @@
+"""
+Telegram webhook mode: the bot runs inside the API process.
+
+With TELEGRAM_WEBHOOK_URL set, the FastAPI app registers a webhook on startup
+and feeds updates posted to /telegram/webhook into the bot, so one process
+serves both. python-telegram-bot and the handlers are only imported when the
+webhook is enabled, so API processes without it never load them.
+"""
+
+import os
+from fastapi import APIRouter, HTTPException, Request
+
+WEBHOOK_PATH = "/telegram/webhook"
+
+router = APIRouter()
+_webhook_app = None
+
+
+def _bot_token():
+    return os.getenv("TELEGRAM_TOKEN") or os.getenv("BOT_TOKEN")
+
+
+async def start():
+    """Start the bot inside the API process if TELEGRAM_WEBHOOK_URL is configured"""
+    global _webhook_app
+    base_url = os.getenv("TELEGRAM_WEBHOOK_URL")
+    if not base_url or not _bot_token():
+        return None
+
+    from telegram import Update
+    from . import telegram_bot
+
+    app = telegram_bot.build_application(webhook=True)
+    await app.initialize()
+    await app.start()
+    await app.bot.set_webhook(
+        url=base_url.rstrip("/") + WEBHOOK_PATH,
+        secret_token=os.getenv("TELEGRAM_WEBHOOK_SECRET") or None,
+        allowed_updates=Update.ALL_TYPES,
+    )
+    _webhook_app = app
+    print("🤖 Telegram webhook registered")
+    return app
+
+
+async def stop():
+    global _webhook_app
+    if _webhook_app is None:
+        return
+    app, _webhook_app = _webhook_app, None
+    await app.stop()
+    await app.shutdown()
+
+
+@router.post(WEBHOOK_PATH)
+async def telegram_webhook(request: Request):
+    if _webhook_app is None:
+        raise HTTPException(status_code=404, detail="Telegram webhook is not enabled")
+    secret = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+    if secret and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret:
+        raise HTTPException(status_code=403, detail="Invalid webhook secret")
+
+    from telegram import Update  # already loaded by start()
+
+    # Acknowledge right away; the bot processes the update from its queue
+    update = Update.de_json(await request.json(), _webhook_app.bot)
+    await _webhook_app.update_queue.put(update)
+    return {"ok": True}
@@ -0,0 +1,186 @@
+"""
+Users (tenants) and request/chat -> user resolution.
+
+Every application, status event and analytics counter belongs to a user, and
+every query filters on owner_id first so the (owner_id, ...) indexes keep a
+user's requests from scanning anybody else's rows. A user is reached through:
+
+- the API: `Authorization: Bearer <api_token>` or `X-API-Token` (resolved by
+  app.deps); requests without a token act as the default user unless
+  REQUIRE_API_TOKEN is set
+- Telegram: the chat id; the first chat (or TELEGRAM_CHAT_ID) is linked to the
+  default user, other chats get a user of their own on first contact
+- Gmail: gmail_account names the token file synced for the user
+
+The default user owns everything that existed before users were introduced.
+
+    python -m app.tenants add --name Asha --chat-id 12345 --gmail asha@gmail.com
+    python -m app.tenants list
+"""
+
+import os
+import secrets
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import event, select, insert, update, text
+from sqlalchemy.orm import Session
+from . import database, models
+
+# Seconds an API token -> user id lookup is remembered
+TOKEN_CACHE_SECONDS = 60
+
+_default_user_id = None
+_token_cache = {}  # api token -> (expires at, user id)
+_chat_cache = {}  # telegram chat id -> user id
+_lock = threading.Lock()
+
+
+def new_token():
+    return secrets.token_urlsafe(24)
+
+
+def install(conn):
+    """Create the default user and hand it every row that has no owner yet (idempotent)"""
+    global _default_user_id
+    U = models.User.__table__
+    user_id = conn.execute(select(U.c.id).order_by(U.c.id).limit(1)).scalar()
+    if user_id is None:
+        chat_id = os.getenv("TELEGRAM_CHAT_ID")
+        user_id = conn.execute(insert(U).values(
+            name="default",
+            telegram_chat_id=int(chat_id) if chat_id else None,
+            email=os.getenv("TO_EMAIL"),
+            api_token=new_token(),
+            created_at=datetime.utcnow(),
+        )).inserted_primary_key[0]
+        print("👤 Created the default user (python -m app.tenants list shows its API token)")
+
+    owned = conn.execute(text("UPDATE applications SET owner_id = :owner WHERE owner_id IS NULL"), {"owner": user_id}).rowcount
+    conn.execute(text(
+        "UPDATE status_events SET owner_id = COALESCE("
+        "(SELECT owner_id FROM applications WHERE applications.id = status_events.application_id), :owner) "
+        "WHERE owner_id IS NULL"
+    ), {"owner": user_id})
+    if owned:
+        print(f"👤 Assigned {owned} existing applications to the default user")
+    _default_user_id = user_id
+
+
+def default_user_id(db=None):
+    global _default_user_id
+    if _default_user_id is None:
+        session = db or database.SessionLocal()
+        try:
+            _default_user_id = session.execute(select(models.User.id).order_by(models.User.id).limit(1)).scalar()
+        finally:
+            if db is None:
+                session.close()
+    return _default_user_id
+
+
+@event.listens_for(Session, "before_flush")
+def _assign_owner(session, flush_context, instances):
+    # Writers that don't know about users (scripts, older callers) keep working as the default user
+    for obj in session.new:
+        if isinstance(obj, models.Application) and obj.owner_id is None:
+            obj.owner_id = default_user_id(session)
+
+
+# ------------------- API ------------------- #
+def user_for_token(token):
+    """The id of the user an API token belongs to, or None"""
+    now = time.monotonic()
+    cached = _token_cache.get(token)
+    if cached and cached[0] > now:
+        return cached[1]
+    db = database.SessionLocal()
+    try:
+        user_id = db.execute(select(models.User.id).where(models.User.api_token == token)).scalar()
+    finally:
+        db.close()
+    if user_id is not None:
+        _token_cache[token] = (now + TOKEN_CACHE_SECONDS, user_id)
+    return user_id
+
+
+# ------------------- TELEGRAM ------------------- #
+def user_for_chat(chat_id, name=None):
+    """Return the user id for a Telegram chat, linking or registering it on first contact"""
+    user_id = _chat_cache.get(chat_id)
+    if user_id is not None:
+        return user_id
+    with _lock:
+        db = database.SessionLocal()
+        try:
+            U = models.User
+            user_id = db.execute(select(U.id).where(U.telegram_chat_id == chat_id)).scalar()
+            if user_id is None:
+                pinned = os.getenv("TELEGRAM_CHAT_ID")
+                if not pinned or int(pinned) == chat_id:
+                    # The original single-user bot: the first chat to talk to it owns the existing data
+                    user_id = db.execute(
+                        update(U).where(U.id == default_user_id(db), U.telegram_chat_id.is_(None))
+                        .values(telegram_chat_id=chat_id).returning(U.id)
+                    ).scalar()
+            if user_id is None:
+                user = models.User(name=name or f"telegram:{chat_id}", telegram_chat_id=chat_id, api_token=new_token())
+                db.add(user)
+                db.flush()
+                user_id = user.id
+                print(f"👤 Registered user {user_id} for Telegram chat {chat_id}")
+            db.commit()
+        finally:
+            db.close()
+    _chat_cache[chat_id] = user_id
+    return user_id
+
+
+def get_user(db, user_id):
+    return db.get(models.User, user_id)
+
+
+def sync_account(db, user_id):
+    """The Gmail account synced for a user; the default user keeps the original token.json mailbox ("me")"""
+    user = get_user(db, user_id)
+    if user is None:
+        return None
+    if user.gmail_account:
+        return user.gmail_account
+    return "me" if user.id == default_user_id(db) else None
+
+
+# ------------------- CLI ------------------- #
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Manage Job Tracker users")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="create a user")
+    add.add_argument("--name", required=True)
+    add.add_argument("--chat-id", type=int, help="Telegram chat id")
+    add.add_argument("--gmail", help="Gmail address to sync; authorizes it right away")
+    add.add_argument("--email", help="where daily summaries go")
+    commands.add_parser("list", help="show users and their API tokens")
+    args = parser.parse_args(argv)
+
+    database.init_db()
+    db = database.SessionLocal()
+    try:
+        if args.command == "add":
+            user = models.User(name=args.name, telegram_chat_id=args.chat_id, gmail_account=args.gmail,
+                               email=args.email, api_token=new_token())
+            db.add(user)
+            db.commit()
+            print(f"✅ Created user {user.id} ({user.name}), API token: {user.api_token}")
+            if args.gmail:
+                from . import gmail_service
+                gmail_service.get_gmail_service(args.gmail)
+        else:
+            for user in db.query(models.User).order_by(models.User.id):
+                print(f"{user.id}\t{user.name}\tchat={user.telegram_chat_id}\tgmail={sync_account(db, user.id)}\ttoken={user.api_token}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Latency of the application list and search endpoints over a seeded database.
+
+    python -m benchmarks.bench_api --rows 100000 --requests 200
+
+Requests go through the FastAPI app in-process (TestClient), so the numbers
+cover routing, auth, query, serialization and caching but not the network.
+The response cache is off unless --cache is passed, so every request hits the
+database. Uses its own database (--database, default bench.db) and seeds it
+with benchmarks.datagen up to --rows applications; re-runs reuse the rows.
+"""
+
+import argparse
+import os
+import random
+import time
+from benchmarks import datagen
+from benchmarks.results import emit, summarize
+
+
+def _measure(client, paths, repeat=1):
+    samples = []
+    for path in paths:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.get(path)
+            samples.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {path} returned {response.status_code}: {response.text[:200]}")
+    return summarize(samples)
+
+
+def _walk_pages(client, pages, limit):
+    """Follow next_cursor through the list; returns per-page latencies"""
+    samples = []
+    cursor = None
+    for _ in range(pages):
+        path = f"/applications?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        start = time.perf_counter()
+        body = client.get(path).json()
+        samples.append(time.perf_counter() - start)
+        cursor = body.get("next_cursor")
+        if not cursor:
+            break
+    return summarize(samples)
+
+
+def run(rows, requests, limit=50, seed=0):
+    from fastapi.testclient import TestClient
+    from app import main as api
+
+    start = time.perf_counter()
+    inserted = datagen.seed_applications(rows, seed=seed)
+    seed_seconds = time.perf_counter() - start
+
+    client = TestClient(api.app)
+    rng = random.Random(seed)
+    companies = [datagen.company_name(rng.randrange(rows)) for _ in range(requests)]
+    statuses = list(datagen.STATUS_WEIGHTS)
+    return {
+        "benchmark": "api",
+        "rows": rows,
+        "inserted": inserted,
+        "seed_seconds": round(seed_seconds, 2),
+        "requests": requests,
+        "latency_ms": {
+            "list_first_page": _measure(client, [f"/applications?limit={limit}"] * requests),
+            "list_pages": _walk_pages(client, requests, limit),
+            "list_by_status": _measure(client, [f"/applications?limit={limit}&status={rng.choice(statuses)}" for _ in range(requests)]),
+            "list_company_prefix": _measure(client, [f"/applications?limit={limit}&company_prefix={c[:4]}" for c in companies]),
+            "list_with_total": _measure(client, [f"/applications?limit={limit}&include_total=true"] * max(1, requests // 10)),
+            "search_company": _measure(client, [f"/applications/status/{c}" for c in companies]),
+            "analytics": _measure(client, ["/analytics"] * max(1, requests // 10)),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--limit", type=int, default=50, help="page size")
+    parser.add_argument("--database", default="sqlite:///bench.db")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    # Must be set before the app modules are imported
+    os.environ["DATABASE_URL"] = args.database
+    if not args.cache:
+        os.environ["CACHE_BACKEND"] = "none"
+    emit(run(args.rows, args.requests, args.limit), args.output)
+
+
+if __name__ == "__main__":
+    main()
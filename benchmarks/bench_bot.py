@@ -0,0 +1,178 @@
+"""
+Replay synthetic Telegram updates through the bot against a local stub of the Bot API.
+
+Runs the same command mix sequentially and with the chat-ordered concurrent
+update processor and reports per-update latency (enqueue to reply sent) and
+throughput. The stub answers every Bot API call locally after --latency
+seconds, standing in for the round trip to api.telegram.org.
+
+    python -m benchmarks.bench_bot --updates 2000 --chats 200 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict, deque
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_bot.db")
+
+from telegram import Update
+from telegram.ext import Application
+from telegram.request import BaseRequest
+from app import database, models, telegram_bot
+from benchmarks.results import emit
+
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+COMPANIES = ["Google", "Microsoft", "Amazon", "Infosys", "Flipkart", "Swiggy", "Zomato", "Razorpay", "Atlassian", "Adobe"]
+
+
+class StubTelegramRequest(BaseRequest):
+    """Answers Bot API calls locally and records when each chat got its replies"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.replies = defaultdict(deque)  # chat id -> enqueue times of pending commands
+        self.latencies = []
+        self.expected = 0
+        self.done = asyncio.Event()
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def expect(self, chat_id):
+        self.replies[chat_id].append(time.perf_counter())
+        self.expected += 1
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                         connect_timeout=None, pool_timeout=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        endpoint = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data else {}
+        if endpoint == "getMe":
+            result = BOT_USER
+        elif endpoint == "sendMessage":
+            chat_id = int(params["chat_id"])
+            # Every benchmark command sends exactly one reply, in order per chat
+            self.latencies.append(time.perf_counter() - self.replies[chat_id].popleft())
+            if len(self.latencies) == self.expected:
+                self.done.set()
+            result = {
+                "message_id": len(self.latencies),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "group", "title": "bench"},
+                "text": params.get("text", ""),
+            }
+        else:
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+def make_updates(count, chats, seed=0):
+    rng = random.Random(seed)
+    updates = []
+    for i in range(count):
+        roll = rng.random()
+        company = rng.choice(COMPANIES)
+        if roll < 0.6:
+            text = f"/status {company}"
+        elif roll < 0.8:
+            text = "/list"
+        elif roll < 0.9:
+            text = f"/update {company} In Review"
+        else:
+            text = f"/add {company}{i} Applied"
+        command = text.split()[0]
+        chat_id = 1000 + rng.randrange(chats)
+        updates.append({
+            "update_id": i + 1,
+            "message": {
+                "message_id": i + 1,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "group", "title": f"chat {chat_id}"},
+                "from": {"id": chat_id, "is_bot": False, "first_name": "User"},
+                "text": text,
+                "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}],
+            },
+        })
+    return updates
+
+
+def seed_database(applications):
+    database.init_db()
+    db = database.SessionLocal()
+    try:
+        if db.query(models.Application).count() == 0:
+            db.add_all(models.Application(company_name=f"{COMPANIES[i % len(COMPANIES)]} {i}", role="SDE", platform="LinkedIn")
+                       for i in range(applications))
+            db.commit()
+    finally:
+        db.close()
+
+
+async def replay(updates, concurrency, latency):
+    request = StubTelegramRequest(latency)
+    builder = Application.builder().token("123456:BENCH").request(request).get_updates_request(StubTelegramRequest())
+    app = telegram_bot.build_application(webhook=True, builder=builder, concurrency=concurrency)
+    await app.initialize()
+    await app.start()
+
+    start = time.perf_counter()
+    for data in updates:
+        update = Update.de_json(data, app.bot)
+        request.expect(update.effective_chat.id)
+        await app.update_queue.put(update)
+    await request.done.wait()
+    elapsed = time.perf_counter() - start
+
+    await app.stop()
+    await app.shutdown()
+
+    latencies = sorted(request.latencies)
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2)
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "updates_per_sec": round(len(updates) / elapsed, 1),
+        "latency_ms": {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": pick(1.0)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per Bot API round trip")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--applications", type=int, default=2000, help="rows seeded into the benchmark database")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    seed_database(args.applications)
+    updates = make_updates(args.updates, args.chats)
+    sequential = asyncio.run(replay(updates, 1, args.latency))
+    concurrent = asyncio.run(replay(updates, args.concurrency, args.latency))
+
+    emit({
+        "benchmark": "telegram_bot",
+        "updates": args.updates,
+        "chats": args.chats,
+        "sequential": sequential,
+        "concurrent": concurrent,
+        "speedup": round(sequential["seconds"] / concurrent["seconds"], 1) if concurrent["seconds"] else None,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
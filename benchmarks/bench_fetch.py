@@ -0,0 +1,62 @@
+"""
+Compare serial messages.get calls with the batched MessageFetcher against FakeGmailService.
+
+    python -m benchmarks.bench_fetch --messages 500 --latency 0.02
+"""
+
+import argparse
+import time
+from app.gmail_fetch import MessageFetcher
+from benchmarks.fake_gmail import FakeGmailService, make_message
+from benchmarks.results import emit
+
+
+def build_service(count, latency, error_rate):
+    messages = [make_message(f"m{i}", f"Update on your application #{i}", "<p>Thanks for applying</p>") for i in range(count)]
+    return FakeGmailService(messages, latency=latency, error_rate=error_rate)
+
+
+def bench_serial(service, ids):
+    start = time.perf_counter()
+    for message_id in ids:
+        service.users().messages().get(userId="me", id=message_id).execute()
+    return time.perf_counter() - start
+
+
+def bench_batched(service, ids, batch_size, concurrency):
+    fetcher = MessageFetcher(service, batch_size=batch_size, concurrency=concurrency, units_per_sec=1e9)
+    fetcher.backoff_base = 0.01
+    start = time.perf_counter()
+    fetched = sum(1 for _ in fetcher.fetch(ids))
+    return time.perf_counter() - start, fetched, len(fetcher.failed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per round trip")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with 429")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    ids = [f"m{i}" for i in range(args.messages)]
+    serial = bench_serial(build_service(args.messages, args.latency, 0.0), ids)
+    service = build_service(args.messages, args.latency, args.error_rate)
+    batched, fetched, failed = bench_batched(service, ids, args.batch_size, args.concurrency)
+
+    emit({
+        "benchmark": "gmail_fetch",
+        "messages": args.messages,
+        "serial_seconds": round(serial, 4),
+        "batched_seconds": round(batched, 4),
+        "batched_round_trips": service.round_trips,
+        "fetched": fetched,
+        "failed": failed,
+        "speedup": round(serial / batched, 1) if batched else None,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
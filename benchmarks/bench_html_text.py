@@ -0,0 +1,126 @@
+"""
+Per-message cost of parse_email against the previous BeautifulSoup-based parser.
+
+    python -m benchmarks.bench_html_text --messages 300
+    python -m benchmarks.bench_html_text --corpus exported_messages.json
+
+Without --corpus a synthetic set of LinkedIn/Naukri/Internshala/Indeed style
+HTML notifications is used. Reports mean/p95 latency and peak traced
+allocation per message for both paths.
+"""
+
+import argparse
+import base64
+import re
+import statistics
+import time
+import tracemalloc
+from app.email_parser import parse_email
+from app.pipeline import load_dump
+from benchmarks.fake_gmail import make_message
+from benchmarks.results import emit
+
+LEGACY_KEYWORDS = {
+    "rejected": "Rejected",
+    "declined": "Rejected",
+    "shortlisted": "In Review",
+    "viewed": "In Review",
+    "interview": "Interview Scheduled",
+    "hired": "Offer",
+    "offer": "Offer"
+}
+
+STYLE = "<style>" + "".join(f".c{i}{{color:#{i:06x};padding:{i % 9}px}}" for i in range(400)) + "</style>"
+TEMPLATES = [
+    ("jobs-noreply@linkedin.com", "Your application to {company} was viewed",
+     "Your application was viewed by {company}. The hiring team is reviewing your profile."),
+    ("info@naukri.com", "Recruiter viewed your profile", "A recruiter from {company} viewed your profile for {role}."),
+    ("support@internshala.com", "Application status update", "Congratulations! You have been shortlisted by {company}."),
+    ("alert@indeed.com", "An update on your {role} application",
+     "Thank you for your interest in {company}. We regret to inform you that the position has been filled."),
+]
+
+
+def synthetic_corpus(count):
+    messages = []
+    for i in range(count):
+        sender, subject, sentence = TEMPLATES[i % len(TEMPLATES)]
+        fields = {"company": f"Company {i}", "role": "Backend Engineer"}
+        rows = "".join(
+            f"<tr><td class='c{j}'><a href='https://example.com/job/{i}/{j}'>Recommended job {j}</a></td>"
+            f"<td>Bengaluru &middot; Full-time &amp; hybrid</td></tr>"
+            for j in range(60)
+        )
+        html = (
+            f"<html><head>{STYLE}<script>var t={i};</script></head><body><table>"
+            f"<tr><td><p>{sentence.format(**fields)}</p></td></tr>{rows}</table>"
+            f"<img src='https://example.com/pixel/{i}.gif' width=1 height=1><p>Unsubscribe &copy; 2026</p></body></html>"
+        )
+        messages.append(make_message(f"m{i}", subject.format(**fields), html, sender=sender))
+    return messages
+
+
+def legacy_parse_email(msg):
+    """parse_email as it was before the HTMLParser fast path"""
+    from bs4 import BeautifulSoup
+    payload = msg['payload']
+    subject = next((h['value'] for h in payload['headers'] if h['name'] == 'Subject'), "")
+    body = ""
+    if 'data' in payload['body']:
+        body = base64.urlsafe_b64decode(payload['body']['data']).decode('utf-8')
+    elif payload.get('parts'):
+        data = payload['parts'][0]['body'].get('data')
+        if data:
+            body = base64.urlsafe_b64decode(data).decode('utf-8')
+    text_body = BeautifulSoup(body, "html.parser").get_text()
+    status = "Applied"
+    for k, v in LEGACY_KEYWORDS.items():
+        if re.search(k, subject.lower()) or re.search(k, text_body.lower()):
+            status = v
+            break
+    return {"subject": subject, "body": text_body[:500], "status": status}
+
+
+def measure(fn, messages):
+    latencies = []
+    for msg in messages:
+        start = time.perf_counter()
+        fn(msg)
+        latencies.append(time.perf_counter() - start)
+
+    peaks = []
+    for msg in messages[:50]:
+        tracemalloc.start()
+        fn(msg)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "mean_ms": round(statistics.mean(latencies) * 1000, 4),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 4),
+        "peak_alloc_kb": round(statistics.mean(peaks) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--corpus", help="JSON/NDJSON/mbox dump of real messages")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    messages = list(load_dump(args.corpus)) if args.corpus else synthetic_corpus(args.messages)
+    fast = measure(parse_email, messages)
+    legacy = measure(legacy_parse_email, messages)
+    emit({
+        "benchmark": "parse_email",
+        "messages": len(messages),
+        "html_parser": fast,
+        "beautifulsoup": legacy,
+        "speedup": round(legacy["mean_ms"] / fast["mean_ms"], 1),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Cost of turning --rows applications into a JSON response, old path vs new.
+
+    python -m benchmarks.bench_serialization --rows 10000 --repeat 5
+
+"pydantic" is the previous path: ORM objects validated one by one into
+ApplicationOut, then jsonable_encoder + json.dumps. "tuples_json" selects the
+columns as tuples and encodes them with the standard library, "tuples_orjson"
+does the same with orjson (the default when it is installed). Each is timed
+end to end (query + encode) in wall clock and CPU seconds. The same rows are
+then compressed with gzip and brotli (when installed), and finally the
+streamed /applications/export?format=json endpoint is timed through the app
+with each encoder and encoding. Uses its own database (--database, default
+bench.db) seeded with benchmarks.datagen.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import time
+from benchmarks import datagen
+from benchmarks.results import emit, summarize
+
+
+def _timed(fn, repeat):
+    wall, cpu = [], []
+    for _ in range(repeat):
+        start, start_cpu = time.perf_counter(), time.process_time()
+        body = fn()
+        wall.append(time.perf_counter() - start)
+        cpu.append(time.process_time() - start_cpu)
+    return body, {"wall_ms": summarize(wall), "cpu_seconds": round(sum(cpu) / len(cpu), 4)}
+
+
+def _encoders(db, owner_id):
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy import select
+    from app import models, queries, schemas, serialization
+
+    A = models.Application
+    fields = queries.DEFAULT_FIELDS
+    stmt = select(*[getattr(A, f) for f in fields]).where(A.owner_id == owner_id).order_by(A.id)
+
+    def pydantic():
+        apps = db.query(A).filter(A.owner_id == owner_id).order_by(A.id).all()
+        db.expunge_all()  # a fresh load every repeat, as a new request would do
+        return json.dumps(jsonable_encoder([schemas.ApplicationOut.model_validate(a) for a in apps]), separators=(",", ":")).encode()
+
+    def tuples(encoder):
+        def run():
+            serialization.ENCODER = encoder
+            return serialization.dumps(serialization.items(db.execute(stmt), fields))
+        return run
+
+    return {"pydantic": pydantic, "tuples_json": tuples("json"), "tuples_orjson": tuples("orjson")}
+
+
+def _compression(body, repeat):
+    from app import compression
+
+    results = {"identity": {"bytes": len(body)}}
+    codecs = {"gzip": lambda: gzip.compress(body, compresslevel=6)}
+    brotli = compression._load_brotli()
+    if brotli:
+        codecs["br"] = lambda: brotli.compress(body, quality=4)
+    for name, fn in codecs.items():
+        compressed, timing = _timed(fn, repeat)
+        results[name] = {"bytes": len(compressed), "ratio": round(len(body) / len(compressed), 2), **timing}
+    return results
+
+
+def _export(client, repeat):
+    from app import compression, serialization
+
+    encodings = ["identity", "gzip"] + (["br"] if compression._load_brotli() else [])
+    results = {}
+    for encoder in ("json", "orjson"):
+        serialization.ENCODER = encoder
+        for encoding in encodings:
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                with client.stream("GET", "/applications/export?format=json", headers={"Accept-Encoding": encoding}) as response:
+                    wire_bytes = sum(len(chunk) for chunk in response.iter_raw())  # as sent, before decompression
+                samples.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise RuntimeError(f"export returned {response.status_code}")
+            results[f"{encoder}_{encoding}"] = {"bytes": wire_bytes, **summarize(samples)}
+    return results
+
+
+def run(rows, repeat, seed=0):
+    from fastapi.testclient import TestClient
+    from app import database, main as api, serialization, tenants
+
+    datagen.seed_applications(rows, seed=seed)
+    db = database.SessionLocal()
+    try:
+        owner_id = tenants.default_user_id(db)
+        encoders = _encoders(db, owner_id)
+        bodies, timings = {}, {}
+        for name, fn in encoders.items():
+            fn()  # warm up the query plan and statement cache
+            bodies[name], timings[name] = _timed(fn, repeat)
+    finally:
+        db.close()
+        serialization.ENCODER = "orjson"
+
+    if json.loads(bodies["pydantic"]) != json.loads(bodies["tuples_orjson"]):
+        raise RuntimeError("tuples_orjson and pydantic produced different documents")
+    baseline = timings["pydantic"]
+    for name in ("tuples_json", "tuples_orjson"):
+        timings[name]["speedup"] = round(baseline["wall_ms"]["mean"] / timings[name]["wall_ms"]["mean"], 2)
+        timings[name]["cpu_speedup"] = round(baseline["cpu_seconds"] / max(timings[name]["cpu_seconds"], 1e-6), 2)
+
+    return {
+        "benchmark": "serialization",
+        "rows": rows,
+        "repeat": repeat,
+        "orjson": bool(serialization._load_orjson()),
+        "encode": timings,
+        "compression": _compression(bodies["tuples_orjson"], repeat),
+        "export_ms": _export(TestClient(api.app), repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per variant")
+    parser.add_argument("--database", default="sqlite:///bench.db")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    # Must be set before the app modules are imported
+    os.environ["DATABASE_URL"] = args.database
+    os.environ["CACHE_BACKEND"] = "none"
+    emit(run(args.rows, args.repeat), args.output)
+
+
+if __name__ == "__main__":
+    main()
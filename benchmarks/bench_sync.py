@@ -0,0 +1,77 @@
+"""
+Throughput of the Gmail sync job (sync_emails_job) against FakeGmailService.
+
+    python -m benchmarks.bench_sync --messages 1000 --latency 0.02
+
+A fresh mailbox of --messages portal emails is synced once (full resync), then
+--incremental more emails arrive and are picked up through history.list. The
+applications the emails mention are seeded first, so matching and status
+updates do real work. Uses its own database (--database, default bench_sync.db),
+which is recreated on every run. Gmail's quota throttle is off unless --quota
+is given, so the numbers reflect this code rather than the rate limit.
+"""
+
+import argparse
+import os
+import time
+from benchmarks import datagen
+from benchmarks.fake_gmail import FakeGmailService
+from benchmarks.results import emit
+
+
+def _run(sync, service, messages):
+    start = time.perf_counter()
+    updated = sync.sync_emails_job()
+    seconds = time.perf_counter() - start
+    return {
+        "messages": messages,
+        "updated": len(updated),
+        "seconds": round(seconds, 3),
+        "messages_per_sec": round(messages / seconds, 1) if seconds else None,
+        "round_trips": service.round_trips,
+    }
+
+
+def run(messages, incremental, latency, rows, quota=1e9):
+    from app import gmail_service, sync
+
+    datagen.seed_applications(rows)
+    companies = [datagen.company_name(i) for i in range(rows)]
+    # Dated after the seeded rows' status changes, so the emails are allowed to update them
+    mail = datagen.portal_messages(messages + incremental, companies, start_ms=int(time.time() * 1000))
+    service = FakeGmailService(mail[:messages], latency=latency)
+    gmail_service.get_gmail_service = lambda account="me": service
+    os.environ["GMAIL_RESYNC_LIMIT"] = str(messages)
+    os.environ["GMAIL_QUOTA_UNITS_PER_SEC"] = str(quota)
+
+    full = _run(sync, service, messages)
+    service.round_trips = 0
+    for message in mail[messages:]:
+        service.add_message(message)
+    delta = _run(sync, service, incremental)
+    return {"benchmark": "gmail_sync", "latency": latency, "quota": quota, "applications": rows, "full_resync": full, "incremental": delta}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--incremental", type=int, default=100, help="emails arriving after the first sync")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per Gmail round trip")
+    parser.add_argument("--rows", type=int, default=500, help="applications the emails are matched against")
+    parser.add_argument("--quota", type=float, default=1e9,
+                        help="Gmail quota units per second (250 models the real per-user limit; default unthrottled)")
+    parser.add_argument("--database", default="sqlite:///bench_sync.db")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    from sqlalchemy.engine import make_url
+    url = make_url(args.database)
+    if url.get_backend_name() == "sqlite" and url.database and os.path.exists(url.database):
+        os.remove(url.database)  # every run starts from an empty mailbox state
+    os.environ["DATABASE_URL"] = args.database
+    os.environ.setdefault("SCHEDULER_MODE", "off")
+    emit(run(args.messages, args.incremental, args.latency, args.rows, args.quota), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Synthetic data for the benchmarks: application rows and job portal emails.
+
+    python -m benchmarks.datagen --rows 100000                 # seed DATABASE_URL
+    python -m benchmarks.datagen --messages 2000 --out mail.jsonl
+
+Rows go through bulk.upsert_applications, so analytics, search and history see
+them exactly as they would an import. Messages are Gmail API resources shaped
+like LinkedIn/Naukri/Internshala/Indeed notifications (multipart text+HTML,
+newsletter-sized markup, increasing internalDate) and can be replayed with
+`python -m app.pipeline mail.jsonl`.
+"""
+
+import argparse
+import base64
+import json
+import random
+import time
+from datetime import date, timedelta
+from benchmarks.fake_gmail import make_message
+
+SEED_CHUNK_SIZE = 5000
+
+COMPANIES = [
+    "Google", "Microsoft", "Amazon", "Flipkart", "Swiggy", "Zomato", "Razorpay", "Atlassian", "Infosys", "TCS",
+    "Wipro", "Freshworks", "Zoho", "PhonePe", "Paytm", "CRED", "Meesho", "Ola", "Uber", "Adobe",
+]
+ROLES = ["SDE", "Backend Engineer", "Frontend Engineer", "Data Analyst", "ML Engineer", "SRE", "Product Manager", "Intern"]
+PLATFORMS = ["LinkedIn", "Naukri", "Internshala", "Indeed"]
+# Roughly what a real tracker looks like: most applications never hear back
+STATUS_WEIGHTS = {"Applied": 55, "In Review": 20, "Rejected": 15, "Interview Scheduled": 7, "Offer": 3}
+
+PORTALS = {
+    "LinkedIn": ("jobs-noreply@linkedin.com", [
+        ("Your application to {company} was viewed", "Your application for {role} was viewed by {company}."),
+        ("Your application to {company}", "Unfortunately, {company} has decided not to move forward with your application."),
+        ("{company} wants to schedule an interview", "{company} would like to schedule an interview for the {role} role."),
+    ]),
+    "Naukri": ("info@naukri.com", [
+        ("Recruiter viewed your profile", "A recruiter from {company} viewed your application for {role}."),
+        ("Application status: {role} at {company}", "Your application has been shortlisted by {company}."),
+    ]),
+    "Internshala": ("support@internshala.com", [
+        ("Application status update", "Congratulations! You have been shortlisted by {company} for {role}."),
+        ("Update on your application to {company}", "We regret to inform you that {company} has filled the position."),
+        ("Offer from {company}", "Congratulations! {company} has extended an offer for {role}."),
+    ]),
+    "Indeed": ("alert@indeed.com", [
+        ("An update on your {role} application", "Thank you for your interest in {company}. The position has been filled."),
+        ("Your application was sent to {company}", "Your application for {role} was sent to {company}."),
+    ]),
+}
+
+STYLE = "<style>" + "".join(f".c{i}{{color:#{i:06x};padding:{i % 9}px}}" for i in range(200)) + "</style>"
+
+
+def company_name(i):
+    return f"{COMPANIES[i % len(COMPANIES)]} {i // len(COMPANIES)}"
+
+
+def application_rows(count, seed=0):
+    """Yield import rows (dicts of bulk.COLUMNS) for count distinct applications"""
+    rng = random.Random(seed)
+    statuses, weights = zip(*STATUS_WEIGHTS.items())
+    today = date.today()
+    for i in range(count):
+        yield {
+            "company_name": company_name(i),
+            "role": rng.choice(ROLES),
+            "platform": rng.choice(PLATFORMS),
+            "date_applied": today - timedelta(days=rng.randrange(365)),
+            "status": rng.choices(statuses, weights)[0],
+            "job_link": f"https://jobs.example.com/{i}",
+        }
+
+
+def seed_applications(count, owner_id=None, seed=0, chunk_size=SEED_CHUNK_SIZE):
+    """Bring the owner's application count up to count; returns the number of rows inserted"""
+    from sqlalchemy import func, select
+    from app import bulk, database, models, tenants
+
+    database.init_db()
+    db = database.SessionLocal()
+    try:
+        owner_id = owner_id or tenants.default_user_id(db)
+        existing = db.execute(select(func.count()).select_from(models.Application).where(models.Application.owner_id == owner_id)).scalar()
+        inserted = 0
+        chunk = []
+        for i, row in enumerate(application_rows(count, seed)):
+            if i < existing:
+                continue
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                inserted += bulk.upsert_applications(db, chunk, owner_id)[0]
+                db.commit()
+                chunk = []
+        if chunk:
+            inserted += bulk.upsert_applications(db, chunk, owner_id)[0]
+            db.commit()
+        return inserted
+    finally:
+        db.close()
+
+
+def _multipart(message, text):
+    """Turn make_message's single HTML body into multipart/alternative with a text/plain rendition"""
+    html_part = {"mimeType": "text/html", "headers": [], "body": message["payload"]["body"]}
+    data = base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+    text_part = {"mimeType": "text/plain", "headers": [], "body": {"size": len(text), "data": data}}
+    message["payload"].update(mimeType="multipart/alternative", parts=[text_part, html_part], body={"size": 0})
+    return message
+
+
+def portal_messages(count, companies=None, seed=0, start_ms=None, multipart_ratio=0.5):
+    """Build count Gmail message resources from the portal templates, one minute apart from start_ms"""
+    rng = random.Random(seed)
+    companies = companies or [company_name(i) for i in range(max(1, count // 4))]
+    start_ms = start_ms or int((time.time() - count * 60) * 1000)
+    messages = []
+    for i in range(count):
+        platform = PLATFORMS[i % len(PLATFORMS)]
+        sender, templates = PORTALS[platform]
+        subject, sentence = rng.choice(templates)
+        fields = {"company": rng.choice(companies), "role": rng.choice(ROLES)}
+        sentence = sentence.format(**fields)
+        jobs = "".join(
+            f"<tr><td class='c{j}'><a href='https://example.com/job/{i}/{j}'>Recommended: {rng.choice(ROLES)}</a></td>"
+            f"<td>Bengaluru &middot; Full-time &amp; hybrid</td></tr>"
+            for j in range(rng.randrange(10, 40))
+        )
+        html = (
+            f"<html><head>{STYLE}<script>var t={i};</script></head><body><table>"
+            f"<tr><td><p>{sentence}</p></td></tr>{jobs}</table>"
+            f"<img src='https://example.com/pixel/{i}.gif' width=1 height=1><p>Unsubscribe &copy; 2026</p></body></html>"
+        )
+        message = make_message(f"bench-{seed}-{i}", subject.format(**fields), html, sender=sender, internal_date=start_ms + i * 60000)
+        if rng.random() < multipart_ratio:
+            _multipart(message, sentence + "\n\nUnsubscribe")
+        messages.append(message)
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=0, help="applications to seed into DATABASE_URL")
+    parser.add_argument("--user", type=int, help="owner of the seeded rows (default user if omitted)")
+    parser.add_argument("--messages", type=int, default=0, help="portal emails to generate")
+    parser.add_argument("--out", default="messages.jsonl", help="NDJSON file for --messages")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = {}
+    if args.rows:
+        start = time.perf_counter()
+        result["inserted"] = seed_applications(args.rows, args.user, args.seed)
+        result["seed_seconds"] = round(time.perf_counter() - start, 2)
+    if args.messages:
+        companies = [company_name(i) for i in range(args.rows)] if args.rows else None
+        with open(args.out, "w", encoding="utf-8") as f:
+            for message in portal_messages(args.messages, companies, args.seed):
+                f.write(json.dumps(message) + "\n")
+        result["messages"] = args.out
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
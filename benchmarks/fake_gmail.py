@@ -0,0 +1,160 @@
+"""
+In-process stand-in for the Gmail API client returned by gmail_service.get_gmail_service().
+
+Implements the calls the sync job uses (getProfile, history.list, messages.list,
+messages.get and batch requests) with a configurable per-round-trip latency and
+an optional rate of 429 responses, so the fetch/sync stages can be exercised and
+timed without network access.
+"""
+
+import base64
+import json
+import random
+import time
+import httplib2
+from googleapiclient.errors import HttpError
+
+
+def make_message(message_id, subject, body, sender="jobs-noreply@linkedin.com", mime_type="text/html", internal_date=None):
+    """Build a Gmail API message resource with a single-part body"""
+    data = base64.urlsafe_b64encode(body.encode("utf-8")).decode("ascii")
+    return {
+        "id": message_id,
+        "threadId": message_id,
+        "internalDate": str(internal_date or int(time.time() * 1000)),
+        "payload": {
+            "mimeType": mime_type,
+            "headers": [
+                {"name": "Subject", "value": subject},
+                {"name": "From", "value": sender},
+            ],
+            "body": {"size": len(body), "data": data},
+        },
+    }
+
+
+def http_error(status, reason=""):
+    content = json.dumps({"error": {"code": status, "errors": [{"reason": reason}]}}).encode()
+    return HttpError(httplib2.Response({"status": status}), content)
+
+
+class _Request:
+    def __init__(self, service, fn):
+        self.service = service
+        self.fn = fn
+
+    def execute(self, http=None, num_retries=0):
+        self.service.round_trips += 1
+        time.sleep(self.service.latency)
+        return self.service._call(self.fn)
+
+
+class _Batch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.requests.append((request, request_id or str(len(self.requests))))
+
+    def execute(self, http=None):
+        # One round trip for the whole batch
+        self.service.round_trips += 1
+        time.sleep(self.service.latency)
+        for request, request_id in self.requests:
+            try:
+                response, exception = self.service._call(request.fn), None
+            except HttpError as e:
+                response, exception = None, e
+            self.callback(request_id, response, exception)
+
+
+class _Resource:
+    def __init__(self, service, **methods):
+        self.service = service
+        self.methods = methods
+
+    def __getattr__(self, name):
+        method = self.methods[name]
+        return lambda **kwargs: _Request(self.service, lambda: method(**kwargs))
+
+
+class FakeGmailService:
+    def __init__(self, messages=(), latency=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.round_trips = 0
+        self.messages = {}
+        self.order = []
+        self.history = []
+        self.history_id = 1000
+        # history ids older than this are reported as expired (404)
+        self.oldest_history_id = self.history_id
+        for message in messages:
+            self.add_message(message)
+
+    # ---- test helpers ---- #
+    def add_message(self, message):
+        self.history_id += 1
+        self.messages[message["id"]] = message
+        self.order.append(message["id"])
+        self.history.append({"id": str(self.history_id), "messagesAdded": [{"message": {"id": message["id"]}}]})
+        return message["id"]
+
+    def expire_history(self):
+        self.oldest_history_id = self.history_id
+
+    def _call(self, fn):
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise http_error(429, "rateLimitExceeded")
+        return fn()
+
+    # ---- API surface ---- #
+    def users(self):
+        return _Users(self)
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(self, callback)
+
+    def _get_profile(self, userId):
+        return {"emailAddress": "me@example.com", "historyId": str(self.history_id)}
+
+    def _list_messages(self, userId, q=None, maxResults=100, pageToken=None):
+        newest_first = self.order[::-1]
+        start = int(pageToken or 0)
+        page = newest_first[start:start + maxResults]
+        result = {"messages": [{"id": m, "threadId": m} for m in page], "resultSizeEstimate": len(newest_first)}
+        if start + maxResults < len(newest_first):
+            result["nextPageToken"] = str(start + maxResults)
+        return result
+
+    def _get_message(self, userId, id, format="full"):
+        if id not in self.messages:
+            raise http_error(404, "notFound")
+        return self.messages[id]
+
+    def _list_history(self, userId, startHistoryId, historyTypes=None, labelId=None, pageToken=None, maxResults=100):
+        if int(startHistoryId) < self.oldest_history_id:
+            raise http_error(404, "notFound")
+        records = [h for h in self.history if int(h["id"]) > int(startHistoryId)]
+        start = int(pageToken or 0)
+        result = {"history": records[start:start + maxResults], "historyId": str(self.history_id)}
+        if start + maxResults < len(records):
+            result["nextPageToken"] = str(start + maxResults)
+        return result
+
+
+class _Users:
+    def __init__(self, service):
+        self.service = service
+
+    def getProfile(self, **kwargs):
+        return _Request(self.service, lambda: self.service._get_profile(**kwargs))
+
+    def messages(self):
+        return _Resource(self.service, list=self.service._list_messages, get=self.service._get_message)
+
+    def history(self):
+        return _Resource(self.service, list=self.service._list_history)
@@ -0,0 +1,69 @@
+"""
+Shared result helpers: latency summaries, JSON output and run-to-run comparison.
+"""
+
+import json
+import statistics
+
+
+def summarize(samples):
+    """Latency percentiles in milliseconds for a list of durations in seconds"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+    return {
+        "n": len(ordered),
+        "mean": round(statistics.fmean(ordered) * 1000, 3),
+        "p50": pick(0.5),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": pick(1.0),
+    }
+
+
+def emit(result, output=None):
+    """Print the result as JSON and, with output, also write it to that file"""
+    text = json.dumps(result, indent=2, default=str)
+    print(text)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+# Metrics where a larger number is better; everything else compared (latencies, seconds) should shrink
+HIGHER_IS_BETTER = ("per_sec", "speedup")
+
+
+def _flatten(value, prefix=""):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+
+def _compared(path):
+    leaf = path.rsplit(".", 1)[-1]
+    return leaf in ("p50", "p95", "mean", "seconds") or leaf.endswith(("_seconds", "per_sec", "_ms", "speedup"))
+
+
+def compare(base, head, threshold=0.2):
+    """
+    Compare two run files (see benchmarks.run) metric by metric.
+
+    Returns rows of (metric, base, head, change) and the metrics that got worse
+    by more than threshold (0.2 = 20%).
+    """
+    base_values = dict(_flatten(base.get("results", base)))
+    rows, regressions = [], []
+    for path, value in _flatten(head.get("results", head)):
+        old = base_values.get(path)
+        if old is None or not _compared(path) or not old:
+            continue
+        change = (value - old) / old
+        rows.append((path, old, value, round(change, 3)))
+        worse = -change if path.endswith(HIGHER_IS_BETTER) else change
+        if worse > threshold:
+            regressions.append(path)
+    return rows, regressions
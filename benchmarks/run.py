@@ -0,0 +1,129 @@
+"""
+Run the benchmark suite and write one JSON file per run, to compare commits.
+
+    python -m benchmarks.run --rows 100000 --out bench-results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.run --quick                          # small sizes, for CI
+    python -m benchmarks.run --compare bench-results/base.json bench-results/head.json
+
+Every benchmark runs in its own process against its own throwaway SQLite
+database, so runs don't share caches, engines or rows. The result file holds
+each benchmark's JSON output plus the commit, Python version and sizes used.
+--compare prints the relative change of every latency/throughput metric and
+exits with status 1 when one got worse by more than --threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from benchmarks.results import compare
+
+SUITES = ("api", "serialization", "sync", "parse", "fetch", "bot")
+
+
+def suite_commands(args, workdir):
+    db = lambda name: f"sqlite:///{os.path.join(workdir, name)}.db"
+    return {
+        "api": ["benchmarks.bench_api", "--rows", args.rows, "--requests", args.requests, "--database", db("api")],
+        # 10k rows at least: below that the per-row savings are lost in the fixed request overhead
+        "serialization": ["benchmarks.bench_serialization", "--rows", max(args.rows, 10000), "--repeat", 3 if args.quick else 5,
+                          "--database", db("serialization")],
+        "sync": ["benchmarks.bench_sync", "--messages", args.messages, "--incremental", max(1, args.messages // 10),
+                 "--latency", args.latency, "--database", db("sync")],
+        "parse": ["benchmarks.bench_html_text", "--messages", min(args.messages, 1000)],
+        "fetch": ["benchmarks.bench_fetch", "--messages", args.messages, "--latency", args.latency],
+        "bot": ["benchmarks.bench_bot", "--updates", args.updates, "--chats", max(1, args.updates // 10),
+                "--latency", args.latency, "--applications", min(args.rows, 10000)],
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(name, command, workdir, timeout):
+    output = os.path.join(workdir, f"{name}.json")
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{os.path.join(workdir, name)}.db", "SCHEDULER_MODE": "off"}
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-m", *[str(c) for c in command], "--output", output],
+        env=env, capture_output=True, text=True, timeout=timeout,
+    )
+    if proc.returncode != 0 or not os.path.exists(output):
+        print(f"❌ Benchmark {name} failed:\n{proc.stderr[-2000:]}")
+        return {"error": proc.stderr[-2000:] or f"exit status {proc.returncode}"}
+    with open(output, encoding="utf-8") as f:
+        result = json.load(f)
+    print(f"✅ {name} finished in {time.perf_counter() - start:.1f}s")
+    return result
+
+
+def print_comparison(base_path, head_path, threshold):
+    with open(base_path, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(head_path, encoding="utf-8") as f:
+        head = json.load(f)
+    rows, regressions = compare(base, head, threshold)
+    width = max((len(r[0]) for r in rows), default=10)
+    for path, old, new, change in rows:
+        flag = "  ⚠️" if path in regressions else ""
+        print(f"{path:<{width}}  {old:>12}  {new:>12}  {change:+.1%}{flag}")
+    if regressions:
+        print(f"❌ {len(regressions)} metrics regressed by more than {threshold:.0%}")
+        return 1
+    print("✅ No regressions")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", action="append", choices=SUITES, help="run only these benchmarks (repeatable)")
+    parser.add_argument("--rows", type=int, default=10000, help="applications seeded for the API benchmark (1k to 1M)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per API endpoint")
+    parser.add_argument("--messages", type=int, default=1000, help="emails for the sync, parse and fetch benchmarks")
+    parser.add_argument("--updates", type=int, default=2000, help="Telegram updates replayed")
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated Gmail/Telegram round trip in seconds")
+    parser.add_argument("--quick", action="store_true", help="small sizes for a fast smoke run")
+    parser.add_argument("--timeout", type=int, default=3600, help="seconds allowed per benchmark")
+    parser.add_argument("--out", help="result file (default bench-results/<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return print_comparison(*args.compare, args.threshold)
+    if args.quick:
+        args.rows, args.requests, args.messages, args.updates, args.latency = 1000, 50, 200, 200, 0.005
+
+    started_at = datetime.now(timezone.utc)
+    run = {
+        "commit": _git_commit(),
+        "started_at": started_at.isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {k: getattr(args, k) for k in ("rows", "requests", "messages", "updates", "latency")},
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="job-tracker-bench-") as workdir:
+        commands = suite_commands(args, workdir)
+        for name in args.suite or SUITES:
+            run["results"][name] = run_suite(name, commands[name], workdir, args.timeout)
+
+    out = args.out or os.path.join("bench-results", started_at.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+    print(f"📄 Results written to {out}")
+    return 1 if any("error" in r for r in run["results"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,25 @@ const API_BASE = 'http://localhost:8000';
 // Global state
 let applications = [];
 let filteredApplications = [];
+let nextCursor = null;
+let totalCount = null;
+let demoMode = false;
+let filterTimer = null;
+let liveSource = null;
+let liveRenderTimer = null;
+const PAGE_SIZE = 50;
+
+// Each user's API token (from /token in the Telegram bot); open the page with ?token=... once to save it
+const urlToken = new URLSearchParams(window.location.search).get('token');
+if (urlToken) localStorage.setItem('apiToken', urlToken);
+
+// fetch() against the API as the current user
+function apiFetch(path, options = {}) {
+    const token = localStorage.getItem('apiToken');
+    const headers = { ...(options.headers || {}) };
+    if (token) headers['Authorization'] = `Bearer ${token}`;
+    return fetch(`${API_BASE}${path}`, { ...options, headers });
+}
 
 // Initialize the application
 document.addEventListener('DOMContentLoaded', function() {
@@ -23,6 +42,9 @@ function setupEventListeners() {
     
     // Sync button
     document.getElementById('syncBtn').addEventListener('click', syncGmail);
+
+    // Pagination
+    document.getElementById('loadMoreBtn').addEventListener('click', () => loadApplications(false));
 }
 
 // Show bot instructions on first visit
@@ -40,15 +62,37 @@ function closeBotModal() {
     document.getElementById('botModal').classList.remove('flex');
 }
 
-// Load applications from API
-async function loadApplications() {
+// Build the list query from the current filters; filtering happens on the server
+function buildListQuery(cursor) {
+    const params = new URLSearchParams({ limit: PAGE_SIZE });
+    const searchTerm = document.getElementById('searchInput').value.trim();
+    const statusFilter = document.getElementById('statusFilter').value;
+
+    // Free text matches anywhere in the company or role, like the demo-mode filter
+    if (searchTerm) params.set('q', searchTerm);
+    if (statusFilter) params.set('status', statusFilter);
+    if (cursor) {
+        params.set('cursor', cursor);
+    } else {
+        params.set('include_total', 'true');
+    }
+    return params.toString();
+}
+
+// Load applications from API, one page at a time
+async function loadApplications(reset = true) {
     try {
-        const response = await fetch(`${API_BASE}/applications`);
+        const response = await apiFetch(`/applications?${buildListQuery(reset ? null : nextCursor)}`);
         if (response.ok) {
-            applications = await response.json();
+            const page = await response.json();
+            applications = reset ? page.items : applications.concat(page.items);
+            nextCursor = page.next_cursor;
+            if (reset) totalCount = page.total;
+            demoMode = false;
             filteredApplications = [...applications];
             updateStats();
             renderApplications();
+            connectLiveUpdates();
         } else {
             // Show demo data if API is not available
             loadDemoData();
@@ -59,6 +103,69 @@ async function loadApplications() {
     }
 }
 
+// Live updates: the server pushes one small diff per changed application (see app/live.py)
+function connectLiveUpdates() {
+    if (liveSource || typeof EventSource === 'undefined') return;
+    const token = localStorage.getItem('apiToken');
+    liveSource = new EventSource(`${API_BASE}/events` + (token ? `?token=${encodeURIComponent(token)}` : ''));
+    // EventSource reconnects by itself and sends Last-Event-ID, so missed changes are replayed
+    liveSource.onmessage = (event) => applyLiveChange(JSON.parse(event.data));
+    // The server couldn't replay what we missed (restart, or we fell too far behind): reload once
+    liveSource.addEventListener('reset', () => loadApplications());
+}
+
+// Whether an application belongs in the list under the current filters
+function matchesFilters(app) {
+    const searchTerm = document.getElementById('searchInput').value.trim().toLowerCase();
+    const statusFilter = document.getElementById('statusFilter').value;
+    return (!statusFilter || app.status === statusFilter) &&
+        (!searchTerm || app.company_name.toLowerCase().includes(searchTerm) ||
+            (app.role || '').toLowerCase().includes(searchTerm));
+}
+
+// Patch the loaded list in place instead of downloading it again
+function applyLiveChange(change) {
+    if (demoMode) return;
+    const index = applications.findIndex(app => app.id === change.id);
+
+    if (change.op === 'created') {
+        // Our own additions are already in the list
+        if (index === -1 && matchesFilters(change.item)) {
+            applications.unshift(change.item);
+            if (totalCount !== null) totalCount++;
+        }
+    } else if (change.op === 'updated') {
+        if (index === -1) {
+            // Not loaded, but may have just entered the filtered view; only the server has the full row
+            if (change.changes.status && change.changes.status === document.getElementById('statusFilter').value) {
+                clearTimeout(filterTimer);
+                filterTimer = setTimeout(() => loadApplications(), 300);
+            }
+            return;
+        }
+        // Updated rows move to the top, as the newest-first list would order them
+        const [app] = applications.splice(index, 1);
+        Object.assign(app, change.changes);
+        if (matchesFilters(app)) {
+            applications.unshift(app);
+        } else if (totalCount !== null) {
+            totalCount--;
+        }
+    } else if (change.op === 'deleted') {
+        if (index === -1) return;
+        applications.splice(index, 1);
+        if (totalCount !== null) totalCount--;
+    }
+
+    // A sync can deliver many changes at once; render and refresh the stats once per burst
+    filteredApplications = [...applications];
+    clearTimeout(liveRenderTimer);
+    liveRenderTimer = setTimeout(() => {
+        updateStats();
+        renderApplications();
+    }, 100);
+}
+
 // Load demo data for preview
 function loadDemoData() {
     applications = [
@@ -108,17 +215,37 @@ function loadDemoData() {
             job_link: "https://jobs.netflix.com/jobs/112"
         }
     ];
+    demoMode = true;
+    nextCursor = null;
+    totalCount = null;
     filteredApplications = [...applications];
     updateStats();
     renderApplications();
     showToast('Demo data loaded - Connect to API for real data', 'info');
 }
 
-// Update statistics
-function updateStats() {
-    const total = applications.length;
+// Update statistics; the API serves precomputed aggregates, demo data is counted locally
+async function updateStats() {
+    if (!demoMode) {
+        try {
+            const response = await apiFetch(`/analytics`);
+            if (response.ok) {
+                const stats = await response.json();
+                renderStats(stats.total, stats.by_status['Interview Scheduled'] || 0, stats.by_status['Offer'] || 0);
+                return;
+            }
+        } catch (error) {
+            console.log('Analytics not available, counting loaded applications');
+        }
+    }
+
+    const total = totalCount !== null ? totalCount : applications.length;
     const interviews = applications.filter(app => app.status === 'Interview Scheduled').length;
     const offers = applications.filter(app => app.status === 'Offer').length;
+    renderStats(total, interviews, offers);
+}
+
+function renderStats(total, interviews, offers) {
     const successRate = total > 0 ? Math.round((offers / total) * 100) : 0;
 
     document.getElementById('totalApps').textContent = total;
@@ -130,6 +257,7 @@ function updateStats() {
 // Render applications list
 function renderApplications() {
     const container = document.getElementById('applicationsList');
+    document.getElementById('loadMoreContainer').classList.toggle('hidden', !nextCursor);
     
     if (filteredApplications.length === 0) {
         container.innerHTML = `
@@ -189,7 +317,7 @@ async function handleAddApplication(e) {
     };
 
     try {
-        const response = await fetch(`${API_BASE}/applications`, {
+        const response = await apiFetch(`/applications`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -199,7 +327,11 @@ async function handleAddApplication(e) {
 
         if (response.ok) {
             const newApp = await response.json();
-            applications.unshift(newApp);
+            // The live update for it may have arrived first
+            if (!applications.some(app => app.id === newApp.id)) {
+                applications.unshift(newApp);
+                if (totalCount !== null) totalCount++;
+            }
             filteredApplications = [...applications];
             updateStats();
             renderApplications();
@@ -230,7 +362,7 @@ async function updateStatus(id, currentStatus) {
     const nextStatus = statuses[(currentIndex + 1) % statuses.length];
 
     try {
-        const response = await fetch(`${API_BASE}/applications/${id}`, {
+        const response = await apiFetch(`/applications/${id}`, {
             method: 'PUT',
             headers: {
                 'Content-Type': 'application/json',
@@ -241,7 +373,7 @@ async function updateStatus(id, currentStatus) {
         if (response.ok) {
             const updatedApp = await response.json();
             const index = applications.findIndex(app => app.id === id);
-            applications[index] = updatedApp;
+            if (index !== -1) applications[index] = updatedApp;
             filteredApplications = [...applications];
             updateStats();
             renderApplications();
@@ -267,12 +399,15 @@ async function deleteApplication(id) {
     }
 
     try {
-        const response = await fetch(`${API_BASE}/applications/${id}`, {
+        const response = await apiFetch(`/applications/${id}`, {
             method: 'DELETE'
         });
 
         if (response.ok) {
-            applications = applications.filter(app => app.id !== id);
+            if (applications.some(app => app.id === id)) {
+                applications = applications.filter(app => app.id !== id);
+                if (totalCount !== null) totalCount--;
+            }
             filteredApplications = [...applications];
             updateStats();
             renderApplications();
@@ -290,8 +425,14 @@ async function deleteApplication(id) {
     }
 }
 
-// Filter applications
+// Filter applications: reload from the server, or filter locally in demo mode
 function filterApplications() {
+    if (!demoMode) {
+        clearTimeout(filterTimer);
+        filterTimer = setTimeout(() => loadApplications(), 300);
+        return;
+    }
+
     const searchTerm = document.getElementById('searchInput').value.toLowerCase();
     const statusFilter = document.getElementById('statusFilter').value;
 
@@ -315,20 +456,23 @@ async function syncGmail() {
     syncBtn.disabled = true;
 
     try {
-        const response = await fetch(`${API_BASE}/sync-emails`, {
+        const response = await apiFetch(`/sync-emails`, {
             method: 'POST'
         });
+        if (!response.ok) {
+            throw new Error('Sync failed');
+        }
 
-        if (response.ok) {
-            const result = await response.json();
-            if (result.updated && result.updated.length > 0) {
-                showToast(`Synced ${result.updated.length} updates from Gmail!`);
-                loadApplications(); // Reload applications
-            } else {
-                showToast('No new updates found in Gmail', 'info');
-            }
+        // The sync runs in the background; poll the job until it finishes
+        const job = await waitForSyncJob(await response.json(), syncBtn);
+        if (job.state === 'failed') {
+            showToast(`Gmail sync failed: ${job.error}`, 'error');
+        } else if (job.result && job.result.length > 0) {
+            showToast(`Synced ${job.result.length} updates from Gmail!`);
+            // With live updates the list has already been patched as the sync committed
+            if (!liveSource) loadApplications();
         } else {
-            throw new Error('Sync failed');
+            showToast('No new updates found in Gmail', 'info');
         }
     } catch (error) {
         showToast('Gmail sync not available (Demo Mode)', 'warning');
@@ -340,6 +484,22 @@ async function syncGmail() {
     }
 }
 
+async function waitForSyncJob(job, syncBtn) {
+    while (job.state === 'queued' || job.state === 'running') {
+        await new Promise(resolve => setTimeout(resolve, 1500));
+        const response = await apiFetch(`/sync-jobs/${job.id}`);
+        if (!response.ok) {
+            throw new Error('Sync job lost');
+        }
+        job = await response.json();
+        const { processed, total } = job.progress;
+        if (total) {
+            syncBtn.innerHTML = `<i class="fas fa-spinner fa-spin"></i> <span>Syncing ${processed || 0}/${total}...</span>`;
+        }
+    }
+    return job;
+}
+
 // Utility functions
 function getStatusClass(status) {
     const statusClasses = {
@@ -135,7 +135,6 @@ def test_imports():
         'google.auth',
         'googleapiclient',
         'apscheduler',
-        'yagmail',
         'beautifulsoup4'
     ]
     
@@ -157,12 +156,64 @@ def test_imports():
         print("✅ All packages imported successfully")
         return True
 
+# Loaded on first use (a sync, the webhook, the scheduler starting), never by importing the API
+LAZY_MODULES = ['googleapiclient', 'google.auth', 'google_auth_oauthlib', 'telegram', 'apscheduler']
+# The bot and the sync jobs run without the web app
+WEB_MODULES = ['fastapi', 'starlette']
+
+# Entry point -> modules it must not load at import
+STARTUP_MODULES = {
+    'app.main': LAZY_MODULES,
+    'app.telegram_bot': WEB_MODULES,
+    'app.sync': LAZY_MODULES + WEB_MODULES,
+}
+
+def check_import_time(module, unwanted, budget_ms):
+    """Import module in a fresh interpreter; fail if it loads unwanted modules or exceeds the budget"""
+    import subprocess
+    code = f"import sys, {module}; print(','.join(m for m in {unwanted!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"❌ Importing {module} failed: {result.stderr.strip().splitlines()[-1:]}")
+        return False
+
+    # -X importtime lines: "import time: self [us] | cumulative | module"
+    total_us = None
+    for line in result.stderr.splitlines():
+        parts = [p.strip() for p in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            total_us = int(parts[1])
+    loaded = [m for m in result.stdout.strip().split(',') if m]
+
+    ok = True
+    if loaded:
+        print(f"❌ Importing {module} loaded modules it shouldn't: {', '.join(loaded)}")
+        ok = False
+    if total_us is None:
+        print(f"❌ Could not read the import time of {module}")
+        ok = False
+    elif total_us / 1000 > budget_ms:
+        print(f"❌ {module} took {total_us / 1000:.0f} ms to import (budget {budget_ms:.0f} ms)")
+        ok = False
+    if ok:
+        print(f"✅ {module} imports in {total_us / 1000:.0f} ms (budget {budget_ms:.0f} ms)")
+    return ok
+
+def test_startup_imports():
+    """Test that importing the API, the bot and the sync jobs stays within the cold start budget"""
+    print("\n🔍 Testing Import Time...")
+
+    budget_ms = float(os.getenv('IMPORT_BUDGET_MS', '1500'))
+    results = [check_import_time(module, unwanted, budget_ms) for module, unwanted in STARTUP_MODULES.items()]
+    return all(results)
+
 def main():
     """Run all tests"""
     print("🚀 Job Tracker Bot Setup Test\n")
     
     tests = [
         test_imports,
+        test_startup_imports,
         test_environment_variables,
         test_database,
         test_telegram_token,